@@ -0,0 +1,366 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+import numpy as np
+
+from vehicle_routing_islands import _open_shared_matrix, _share_distance_matrix
+from vehicle_routing_optimization import (
+    DistanceMatrix,
+    VehicleRoutingProblem,
+    build_distance_matrix,
+)
+from vehicle_routing_solution import Solution
+
+
+class SolveRequest(NamedTuple):
+    """Instancja do rozwiązania przez solve_batch"""
+
+    name: str
+    cities_data: Dict[str, Tuple[float, float]]
+    city_demands: Dict[str, int]
+    num_vehicles: int = 5
+    vehicle_capacity: int = 1000
+    depot: str = "Kraków"
+    distance_metric: str = "haversine"
+    distance_storage: str = "dense"
+    options: Optional[Dict[str, Any]] = None  # argumenty genetic_algorithm
+    distance_provider: Any = None  # vehicle_routing_distances.DistanceProvider
+
+
+class SolveResult(NamedTuple):
+    """Wynik jednej instancji; przy błędzie `routes` jest None, a `error` go opisuje"""
+
+    name: str
+    routes: Optional[Solution]
+    distance: Optional[float]
+    feasible: bool
+    wall_time: float
+    fitness_evaluations: int
+    error: Optional[str]
+
+
+def _matrix_key(request: SolveRequest) -> bytes:
+    """Skrót zbioru współrzędnych - instancje o tym samym skrócie dzielą macierz"""
+    coords = np.array(list(request.cities_data.values()), dtype=np.float64)
+    digest = hashlib.blake2b(coords.tobytes(), digest_size=16)
+    provider = request.distance_provider
+    metric = provider.key if provider is not None else request.distance_metric
+    digest.update(f"{metric}:{request.distance_storage}".encode())
+    return digest.digest()
+
+
+def _failure(name: str, error: BaseException, wall_time: float = 0.0) -> SolveResult:
+    return SolveResult(
+        name=name,
+        routes=None,
+        distance=None,
+        feasible=False,
+        wall_time=wall_time,
+        fitness_evaluations=0,
+        error=f"{type(error).__name__}: {error}",
+    )
+
+
+class _SharedMatrices:
+    """Macierze odległości w pamięci współdzielonej, po jednej na zbiór współrzędnych.
+
+    Macierze budują procesy robocze (_build_matrix), a proces główny przejmuje
+    pamięć i ją zwalnia. Nieużywane macierze (bez instancji w toku) usuwane są od
+    najdawniej użytej, gdy ich liczba przekracza `maxsize`.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, Tuple[Any, dict]]" = OrderedDict()
+        self._users: Dict[bytes, int] = {}
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._entries
+
+    def add(self, key: bytes, layout: dict) -> None:
+        """Przejęcie macierzy zbudowanej w procesie roboczym"""
+        memory = None
+        if "name" in layout:
+            memory = shared_memory.SharedMemory(name=layout["name"])
+        self._entries[key] = (memory, layout)
+
+    def acquire(self, key: bytes) -> dict:
+        self._entries.move_to_end(key)
+        self._users[key] = self._users.get(key, 0) + 1
+        self._evict()
+        return self._entries[key][1]
+
+    def release(self, key: bytes) -> None:
+        self._users[key] -= 1
+        self._evict()
+
+    def _evict(self) -> None:
+        idle = [key for key in self._entries if not self._users.get(key)]
+        for key in idle[: max(0, len(self._entries) - self.maxsize)]:
+            self._free(key)
+
+    def _free(self, key: bytes) -> None:
+        memory, _ = self._entries.pop(key)
+        self._users.pop(key, None)
+        if memory is not None:
+            memory.close()
+            memory.unlink()
+
+    def close(self) -> None:
+        for key in list(self._entries):
+            self._free(key)
+
+
+def _build_matrix(request: SolveRequest) -> dict:
+    """Macierz odległości instancji liczona w procesie roboczym i zapisana do pamięci
+    współdzielonej; zwraca jej opis, a pamięć przejmuje proces główny.
+
+    Macierz zależy tylko od współrzędnych i sposobu liczenia odległości (jak klucz
+    _matrix_key) - pozostałe dane instancji sprawdza dopiero _solve_instance, więc
+    błędna instancja nie psuje innych o tych samych współrzędnych.
+    """
+    coords = np.array(list(request.cities_data.values()), dtype=np.float64)
+    matrix = build_distance_matrix(
+        coords.reshape(-1, 2),
+        request.distance_storage,
+        request.distance_metric,
+        request.distance_provider,
+    )
+    memory, layout = _share_distance_matrix(matrix)
+    if memory is not None:
+        memory.close()
+    return layout
+
+
+# Macierze dołączone w procesie roboczym, który obsługuje wiele instancji
+_worker_matrices: "OrderedDict[str, Tuple[Any, DistanceMatrix]]" = OrderedDict()
+WORKER_MATRIX_CACHE_SIZE = 4
+
+
+def _worker_matrix(layout: dict) -> DistanceMatrix:
+    """Macierz z pamięci współdzielonej; dołączenia są ponownie używane"""
+    if "matrix" in layout:
+        return layout["matrix"]
+
+    name = layout["name"]
+    if name not in _worker_matrices:
+        _worker_matrices[name] = _open_shared_matrix(layout)
+        while len(_worker_matrices) > WORKER_MATRIX_CACHE_SIZE:
+            memory, _ = _worker_matrices.popitem(last=False)[1]
+            try:
+                memory.close()
+            except BufferError:
+                # Widok na pamięć wciąż istnieje - zostanie zwolniona z procesem
+                pass
+    _worker_matrices.move_to_end(name)
+    return _worker_matrices[name][1]
+
+
+def _solve_instance(request: SolveRequest, layout: dict) -> SolveResult:
+    """Rozwiązanie jednej instancji w procesie roboczym; błędy trafiają do wyniku"""
+    start = time.perf_counter()
+    try:
+        problem = VehicleRoutingProblem(
+            request.cities_data,
+            request.city_demands,
+            num_vehicles=request.num_vehicles,
+            vehicle_capacity=request.vehicle_capacity,
+            distance_storage=request.distance_storage,
+            distance_matrix=_worker_matrix(layout),
+            depot=request.depot,
+            distance_metric=request.distance_metric,
+            distance_provider=request.distance_provider,
+        )
+        solution = problem.genetic_algorithm(**(request.options or {}))
+        return SolveResult(
+            name=request.name,
+            routes=solution,
+            distance=float(solution.total_distance),
+            feasible=solution.feasible,
+            wall_time=time.perf_counter() - start,
+            fitness_evaluations=problem.fitness_evaluations,
+            error=None,
+        )
+    except Exception as e:
+        return _failure(request.name, e, time.perf_counter() - start)
+
+
+def _run_isolated(function: Callable, *args) -> Any:
+    """Wywołanie funkcji we własnym procesie, tak by jego awaria nie dotknęła innych
+    (awaria procesu zgłaszana jest jako BrokenProcessPool)"""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(function, *args).result()
+
+
+def _solve_isolated(request: SolveRequest, layout: dict) -> SolveResult:
+    """Rozwiązanie instancji we własnym procesie"""
+    try:
+        return _run_isolated(_solve_instance, request, layout)
+    except BrokenProcessPool as e:
+        return _failure(request.name, e)
+
+
+def solve_batch(
+    requests: Iterable[SolveRequest],
+    workers: Optional[int] = None,
+    max_pending: Optional[int] = None,
+    matrix_cache_size: int = 16,
+) -> Iterator[SolveResult]:
+    """Rozwiązanie wielu niezależnych instancji w puli procesów.
+
+    Wyniki zwracane są w kolejności zakończenia. Instancje pobierane są z `requests`
+    leniwie - w toku jest najwyżej `max_pending` (domyślnie 2 × `workers`). Macierz
+    odległości liczona jest raz dla każdego zbioru współrzędnych jako zadanie puli,
+    udostępniana procesom przez pamięć współdzieloną, a instancje czekające na nią
+    trafiają do puli, gdy jest gotowa. Procesy robocze obsługują kolejne zadania.
+
+    Błąd instancji (w tym awaria procesu roboczego) daje wynik z polem `error` i nie
+    przerywa pozostałych; zadania przerwane awarią puli liczone są ponownie osobno.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    matrices = _SharedMatrices(matrix_cache_size)
+    requests = iter(requests)
+    exhausted = False
+    # Rozwiązywane instancje oraz budowane macierze z instancjami, które na nie czekają
+    solving: Dict[Future, Tuple[SolveRequest, bytes, dict]] = {}
+    building: Dict[Future, bytes] = {}
+    waiting: Dict[bytes, List[SolveRequest]] = {}
+    # Pamięć tworzona przez procesy robocze rejestrowana jest we wspólnym procesie
+    # śledzącym, który zwolni ją także po awarii procesu roboczego
+    resource_tracker.ensure_running()
+    executor = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(request: SolveRequest, key: bytes) -> None:
+        layout = matrices.acquire(key)
+        solving[executor.submit(_solve_instance, request, layout)] = (
+            request,
+            key,
+            layout,
+        )
+
+    def matrix_ready(key: bytes, layout: dict) -> None:
+        matrices.add(key, layout)
+        for request in waiting.pop(key):
+            submit(request, key)
+
+    def matrix_failed(key: bytes, error: BaseException) -> Iterator[SolveResult]:
+        for request in waiting.pop(key):
+            yield _failure(request.name, error)
+
+    try:
+        while True:
+            in_flight = len(solving) + sum(len(queue) for queue in waiting.values())
+            while not exhausted and in_flight < max_pending:
+                request = next(requests, None)
+                if request is None:
+                    exhausted = True
+                    break
+                in_flight += 1
+                try:
+                    key = _matrix_key(request)
+                except Exception as e:
+                    yield _failure(request.name, e)
+                    continue
+                if key in waiting:
+                    waiting[key].append(request)
+                elif key in matrices:
+                    submit(request, key)
+                else:
+                    waiting[key] = [request]
+                    building[executor.submit(_build_matrix, request)] = key
+
+            if not solving and not building:
+                return
+
+            done, _ = wait(list(solving) + list(building), return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                try:
+                    value = future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    continue
+                except Exception as e:
+                    # Tylko budowa macierzy zgłasza błędy - _solve_instance je zwraca
+                    yield from matrix_failed(building.pop(future), e)
+                    continue
+                if future in building:
+                    matrix_ready(building.pop(future), value)
+                else:
+                    _, key, _ = solving.pop(future)
+                    matrices.release(key)
+                    yield value
+
+            if broken:
+                # Awaria procesu unieważnia całą pulę i wszystkie zadania w toku.
+                # Nie wiadomo, które ją spowodowało, więc każde liczone jest osobno.
+                executor.shutdown(wait=False, cancel_futures=True)
+                for key in building.values():
+                    try:
+                        matrices.add(key, _run_isolated(_build_matrix, waiting[key][0]))
+                    except Exception as e:
+                        yield from matrix_failed(key, e)
+                building = {}
+                for request, key, layout in solving.values():
+                    result = _solve_isolated(request, layout)
+                    matrices.release(key)
+                    yield result
+                solving = {}
+                executor = ProcessPoolExecutor(max_workers=workers)
+                for key in [key for key in waiting if key in matrices]:
+                    for request in waiting.pop(key):
+                        submit(request, key)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        matrices.close()
+
+
+def check_failure_isolation(workers: int = 2) -> List[str]:
+    """Sprawdzenie, że błędna instancja nie psuje instancji o tych samych
+    współrzędnych (wspólnej macierzy odległości). Zwraca opisy niezgodności."""
+    from cities_data import cities_data, city_demands
+
+    cities = list(cities_data)[:12]
+    coords = {city: cities_data[city] for city in cities}
+    demands = {city: city_demands.get(city, 0) for city in cities}
+    options = {"population_size": 10, "generations": 3, "seed": 0}
+    requests = [
+        # Za mała ładowność - błąd tylko tej instancji
+        SolveRequest("bad", coords, demands, num_vehicles=1, vehicle_capacity=10),
+        SolveRequest("good-1", coords, demands, options=options),
+        SolveRequest("good-2", coords, demands, options=options),
+    ]
+    results = {result.name: result for result in solve_batch(requests, workers)}
+
+    mismatches = []
+    if results["bad"].error is None:
+        mismatches.append("bad: brak błędu dla instancji o zbyt małej ładowności")
+    for name in ("good-1", "good-2"):
+        if results[name].error is not None:
+            mismatches.append(f"{name}: {results[name].error}")
+    return mismatches
+
+
+if __name__ == "__main__":
+    problems = check_failure_isolation()
+    for problem in problems:
+        print(problem)
+    print("OK" if not problems else "BŁĘDY")
+    raise SystemExit(1 if problems else 0)
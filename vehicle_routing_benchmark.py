@@ -0,0 +1,379 @@
+import argparse
+import ast
+import itertools
+import json
+import math
+import multiprocessing
+import platform
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from vehicle_routing_optimization import (
+    VehicleRoutingProblem,
+    euclidean_matrix,
+    haversine_matrix,
+)
+
+INSTANCES_DIR = Path(__file__).resolve().parent / "benchmarks" / "instances"
+BUILTIN_INSTANCE = "cities_data"
+
+# Obsługiwane typy odległości z nagłówka EDGE_WEIGHT_TYPE
+EDGE_WEIGHT_TYPES = ("EUC_2D", "HAVERSINE")
+
+
+class CVRPInstance(NamedTuple):
+    """Instancja CVRP wczytana z pliku CVRPLIB lub z danych wbudowanych"""
+
+    name: str
+    coordinates: Dict[str, Tuple[float, float]]
+    demands: Dict[str, int]
+    depot: str
+    capacity: int
+    num_vehicles: int
+    edge_weight_type: str
+    best_known: Optional[float]
+
+
+def _best_known_values() -> Dict[str, float]:
+    path = INSTANCES_DIR / "best_known.json"
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_cvrplib_instance(path) -> CVRPInstance:
+    """Wczytanie instancji w formacie CVRPLIB (TSPLIB)"""
+    path = Path(path)
+    header: Dict[str, str] = {}
+    coordinates: Dict[str, Tuple[float, float]] = {}
+    demands: Dict[str, int] = {}
+    depots: List[str] = []
+    section = None
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line == "EOF":
+                break
+            if line.endswith("SECTION"):
+                section = line
+                continue
+
+            if section is None:
+                key, _, value = line.partition(":")
+                header[key.strip()] = value.strip()
+            elif section == "NODE_COORD_SECTION":
+                node, x, y = line.split()[:3]
+                coordinates[node] = (float(x), float(y))
+            elif section == "DEMAND_SECTION":
+                node, demand = line.split()[:2]
+                demands[node] = int(demand)
+            elif section == "DEPOT_SECTION" and line != "-1":
+                depots.append(line.split()[0])
+
+    edge_weight_type = header.get("EDGE_WEIGHT_TYPE", "EUC_2D")
+    if edge_weight_type not in EDGE_WEIGHT_TYPES:
+        raise ValueError(f"Nieobsługiwany typ odległości: {edge_weight_type}")
+    if len(depots) != 1:
+        raise ValueError(f"Instancja {path.name} musi mieć dokładnie jedną bazę.")
+
+    name = header.get("NAME", path.stem)
+    depot = depots[0]
+    demands.pop(depot, None)
+    capacity = int(header["CAPACITY"])
+
+    # Liczba pojazdów z nazwy (np. A-n32-k5), a w jej braku - minimalna możliwa
+    match = re.search(r"-k(\d+)$", name)
+    num_vehicles = (
+        int(match.group(1)) if match else math.ceil(sum(demands.values()) / capacity)
+    )
+
+    return CVRPInstance(
+        name=name,
+        coordinates=coordinates,
+        demands=demands,
+        depot=depot,
+        capacity=capacity,
+        num_vehicles=num_vehicles,
+        edge_weight_type=edge_weight_type,
+        best_known=_best_known_values().get(name),
+    )
+
+
+def builtin_instance() -> CVRPInstance:
+    """Wbudowany zestaw miast Polski (odległości haversine)"""
+    from cities_data import cities_data, city_demands
+
+    return CVRPInstance(
+        name=BUILTIN_INSTANCE,
+        coordinates=cities_data,
+        demands=city_demands,
+        depot="Kraków",
+        capacity=1000,
+        num_vehicles=5,
+        edge_weight_type="HAVERSINE",
+        best_known=None,
+    )
+
+
+def bundled_instances() -> List[str]:
+    """Nazwy instancji dołączonych do repozytorium"""
+    return sorted(path.stem for path in INSTANCES_DIR.glob("*.vrp"))
+
+
+def load_instance(spec: str) -> CVRPInstance:
+    """Instancja wskazana ścieżką, nazwą dołączonego pliku lub `cities_data`"""
+    if spec == BUILTIN_INSTANCE:
+        return builtin_instance()
+
+    path = Path(spec)
+    if not path.exists():
+        path = INSTANCES_DIR / f"{spec}.vrp"
+    return load_cvrplib_instance(path)
+
+
+def instance_distance_matrix(instance: CVRPInstance) -> np.ndarray:
+    """Macierz odległości instancji; EUC_2D zaokrąglane jak w CVRPLIB"""
+    coords = np.array(list(instance.coordinates.values()))
+    if instance.edge_weight_type == "EUC_2D":
+        return np.rint(euclidean_matrix(coords, coords))
+    return haversine_matrix(coords, coords)
+
+
+def _peak_memory_bytes() -> Optional[int]:
+    """Szczytowe zużycie pamięci (RSS) bieżącego procesu"""
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux podaje wartość w KB, macOS w bajtach
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case(case: Tuple[str, int, Dict[str, Any]]) -> Dict[str, Any]:
+    """Pojedyncze uruchomienie: instancja, ziarno i zestaw parametrów"""
+    spec, seed, params = case
+    params = dict(params)
+    extra_vehicles = params.pop("extra_vehicles", 0)
+    backend = params.pop("backend", "auto")
+
+    setup_start = time.perf_counter()
+    instance = load_instance(spec)
+    vrp = VehicleRoutingProblem(
+        instance.coordinates,
+        instance.demands,
+        num_vehicles=instance.num_vehicles + extra_vehicles,
+        vehicle_capacity=instance.capacity,
+        distance_matrix=instance_distance_matrix(instance),
+        depot=instance.depot,
+        backend=backend,
+    )
+    setup_time = time.perf_counter() - setup_start
+
+    start = time.perf_counter()
+    solution = vrp.genetic_algorithm(seed=seed, **params)
+    wall_time = time.perf_counter() - start
+
+    feasible = solution.feasible
+    distance = float(solution.total_distance)
+    gap = None
+    if feasible and instance.best_known:
+        gap = 100.0 * (distance - instance.best_known) / instance.best_known
+
+    return {
+        "instance": instance.name,
+        "seed": seed,
+        "params": dict(case[2]),
+        "num_vehicles": vrp.num_vehicles,
+        "distance": distance,
+        "feasible": feasible,
+        "best_known": instance.best_known,
+        "gap_percent": gap,
+        "setup_time": setup_time,
+        "wall_time": wall_time,
+        "evaluations": vrp.fitness_evaluations,
+        "evaluations_per_second": (
+            vrp.fitness_evaluations / wall_time if wall_time > 0 else None
+        ),
+        "peak_memory_bytes": _peak_memory_bytes(),
+    }
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+
+def _summarize(runs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Zestawienie wyników dla każdej pary (instancja, parametry)"""
+    groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for run in runs:
+        key = (run["instance"], json.dumps(run["params"], sort_keys=True))
+        groups.setdefault(key, []).append(run)
+
+    summary = []
+    for (instance, _), group in groups.items():
+        feasible = [run for run in group if run["feasible"]]
+        memory = [run["peak_memory_bytes"] for run in group if run["peak_memory_bytes"]]
+        summary.append(
+            {
+                "instance": instance,
+                "params": group[0]["params"],
+                "runs": len(group),
+                "feasible_runs": len(feasible),
+                "best_distance": min(
+                    (run["distance"] for run in feasible), default=None
+                ),
+                "mean_distance": _mean([run["distance"] for run in feasible]),
+                "mean_gap_percent": _mean(
+                    [
+                        run["gap_percent"]
+                        for run in feasible
+                        if run["gap_percent"] is not None
+                    ]
+                ),
+                "mean_wall_time": _mean([run["wall_time"] for run in group]),
+                "mean_evaluations_per_second": _mean(
+                    [
+                        run["evaluations_per_second"]
+                        for run in group
+                        if run["evaluations_per_second"] is not None
+                    ]
+                ),
+                "max_peak_memory_bytes": max(memory) if memory else None,
+            }
+        )
+    return summary
+
+
+def _metadata() -> Dict[str, Any]:
+    """Opis środowiska pozwalający porównywać raporty między wersjami"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": multiprocessing.cpu_count(),
+    }
+
+
+def run_benchmark(
+    instances: Iterable[str],
+    seeds: Iterable[int],
+    param_grid: Dict[str, List[Any]],
+    workers: int = 1,
+) -> Dict[str, Any]:
+    """Uruchomienie wszystkich kombinacji instancji, ziaren i parametrów.
+
+    Każdy przypadek działa w świeżym procesie, dzięki czemu pomiar szczytowej pamięci
+    dotyczy tylko jego. Przy `workers` > 1 przypadki konkurują o procesor, więc czasy
+    nadają się do porównań tylko przy tej samej liczbie procesów.
+    """
+    keys = sorted(param_grid)
+    combinations = [
+        dict(zip(keys, values))
+        for values in itertools.product(*(param_grid[key] for key in keys))
+    ]
+    cases = [
+        (spec, seed, params)
+        for spec in instances
+        for params in combinations
+        for seed in seeds
+    ]
+
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes=workers, maxtasksperchild=1) as pool:
+        runs = list(pool.imap(run_case, cases))
+
+    return {"metadata": _metadata(), "runs": runs, "summary": _summarize(runs)}
+
+
+def _parse_value(text: str) -> Any:
+    """Wartość parametru siatki: literał Pythona (liczba, True/False, None) lub tekst"""
+    text = text.strip()
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        pass
+    try:
+        return float(text)  # np. inf i nan
+    except ValueError:
+        return text
+
+
+def _parse_grid(items: List[str]) -> Dict[str, List[Any]]:
+    grid = {}
+    for item in items:
+        key, _, values = item.partition("=")
+        if not values:
+            raise argparse.ArgumentTypeError(f"Niepoprawny parametr siatki: {item}")
+        grid[key.strip()] = [_parse_value(value) for value in values.split(",")]
+    return grid
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark algorytmu genetycznego na instancjach CVRPLIB"
+    )
+    parser.add_argument(
+        "instances",
+        nargs="*",
+        help="ścieżki lub nazwy instancji (domyślnie wszystkie dołączone)",
+    )
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--generations", type=int, default=300)
+    parser.add_argument("--population-size", type=int, default=200)
+    parser.add_argument("--time-limit", type=float, default=None)
+    parser.add_argument(
+        "--grid",
+        action="append",
+        default=[],
+        help="siatka parametrów, np. mutation_rate=0.1,0.2 (można powtarzać)",
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", help="plik wynikowy JSON (domyślnie stdout)")
+    args = parser.parse_args(argv)
+
+    grid = {
+        "generations": [args.generations],
+        "population_size": [args.population_size],
+        "time_limit": [args.time_limit],
+    }
+    grid.update(_parse_grid(args.grid))
+
+    report = run_benchmark(
+        args.instances or bundled_instances(), args.seeds, grid, workers=args.workers
+    )
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vehicle_routing_optimization import Individual
+
+CHECKPOINT_VERSION = 1
+
+
+def encode_population(
+    population: List[Individual], num_vehicles: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Populacja jako płaska tablica miast i długości tras (osobniki × pojazdy)"""
+    lengths = np.array(
+        [len(route) for individual in population for route in individual],
+        dtype=np.int32,
+    ).reshape(len(population), num_vehicles)
+    cities = np.fromiter(
+        (city for individual in population for route in individual for city in route),
+        dtype=np.int32,
+        count=int(lengths.sum()),
+    )
+    return cities, lengths
+
+
+def decode_population(cities: np.ndarray, lengths: np.ndarray) -> List[Individual]:
+    """Odtworzenie populacji z płaskiej tablicy miast i długości tras"""
+    flat = cities.tolist()
+    population = []
+    offset = 0
+    for individual_lengths in lengths.tolist():
+        individual = []
+        for length in individual_lengths:
+            individual.append(flat[offset : offset + length])
+            offset += length
+        population.append(individual)
+    return population
+
+
+def _encode_rng_state(state: tuple) -> Dict[str, np.ndarray]:
+    version, internal, gauss_next = state
+    return {
+        "rng_version": np.array(version),
+        "rng_internal": np.array(internal, dtype=np.uint64),
+        "rng_gauss_next": np.array(np.nan if gauss_next is None else gauss_next),
+    }
+
+
+def _decode_rng_state(data) -> tuple:
+    gauss_next = float(data["rng_gauss_next"])
+    return (
+        int(data["rng_version"]),
+        tuple(int(value) for value in data["rng_internal"]),
+        None if np.isnan(gauss_next) else gauss_next,
+    )
+
+
+def save_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    """Atomowy zapis stanu algorytmu do pliku .npz.
+
+    Dane trafiają najpierw do pliku tymczasowego w tym samym katalogu, który następnie
+    zastępuje plik docelowy - przerwany zapis nie psuje poprzedniego punktu kontrolnego.
+    """
+    num_vehicles = state["num_vehicles"]
+    cities, lengths = encode_population(state["population"], num_vehicles)
+    best_cities, best_lengths = encode_population(
+        [state["best_individual"]], num_vehicles
+    )
+
+    arrays = {
+        "version": np.array(CHECKPOINT_VERSION),
+        "population_cities": cities,
+        "population_lengths": lengths,
+        "best_cities": best_cities,
+        "best_lengths": best_lengths,
+        "best_score": np.array(state["best_score"]),
+        "generation": np.array(state["generation"]),
+        "stagnation": np.array(state["stagnation"]),
+        "elapsed": np.array(state["elapsed"]),
+        "problem": np.array(json.dumps(state["problem"])),
+        "options": np.array(json.dumps(state["options"])),
+        "penalty_weights": np.array(state.get("penalty_weights", []), dtype=np.float64),
+        **_encode_rng_state(state["rng_state"]),
+    }
+
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary_path = tempfile.mkstemp(
+        dir=directory, prefix=".checkpoint-", suffix=".npz"
+    )
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            np.savez_compressed(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    """Wczytanie stanu zapisanego przez save_checkpoint"""
+    with np.load(path, allow_pickle=False) as data:
+        if int(data["version"]) != CHECKPOINT_VERSION:
+            raise ValueError(f"Nieobsługiwana wersja punktu kontrolnego: {path}")
+
+        return {
+            "population": decode_population(
+                data["population_cities"], data["population_lengths"]
+            ),
+            "best_individual": decode_population(
+                data["best_cities"], data["best_lengths"]
+            )[0],
+            "best_score": float(data["best_score"]),
+            "generation": int(data["generation"]),
+            "stagnation": int(data["stagnation"]),
+            "elapsed": float(data["elapsed"]),
+            "problem": json.loads(str(data["problem"])),
+            "options": json.loads(str(data["options"])),
+            "rng_state": _decode_rng_state(data),
+            # Punkty kontrolne sprzed wprowadzenia kar nie zawierają wag
+            "penalty_weights": (
+                data["penalty_weights"].tolist() if "penalty_weights" in data else None
+            ),
+        }
+
+
+class CheckpointWriter:
+    """Zapis punktów kontrolnych w wątku w tle.
+
+    Jeśli poprzedni zapis wciąż trwa, nowy stan zastępuje oczekujący, więc pętla
+    algorytmu nigdy nie czeka na dysk, a zapisywany jest zawsze najnowszy stan.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.error: Optional[BaseException] = None
+        self._pending: Optional[Dict[str, Any]] = None
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, state: Dict[str, Any]) -> None:
+        with self._condition:
+            self._pending = state
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                state, self._pending = self._pending, None
+
+            try:
+                save_checkpoint(self.path, state)
+            except Exception as e:
+                self.error = e
+
+    def close(self) -> None:
+        """Dokończenie oczekującego zapisu i zatrzymanie wątku"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
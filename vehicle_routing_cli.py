@@ -0,0 +1,198 @@
+import argparse
+import json
+import re
+import sys
+from contextlib import nullcontext
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from vehicle_routing_batch import SolveRequest, SolveResult, solve_batch
+
+# Pola instancji w linii JSON (jak w SolveRequest, bez dostawcy odległości)
+REQUEST_FIELDS = (
+    "name",
+    "cities_data",
+    "city_demands",
+    "num_vehicles",
+    "vehicle_capacity",
+    "depot",
+    "distance_metric",
+    "distance_storage",
+    "options",
+)
+
+
+def parse_request(
+    line: str, default_name: str, default_options: Optional[Dict[str, Any]] = None
+) -> SolveRequest:
+    """Instancja z jednej linii JSON.
+
+    Obiekt ma pola jak load_json ("cities_data", "city_demands", "depot") oraz
+    opcjonalnie "name", "num_vehicles", "vehicle_capacity", "distance_metric",
+    "distance_storage" i "options" (argumenty genetic_algorithm, nadpisujące
+    `default_options`). Bez wskazania bazą jest pierwsze miasto.
+    """
+    data = json.loads(line)
+    if not isinstance(data, dict):
+        raise ValueError("Instancja musi być obiektem JSON.")
+    unknown = set(data).difference(REQUEST_FIELDS)
+    if unknown:
+        raise ValueError(f"Nieznane pola instancji: {', '.join(sorted(unknown))}")
+    if not data.get("cities_data"):
+        raise ValueError("Instancja nie zawiera miast (cities_data).")
+
+    cities_data = {city: tuple(coords) for city, coords in data["cities_data"].items()}
+    fields = {
+        key: value
+        for key, value in data.items()
+        if key not in ("name", "cities_data", "city_demands", "depot", "options")
+    }
+    return SolveRequest(
+        name=str(data.get("name", default_name)),
+        cities_data=cities_data,
+        city_demands=data.get("city_demands", {}),
+        depot=data.get("depot", next(iter(cities_data))),
+        options={**(default_options or {}), **(data.get("options") or {})},
+        **fields,
+    )
+
+
+def read_requests(
+    lines: Iterable[str],
+    source: str,
+    on_error: Callable[[SolveResult], None],
+    default_options: Optional[Dict[str, Any]] = None,
+) -> Iterator[SolveRequest]:
+    """Instancje z kolejnych linii strumienia, czytane leniwie.
+
+    Puste linie są pomijane, a linia, której nie da się odczytać, daje wynik z błędem
+    przekazywany do `on_error` (bez przerywania strumienia). Domyślną nazwą
+    instancji jest `źródło:numer linii`.
+    """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        name = f"{source}:{number}"
+        try:
+            yield parse_request(line, name, default_options)
+        except (ValueError, TypeError, AttributeError) as e:
+            on_error(
+                SolveResult(name, None, None, False, 0.0, 0, f"{type(e).__name__}: {e}")
+            )
+
+
+def result_record(result: SolveResult) -> Dict[str, Any]:
+    """Wynik instancji jako obiekt JSON (trasy bez bazy, jak w Solution)"""
+    record = {
+        "name": result.name,
+        "distance": result.distance,
+        "feasible": result.feasible,
+        "wall_time": result.wall_time,
+        "fitness_evaluations": result.fitness_evaluations,
+        "error": result.error,
+    }
+    if result.routes is not None:
+        record["depot"] = result.routes.depot
+        record["routes"] = [list(route) for route in result.routes]
+        record["route_distances"] = result.routes.distances
+        record["route_loads"] = result.routes.loads
+    return record
+
+
+def render_map(result: SolveResult, directory: Path) -> str:
+    """Mapa tras instancji zapisana jako <nazwa>.html w `directory`"""
+    # Import lokalny - folium potrzebny jest tylko przy rysowaniu map
+    from vehicle_routing_visualization import visualize_routes
+
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / (re.sub(r"[^\w.-]", "_", result.name) + ".html")
+    visualize_routes(result.routes.coordinates, result.routes, output_path=str(path))
+    return str(path)
+
+
+def run(
+    lines: Iterable[str],
+    output: IO[str],
+    source: str = "stdin",
+    workers: Optional[int] = None,
+    max_pending: Optional[int] = None,
+    maps: Optional[Path] = None,
+    default_options: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Rozwiązanie instancji ze strumienia; każdy wynik zapisywany jest do `output`
+    zaraz po zakończeniu. Zwraca liczbę instancji zakończonych błędem.
+
+    W pamięci są tylko instancje w toku (solve_batch pobiera je leniwie), więc
+    zużycie pamięci nie zależy od długości strumienia.
+    """
+    failures = 0
+
+    def write(result: SolveResult) -> None:
+        nonlocal failures
+        record = result_record(result)
+        if maps is not None and result.routes is not None:
+            try:
+                record["map"] = render_map(result, maps)
+            except Exception as e:
+                record["map_error"] = f"{type(e).__name__}: {e}"
+        failures += result.error is not None
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output.flush()
+
+    requests = read_requests(lines, source, write, default_options)
+    for result in solve_batch(requests, workers=workers, max_pending=max_pending):
+        write(result)
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Rozwiązywanie instancji z pliku JSON Lines bez interfejsu "
+        "graficznego; wyniki trafiają na stdout jako JSON Lines"
+    )
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="plik JSON Lines z instancjami (domyślnie stdin)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="liczba procesów roboczych"
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=None,
+        help="najwięcej instancji w toku (domyślnie 2 × workers)",
+    )
+    parser.add_argument(
+        "--options",
+        type=json.loads,
+        default={},
+        help="domyślne argumenty genetic_algorithm, np. '{\"generations\": 200}'",
+    )
+    parser.add_argument(
+        "--maps", type=Path, default=None, help="katalog na mapy HTML tras"
+    )
+    args = parser.parse_args(argv)
+
+    source = "stdin" if args.input == "-" else args.input
+    with (
+        nullcontext(sys.stdin)
+        if args.input == "-"
+        else open(args.input, encoding="utf-8")
+    ) as lines:
+        failures = run(
+            lines,
+            sys.stdout,
+            source,
+            args.workers,
+            args.max_pending,
+            args.maps,
+            args.options,
+        )
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
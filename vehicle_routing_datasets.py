@@ -0,0 +1,185 @@
+import csv
+import json
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Union
+
+import numpy as np
+
+BUILTIN_DATASET = "cities_data"
+
+# Pliki zbioru danych w formacie .npy (katalog)
+NPY_COORDINATES = "coordinates.npy"
+NPY_DEMANDS = "demands.npy"
+NPY_NAMES = "names.txt"
+
+
+class ArrayMapping(Mapping):
+    """Tablica NumPy udostępniana jak słownik nazwa miasta -> wartość.
+
+    Dane pozostają w tablicy (także odwzorowanej w pamięci z pliku .npy); słownik
+    nazw budowany jest dopiero przy pierwszym odczycie po nazwie.
+    """
+
+    def __init__(self, names: List[str], array: np.ndarray):
+        if len(names) != len(array):
+            raise ValueError(
+                f"Liczba nazw ({len(names)}) nie odpowiada liczbie wierszy ({len(array)})."
+            )
+        self.names = names
+        self.array = array
+        self._index: Optional[Dict[str, int]] = None
+
+    def __getitem__(self, name: str) -> Any:
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.names)}
+        value = self.array[self._index[name]]
+        return tuple(value.tolist()) if self.array.ndim > 1 else value.item()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def values(self) -> List[Any]:
+        if self.array.ndim > 1:
+            return [tuple(row) for row in self.array.tolist()]
+        return self.array.tolist()
+
+    def __reduce__(self):
+        # Kopia w innym procesie nie potrzebuje słownika nazw ani odwzorowania pliku
+        return ArrayMapping, (self.names, np.asarray(self.array))
+
+
+class Dataset(NamedTuple):
+    """Zbiór danych wejściowych: współrzędne i zapotrzebowanie miast oraz baza"""
+
+    name: str
+    cities_data: Mapping
+    city_demands: Mapping
+    depot: str
+
+
+def _dataset(
+    name: str,
+    names: List[str],
+    coordinates: np.ndarray,
+    demands: np.ndarray,
+    depot: Optional[str],
+) -> Dataset:
+    if not names:
+        raise ValueError(f"Zbiór danych {name} nie zawiera miast.")
+    if coordinates.ndim != 2 or coordinates.shape[1] != 2:
+        raise ValueError(f"Współrzędne w {name} muszą mieć postać (n, 2).")
+    # Bez wskazania bazą jest pierwsze miasto (jak Kraków w cities_data)
+    depot = names[0] if depot is None else depot
+    return Dataset(
+        name,
+        ArrayMapping(names, coordinates),
+        ArrayMapping(names, demands),
+        depot,
+    )
+
+
+def load_csv(path: Union[str, Path], depot: Optional[str] = None) -> Dataset:
+    """Kolumny name, latitude, longitude i opcjonalnie demand"""
+    names: List[str] = []
+    coordinates: List[float] = []
+    demands: List[int] = []
+
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            names.append(row["name"])
+            coordinates.append(float(row["latitude"]))
+            coordinates.append(float(row["longitude"]))
+            demands.append(int(row.get("demand") or 0))
+
+    return _dataset(
+        Path(path).stem,
+        names,
+        np.array(coordinates, dtype=np.float64).reshape(-1, 2),
+        np.array(demands, dtype=np.int64),
+        depot,
+    )
+
+
+def load_json(path: Union[str, Path], depot: Optional[str] = None) -> Dataset:
+    """Obiekt {"cities_data": {nazwa: [lat, lon]}, "city_demands": {...}, "depot": ...}"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    coordinates = data["cities_data"]
+    names = list(coordinates)
+    demands = data.get("city_demands", {})
+    return _dataset(
+        Path(path).stem,
+        names,
+        np.array(list(coordinates.values()), dtype=np.float64).reshape(-1, 2),
+        np.array([demands.get(name, 0) for name in names], dtype=np.int64),
+        depot or data.get("depot"),
+    )
+
+
+def load_npy(directory: Union[str, Path], depot: Optional[str] = None) -> Dataset:
+    """Katalog z coordinates.npy, demands.npy i opcjonalnie names.txt.
+
+    Tablice są odwzorowywane w pamięci (mmap), więc nie są wczytywane w całości.
+    Bez names.txt miasta nazywane są numerami wierszy.
+    """
+    directory = Path(directory)
+    coordinates = np.load(directory / NPY_COORDINATES, mmap_mode="r")
+    demands = np.load(directory / NPY_DEMANDS, mmap_mode="r")
+
+    names_path = directory / NPY_NAMES
+    if names_path.exists():
+        with open(names_path, encoding="utf-8") as f:
+            names = f.read().splitlines()
+    else:
+        names = [str(i) for i in range(len(coordinates))]
+
+    return _dataset(directory.name, names, coordinates, demands, depot)
+
+
+def save_npy(dataset: Dataset, directory: Union[str, Path]) -> None:
+    """Zapis zbioru danych w formacie czytanym przez load_npy (baza w pierwszym wierszu)"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    names = [dataset.depot] + [
+        name for name in dataset.cities_data if name != dataset.depot
+    ]
+
+    np.save(
+        directory / NPY_COORDINATES,
+        np.array([dataset.cities_data[name] for name in names], dtype=np.float64),
+    )
+    np.save(
+        directory / NPY_DEMANDS,
+        np.array([dataset.city_demands.get(name, 0) for name in names], dtype=np.int64),
+    )
+    with open(directory / NPY_NAMES, "w", encoding="utf-8") as f:
+        f.write("\n".join(names) + "\n")
+
+
+def load_builtin() -> Dataset:
+    """Wbudowany zestaw miast Polski z cities_data.py"""
+    from cities_data import cities_data, city_demands
+
+    return Dataset(BUILTIN_DATASET, cities_data, city_demands, "Kraków")
+
+
+def load_dataset(spec: Union[str, Path], depot: Optional[str] = None) -> Dataset:
+    """Zbiór danych wskazany nazwą `cities_data`, plikiem .csv/.json lub katalogiem .npy"""
+    if str(spec) == BUILTIN_DATASET:
+        return load_builtin()
+
+    path = Path(spec)
+    if path.is_dir():
+        return load_npy(path, depot)
+    if path.suffix == ".csv":
+        return load_csv(path, depot)
+    if path.suffix == ".json":
+        return load_json(path, depot)
+    if path.suffix == ".npy":
+        return load_npy(path.parent, depot)
+    raise ValueError(f"Nieobsługiwany format danych: {spec}")
@@ -0,0 +1,279 @@
+import hashlib
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from vehicle_routing_optimization import DISTANCE_METRICS
+
+
+def coordinate_hashes(coords: np.ndarray) -> np.ndarray:
+    """64-bitowe skróty współrzędnych punktów (klucze pamięci podręcznej)"""
+    data = np.ascontiguousarray(coords, dtype=np.float64).reshape(-1, 2).tobytes()
+    return np.array(
+        [
+            int.from_bytes(
+                hashlib.blake2b(data[i : i + 16], digest_size=8).digest(),
+                "little",
+                signed=True,
+            )
+            for i in range(0, len(data), 16)
+        ],
+        dtype=np.int64,
+    )
+
+
+class DistanceProvider(ABC):
+    """Źródło odległości (lub czasów przejazdu) między punktami.
+
+    Dostawca liczy blok macierzy: wiersze to punkty początkowe, kolumny - docelowe.
+    Dostawcy asymetryczni (`symmetric = False`) wymagają pełnej macierzy.
+    """
+
+    symmetric = True
+
+    @property
+    @abstractmethod
+    def key(self) -> str:
+        """Identyfikator wartości dostawcy, np. w pamięci podręcznej"""
+
+    @abstractmethod
+    def block(
+        self, coords_a: np.ndarray, coords_b: np.ndarray, dtype=np.float64
+    ) -> np.ndarray:
+        """Odległości od punktów `coords_a` (wiersze) do `coords_b` (kolumny)"""
+
+
+class MetricDistanceProvider(DistanceProvider):
+    """Odległości liczone wzorem: "haversine" (lat, lon) lub "euclidean" (x, y)"""
+
+    def __init__(self, metric: str = "haversine"):
+        if metric not in DISTANCE_METRICS:
+            raise ValueError(f"Nieznana metryka odległości: {metric}")
+        self.metric = metric
+
+    @property
+    def key(self) -> str:
+        return self.metric
+
+    def block(
+        self, coords_a: np.ndarray, coords_b: np.ndarray, dtype=np.float64
+    ) -> np.ndarray:
+        return DISTANCE_METRICS[self.metric](coords_a, coords_b, dtype=dtype)
+
+
+def save_matrix_file(
+    path: Union[str, Path], coordinates: np.ndarray, matrix: np.ndarray
+) -> None:
+    """Zapis macierzy (np. czasów przejazdu z silnika tras) w formacie MatrixFileProvider"""
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    matrix = np.asarray(matrix)
+    if matrix.shape != (len(coordinates), len(coordinates)):
+        raise ValueError(
+            f"Macierz {matrix.shape} nie odpowiada liczbie punktów ({len(coordinates)})."
+        )
+    np.savez(path, coordinates=coordinates, matrix=matrix)
+
+
+class MatrixFileProvider(DistanceProvider):
+    """Gotowa macierz z pliku .npz (tablice `coordinates` i `matrix`).
+
+    Wartości wybierane są według współrzędnych punktów, które muszą występować
+    w pliku. Macierz może być asymetryczna. Przy przekazaniu do innego procesu
+    przesyłana jest tylko ścieżka, a plik wczytywany jest ponownie przy pierwszym
+    użyciu.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = str(path)
+        self._load()
+        self.symmetric = bool(np.array_equal(self._matrix, self._matrix.T))
+        digest = hashlib.blake2b(self._coordinates.tobytes(), digest_size=16)
+        digest.update(np.ascontiguousarray(self._matrix).tobytes())
+        self._key = f"matrix:{digest.hexdigest()}"
+
+    def _load(self) -> None:
+        with np.load(self.path, allow_pickle=False) as data:
+            self._coordinates = np.asarray(data["coordinates"], dtype=np.float64)
+            self._matrix = data["matrix"]
+        self._index: Dict[Tuple[float, float], int] = {
+            (lat, lon): i for i, (lat, lon) in enumerate(self._coordinates.tolist())
+        }
+
+    @property
+    def key(self) -> str:
+        return self._key
+
+    def _positions(self, coords: np.ndarray) -> np.ndarray:
+        if self._matrix is None:
+            self._load()
+        try:
+            return np.array(
+                [self._index[(lat, lon)] for lat, lon in coords.tolist()],
+                dtype=np.int64,
+            )
+        except KeyError as e:
+            raise ValueError(
+                f"Punktu {e.args[0]} nie ma w macierzy {self.path}."
+            ) from None
+
+    def block(
+        self, coords_a: np.ndarray, coords_b: np.ndarray, dtype=np.float64
+    ) -> np.ndarray:
+        rows = self._positions(np.asarray(coords_a, dtype=np.float64).reshape(-1, 2))
+        columns = self._positions(np.asarray(coords_b, dtype=np.float64).reshape(-1, 2))
+        return self._matrix[np.ix_(rows, columns)].astype(dtype, copy=False)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.update(_coordinates=None, _matrix=None, _index={})
+        return state
+
+
+class CachedDistanceProvider(DistanceProvider):
+    """Trwała pamięć podręczna odległości innego dostawcy w bazie SQLite.
+
+    Wartości zapisywane są dla par skrótów współrzędnych (punkt początkowy, docelowy),
+    więc kolejne uruchomienia na częściowo tych samych punktach liczą u dostawcy tylko
+    pary z nowymi punktami. Pary punktu początkowego przechowywane są w jednym
+    wierszu bazy (posortowane skróty celów i wartości), bo odczyt milionów wierszy
+    po jednej parze trwałby dłużej niż obliczenia metryką.
+    """
+
+    def __init__(self, provider: DistanceProvider, path: Union[str, Path]):
+        self.provider = provider
+        self.path = str(path)
+        self.symmetric = provider.symmetric
+        self.computed_pairs = 0  # pary policzone przez dostawcę (bez trafień)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def key(self) -> str:
+        return self.provider.key
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS distances ("
+                "provider TEXT, source INTEGER, targets BLOB, distances BLOB, "
+                "UNIQUE (provider, source))"
+            )
+            self._connection.commit()
+        return self._connection
+
+    def _load_rows(self, sources: np.ndarray) -> Dict[int, Tuple[np.ndarray, ...]]:
+        """Zapisane cele i wartości punktów początkowych (skrót -> tablice)"""
+        connection = self._connect()
+        connection.execute("DROP TABLE IF EXISTS temp.sources")
+        connection.execute("CREATE TEMP TABLE sources (hash INTEGER PRIMARY KEY)")
+        connection.executemany(
+            "INSERT OR IGNORE INTO temp.sources VALUES (?)",
+            ((source,) for source in sources.tolist()),
+        )
+        rows = connection.execute(
+            "SELECT d.source, d.targets, d.distances FROM temp.sources s "
+            "JOIN distances d ON d.provider = ? AND d.source = s.hash",
+            (self.key,),
+        ).fetchall()
+        # Zakończenie transakcji zwalnia blokadę bazy dla innych procesów
+        connection.commit()
+        return {
+            source: (
+                np.frombuffer(targets, dtype=np.int64),
+                np.frombuffer(distances, dtype=np.float64),
+            )
+            for source, targets, distances in rows
+        }
+
+    def block(
+        self, coords_a: np.ndarray, coords_b: np.ndarray, dtype=np.float64
+    ) -> np.ndarray:
+        coords_a = np.asarray(coords_a, dtype=np.float64).reshape(-1, 2)
+        coords_b = np.asarray(coords_b, dtype=np.float64).reshape(-1, 2)
+        sources = coordinate_hashes(coords_a)
+        targets = coordinate_hashes(coords_b)
+        result = np.full((len(coords_a), len(coords_b)), np.nan)
+
+        with self._lock:
+            stored = self._load_rows(sources)
+            for i, source in enumerate(sources.tolist()):
+                if source not in stored:
+                    continue
+                known, values = stored[source]
+                index = np.minimum(np.searchsorted(known, targets), len(known) - 1)
+                hit = known[index] == targets
+                result[i, hit] = values[index[hit]]
+
+            missing = np.isnan(result)
+            if missing.any():
+                # Nowe punkty początkowe - całe wiersze; pozostałe braki to kolumny
+                # nowych punktów docelowych w znanych wierszach
+                new_rows = np.flatnonzero(missing.all(axis=1))
+                old_rows = np.flatnonzero(missing.any(axis=1) & ~missing.all(axis=1))
+                new_columns = np.flatnonzero(missing[old_rows].any(axis=0))
+                if len(new_rows):
+                    result[new_rows] = self.provider.block(coords_a[new_rows], coords_b)
+                if len(old_rows) and len(new_columns):
+                    result[np.ix_(old_rows, new_columns)] = self.provider.block(
+                        coords_a[old_rows], coords_b[new_columns]
+                    )
+                self._store(sources, targets, result, missing, stored)
+
+        return result.astype(dtype, copy=False)
+
+    def _store(
+        self,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        result: np.ndarray,
+        missing: np.ndarray,
+        stored: Dict[int, Tuple[np.ndarray, ...]],
+    ) -> None:
+        """Dopisanie policzonych par do wierszy ich punktów początkowych"""
+        self.computed_pairs += int(missing.sum())
+        updates = {}
+        for i in np.flatnonzero(missing.any(axis=1)).tolist():
+            source = int(sources[i])
+            known, values = updates.get(source) or stored.get(
+                source, (np.empty(0, dtype=np.int64), np.empty(0))
+            )
+            columns = missing[i]
+            # np.unique zostawia pierwsze wystąpienie - zapisane wartości mają pierwszeństwo
+            merged, first = np.unique(
+                np.concatenate([known, targets[columns]]), return_index=True
+            )
+            updates[source] = (
+                merged,
+                np.concatenate([values, result[i, columns]])[first],
+            )
+
+        connection = self._connect()
+        connection.executemany(
+            "INSERT OR REPLACE INTO distances VALUES (?, ?, ?, ?)",
+            (
+                (self.key, source, known.tobytes(), values.tobytes())
+                for source, (known, values) in updates.items()
+            ),
+        )
+        connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __getstate__(self):
+        # Połączenie z bazą i blokada nie są przenoszone do innych procesów
+        state = dict(self.__dict__)
+        state.update(_connection=None, _lock=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
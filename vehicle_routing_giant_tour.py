@@ -0,0 +1,278 @@
+import bisect
+import random
+from collections import deque
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Kodowanie osobnika jako jednej permutacji miast (giant tour). Funkcje przyjmują
+# VehicleRoutingProblem (bez importu - moduł optymalizacji używa tego modułu).
+# Permutacja dzielona jest na trasy procedurą Split: najkrótszy podział przy zadanej
+# kolejności miast, liczony z sum prefiksowych odległości i zapotrzebowania.
+
+
+def giant_tour(individual: List[List[int]]) -> List[int]:
+    """Trasy osobnika połączone w jedną permutację miast"""
+    return [city for route in individual for city in route]
+
+
+def order_crossover(
+    tour1: List[int], tour2: List[int], rng: random.Random, size: int
+) -> List[int]:
+    """Krzyżowanie OX: fragment pierwszego rodzica na swoim miejscu, pozostałe miasta
+    w kolejności z drugiego rodzica (od końca fragmentu, cyklicznie).
+
+    `size` to liczba wszystkich miast problemu (rozmiar tablicy oznaczeń).
+    """
+    n = len(tour1)
+    if n < 2:
+        return list(tour1)
+    start, end = crossover_points(n, rng)
+    taken = bytearray(size)
+    for city in tour1[start:end]:
+        taken[city] = 1
+    rest = [city for city in tour2[end:] + tour2[:end] if not taken[city]]
+    # Pozycje za fragmentem wypełniane są jako pierwsze, potem początek permutacji
+    return rest[n - end :] + tour1[start:end] + rest[: n - end]
+
+
+def _split_layer(
+    costs: Optional[List[float]],
+    offsets: List[float],
+    closing: List[float],
+    loads: List[int],
+    capacity: int,
+    first: int = 0,
+) -> Tuple[List[float], List[int]]:
+    """Warstwa programowania dynamicznego Split w czasie liniowym.
+
+    Trasa z miast o pozycjach i..j-1 kosztuje offsets[i] + closing[j], a jej ładunek
+    to loads[j] - loads[i]. `costs[i]` to koszt podziału pierwszych i miast z
+    poprzedniej warstwy (skończony w spójnym przedziale od `first`); bez niej (None)
+    warstwa korzysta z własnych wyników, czyli liczba tras nie jest ograniczona.
+    Kandydaci i tworzą kolejkę monotoniczną (rosnące costs[i] + offsets[i]), z której
+    początku usuwane są pozycje, od których trasa przekroczyłaby ładowność - każda
+    pozycja trafia do kolejki i opuszcza ją raz.
+    """
+    n = len(offsets) - 1
+    best = [0.0] + [float("inf")] * n
+    previous = [-1] * (n + 1)
+    source = best if costs is None else costs
+    candidates: deque = deque()
+    for j in range(first + 1, n + 1):
+        i = j - 1
+        if source[i] < float("inf"):
+            value = source[i] + offsets[i]
+            while (
+                candidates and source[candidates[-1]] + offsets[candidates[-1]] > value
+            ):
+                candidates.pop()
+            candidates.append(i)
+        while candidates and loads[j] - loads[candidates[0]] > capacity:
+            candidates.popleft()
+        if not candidates:
+            if source[j] == float("inf"):
+                break  # dalej nie ma już kandydatów
+            continue
+        i = candidates[0]
+        best[j] = source[i] + offsets[i] + closing[j]
+        previous[j] = i
+    return best, previous
+
+
+def _overload_last_route(
+    problem,
+    costs: List[float],
+    offsets: List[float],
+    closing: List[float],
+    loads: List[int],
+    best: List[float],
+    previous: List[int],
+) -> None:
+    """Ostatnia trasa bez limitu ładowności, z karą za nadmiar ładunku w koszcie"""
+    n = len(offsets) - 1
+    totals = np.asarray(costs[:n]) + np.asarray(offsets[:n]) + closing[n]
+    excess = np.maximum(loads[n] - np.asarray(loads[:n]) - problem.vehicle_capacity, 0)
+    totals = totals + problem.penalty_weights[0] * excess
+    i = int(np.argmin(totals))
+    best[n] = float(totals[i])
+    previous[n] = i
+
+
+def _overload_start(
+    problem,
+    unlimited: List[float],
+    previous: List[int],
+    offsets: List[float],
+    closing: List[float],
+    loads: List[int],
+) -> int:
+    """Najkrótszy prefiks, po którym ostatnia trasa z karą (_overload_last_route)
+    może dać najlepszy podział.
+
+    Koszt podziału prefiksu bez limitu tras (`unlimited`, `previous` - wynik
+    _split_layer) ogranicza z dołu koszt podziału na mniej tras, więc daje dolne
+    ograniczenie wyniku dla każdego prefiksu. Górne dają podziały na mniej tras niż
+    pojazdów: bez limitu (gdy mają tyle tras) i zachłanny, wypełniający kolejne
+    trasy do ładowności. Prefiksy z dolnym ograniczeniem powyżej górnego nie mogą
+    wygrać, a najdłuższe wygrywają zwykle przy dużej wadze kary.
+    """
+    n = len(offsets) - 1
+    capacity = problem.vehicle_capacity
+    weight = problem.penalty_weights[0]
+    routes = [0] * n
+    for j in range(1, n):
+        if unlimited[j] < float("inf"):
+            routes[j] = routes[previous[j]] + 1
+    # Te same działania co w _overload_last_route, więc ograniczenia są dokładne
+    bounds = np.asarray(unlimited[:n]) + np.asarray(offsets[:n]) + closing[n]
+    excess = np.maximum(loads[n] - np.asarray(loads[:n]) - capacity, 0)
+    bounds = bounds + weight * excess
+    upper = bounds[np.asarray(routes) < problem.num_vehicles].min()
+
+    # Koszt podziału zachłannego liczony jak w _split_layer nie jest mniejszy od
+    # kosztu najlepszego podziału tego prefiksu
+    cost, i = 0.0, 0
+    for _ in range(problem.num_vehicles - 1):
+        j = min(bisect.bisect_right(loads, loads[i] + capacity) - 1, n - 1)
+        if j <= i:
+            break
+        cost, i = cost + offsets[i] + closing[j], j
+    greedy = cost + offsets[i] + closing[n]
+    upper = min(upper, greedy + weight * excess[i])
+    return int(np.argmax(bounds <= upper))
+
+
+def _split_limited(
+    problem,
+    offsets: List[float],
+    closing: List[float],
+    loads: List[int],
+    overload_from: Optional[int] = None,
+) -> Optional[List[Tuple[int, int]]]:
+    """Podział na co najwyżej num_vehicles tras - warstwa na pojazd, O(n·V).
+
+    Warstwa k zachowuje tylko prefiksy, których resztę mogą jeszcze obsłużyć
+    pozostałe pojazdy (przy zapełnieniu bliskim ładowności to wąski przedział), a
+    gdy podział w ładowności nie istnieje, zwraca None. Z `overload_from` (wynik
+    _overload_start) ostatnia trasa przyjmuje resztę miast z karą za nadmiar
+    ładunku, a pozostałe pojazdy muszą obsłużyć co najmniej tyle pierwszych miast.
+    """
+    n = len(offsets) - 1
+    vehicles = problem.num_vehicles
+    capacity = problem.vehicle_capacity
+    # Prefiks do obsłużenia w ładowności i liczba obsługujących go pojazdów
+    if overload_from is None:
+        target, feasible_vehicles = n, vehicles
+    else:
+        target, feasible_vehicles = overload_from, vehicles - 1
+    costs = [0.0] + [float("inf")] * n
+    first = last = 0  # przedział skończonych kosztów poprzedniej warstwy
+    layers = []
+    for vehicle in range(vehicles):
+        best, previous = _split_layer(costs, offsets, closing, loads, capacity, first)
+        if vehicle == vehicles - 1 and best[n] == float("inf"):
+            if overload_from is None:
+                return None
+            _overload_last_route(
+                problem, costs, offsets, closing, loads, best, previous
+            )
+        # Co najwyżej k tras: podział z poprzedniej warstwy, jeśli nie jest gorszy
+        for j in range(first, last + 1):
+            if costs[j] <= best[j]:
+                best[j] = costs[j]
+                previous[j] = -1
+        # Osiągalne prefiksy tworzą spójny przedział: krótszy prefiks zawsze można
+        # podzielić na nie więcej tras
+        while last < n and best[last + 1] < float("inf"):
+            last += 1
+        if vehicle < vehicles - 1:
+            remaining = (feasible_vehicles - vehicle - 1) * capacity
+            while first <= last and loads[target] - loads[first] > remaining:
+                best[first] = float("inf")
+                first += 1
+            if first > last:
+                return None
+        costs = best
+        layers.append(previous)
+
+    segments = []
+    j = n
+    for previous in reversed(layers):
+        if previous[j] >= 0:
+            segments.append((previous[j], j))
+            j = previous[j]
+    return segments
+
+
+def crossover_points(n: int, rng: random.Random) -> Tuple[int, int]:
+    """Granice fragmentu przenoszonego przez krzyżowanie OX (start < end <= n)"""
+    start, end = sorted(rng.sample(range(n + 1), 2))
+    return start, end
+
+
+def split_inputs(
+    problem, tour: List[int], demands: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Tablice offsets, closing i loads procedury Split (opis w _split_layer) dla
+    niepustej permutacji; `demands` to zapotrzebowanie wszystkich miast"""
+    n = len(tour)
+    matrix = problem.distance_matrix
+    depot = np.full(n, problem.depot_index, dtype=np.int64)
+    stops = np.array(tour, dtype=np.int64)
+    # along[k] - droga od pierwszego do k-tego miasta wzdłuż permutacji
+    along = np.concatenate(
+        [[0.0], np.cumsum(np.asarray(matrix[stops[:-1], stops[1:]], dtype=np.float64))]
+    )
+    # offsets[i] - dojazd z bazy do miasta i minus droga do niego wzdłuż permutacji,
+    # closing[j] - droga wzdłuż permutacji do miasta j-1 i powrót do bazy
+    offsets = np.append(np.asarray(matrix[depot, stops], dtype=np.float64) - along, 0.0)
+    closing = np.concatenate(
+        [[0.0], along + np.asarray(matrix[stops, depot], dtype=np.float64)]
+    )
+    loads = np.concatenate([[0], np.cumsum(demands[stops])])
+    return offsets, closing, loads
+
+
+def split_tour(problem, tour: List[int]) -> Tuple[List[List[int]], List[int]]:
+    """Optymalny podział permutacji na co najwyżej num_vehicles tras w ładowności.
+
+    Najpierw liczony jest podział bez limitu pojazdów (O(n)); tylko gdy potrzebuje on
+    więcej tras niż pojazdów, podział powtarzany jest warstwami (O(n·V)). Jeśli przy
+    tej kolejności miast ładowności nie da się zachować, ostatnia trasa przyjmuje
+    resztę miast, a takiego osobnika karze lub naprawia algorytm genetyczny; warstwy
+    obejmują wtedy tylko prefiksy wskazane przez _overload_start.
+    """
+    n = len(tour)
+    if n == 0:
+        return [[] for _ in range(problem.num_vehicles)], [0] * problem.num_vehicles
+
+    offsets, closing, loads = (
+        array.tolist()
+        for array in split_inputs(
+            problem, tour, np.asarray(problem.demands, dtype=np.int64)
+        )
+    )
+    best, previous = _split_layer(
+        None, offsets, closing, loads, problem.vehicle_capacity
+    )
+    segments = []
+    if best[n] < float("inf"):
+        j = n
+        while j > 0:
+            segments.append((previous[j], j))
+            j = previous[j]
+    if not segments or len(segments) > problem.num_vehicles:
+        segments = _split_limited(problem, offsets, closing, loads)
+    if segments is None:
+        segments = _split_limited(
+            problem,
+            offsets,
+            closing,
+            loads,
+            _overload_start(problem, best, previous, offsets, closing, loads),
+        )
+
+    individual = [tour[i:j] for i, j in reversed(segments)]
+    individual.extend([] for _ in range(problem.num_vehicles - len(individual)))
+    return individual, problem._route_loads(individual)
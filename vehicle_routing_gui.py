@@ -1,18 +1,22 @@
 import sys
+import queue
+import threading
 import traceback
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import webbrowser
 import os
 
-from cities_data import cities_data, city_demands
+from vehicle_routing_datasets import BUILTIN_DATASET, load_dataset
 from vehicle_routing_optimization import VehicleRoutingProblem
 from vehicle_routing_visualization import visualize_routes
 
 
 class VRPOptimizationApp:
-    def __init__(self, master):
+    def __init__(self, master, dataset=None):
         self.master = master
+        # Zbiór danych wejściowych (domyślnie wbudowane miasta Polski)
+        self.dataset = dataset or load_dataset(BUILTIN_DATASET)
         master.title("Optymalizator Tras Pojazdów")
         master.geometry("1000x800")
 
@@ -67,14 +71,40 @@ class VRPOptimizationApp:
         self.mutation_spin.insert(0, "0.1")
         self.mutation_spin.grid(row=4, column=1, padx=5, pady=5)
 
+        # Zbiór danych
+        self.dataset_var = tk.StringVar()
+        tk.Label(params_frame, text="Dane:").grid(
+            row=5, column=0, sticky="w", padx=5, pady=5
+        )
+        tk.Label(params_frame, textvariable=self.dataset_var).grid(
+            row=5, column=1, sticky="w", padx=5, pady=5
+        )
+        self._update_dataset_label()
+
         # Przyciski
         buttons_frame = tk.Frame(master)
         buttons_frame.pack(padx=10, pady=10, fill="x")
 
+        load_button = tk.Button(
+            buttons_frame, text="Wczytaj Dane", command=self.load_data
+        )
+        load_button.pack(side="left", expand=True, padx=5)
+        self.load_button = load_button
+
         optimize_button = tk.Button(
             buttons_frame, text="Optymalizuj Trasy", command=self.optimize_routes
         )
         optimize_button.pack(side="left", expand=True, padx=5)
+        self.optimize_button = optimize_button
+
+        cancel_button = tk.Button(
+            buttons_frame,
+            text="Anuluj",
+            command=self.cancel_optimization,
+            state="disabled",
+        )
+        cancel_button.pack(side="left", expand=True, padx=5)
+        self.cancel_button = cancel_button
 
         show_map_button = tk.Button(
             buttons_frame, text="Pokaż Mapę", command=self.show_map, state="disabled"
@@ -82,6 +112,21 @@ class VRPOptimizationApp:
         show_map_button.pack(side="left", expand=True, padx=5)
         self.show_map_button = show_map_button
 
+        export_button = tk.Button(
+            buttons_frame,
+            text="Eksportuj Trasy",
+            command=self.export_routes,
+            state="disabled",
+        )
+        export_button.pack(side="left", expand=True, padx=5)
+        self.export_button = export_button
+
+        # Postęp obliczeń (aktualizowany na bieżąco)
+        self.progress_var = tk.StringVar(value="")
+        tk.Label(master, textvariable=self.progress_var, anchor="w").pack(
+            padx=10, fill="x"
+        )
+
         # Obszar wyników
         results_frame = tk.LabelFrame(master, text="Wyniki Optymalizacji")
         results_frame.pack(padx=10, pady=10, fill="both", expand=True)
@@ -97,76 +142,184 @@ class VRPOptimizationApp:
         # Zmienna do przechowywania najlepszych tras
         self.best_routes = None
 
-    def optimize_routes(self):
+        # Komunikacja z wątkiem obliczeń
+        self.progress_queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.worker = None
+
+    def _update_dataset_label(self):
+        self.dataset_var.set(
+            f"{self.dataset.name} ({len(self.dataset.cities_data)} miast, "
+            f"baza: {self.dataset.depot})"
+        )
+
+    def load_data(self):
+        if self.worker is not None and self.worker.is_alive():
+            return
+
+        path = filedialog.askopenfilename(
+            filetypes=[
+                ("Dane miast", "*.csv *.json *.npy"),
+                ("CSV", "*.csv"),
+                ("JSON", "*.json"),
+                ("NumPy (coordinates.npy)", "*.npy"),
+            ]
+        )
+        if not path:
+            return
+
         try:
-            # Wyłączenie przycisku mapy
-            self.show_map_button.config(state="disabled")
+            self.dataset = load_dataset(path)
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Błąd", f"Nie można wczytać danych: {str(e)}")
+            return
 
+        # Wyniki dotyczyły poprzednich danych
+        self.best_routes = None
+        self.show_map_button.config(state="disabled")
+        self.export_button.config(state="disabled")
+        self.results_text.delete(1.0, tk.END)
+        self.progress_var.set("")
+        self._update_dataset_label()
+
+    def optimize_routes(self):
+        if self.worker is not None and self.worker.is_alive():
+            return
+
+        try:
             # Pobranie parametrów
-            num_vehicles = int(self.vehicles_spin.get())
-            vehicle_capacity = int(self.capacity_spin.get())
-            generations = int(self.generations_spin.get())
-            population_size = int(self.population_spin.get())
-            mutation_rate = float(self.mutation_spin.get())
+            params = {
+                "num_vehicles": int(self.vehicles_spin.get()),
+                "vehicle_capacity": int(self.capacity_spin.get()),
+                "generations": int(self.generations_spin.get()),
+                "population_size": int(self.population_spin.get()),
+                "mutation_rate": float(self.mutation_spin.get()),
+            }
+        except ValueError as e:
+            messagebox.showerror("Błąd", f"Niepoprawne parametry: {str(e)}")
+            return
 
+        # Wyłączenie przycisku mapy na czas obliczeń
+        self.show_map_button.config(state="disabled")
+        self.export_button.config(state="disabled")
+        self.optimize_button.config(state="disabled")
+        self.load_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.progress_var.set("Uruchamianie optymalizacji...")
+        self.results_text.delete(1.0, tk.END)
+
+        self.cancel_event.clear()
+        self.worker = threading.Thread(
+            target=self._run_optimization, args=(params,), daemon=True
+        )
+        self.worker.start()
+        self.master.after(100, self._poll_progress)
+
+    def cancel_optimization(self):
+        self.cancel_event.set()
+        self.cancel_button.config(state="disabled")
+        self.progress_var.set("Przerywanie optymalizacji...")
+
+    def _run_optimization(self, params):
+        """Obliczenia w wątku roboczym; wyniki trafiają do kolejki"""
+        try:
             # Utworzenie problemu VRP
             vrp = VehicleRoutingProblem(
-                cities_data,
-                city_demands,
-                num_vehicles=num_vehicles,
-                vehicle_capacity=vehicle_capacity,
+                self.dataset.cities_data,
+                self.dataset.city_demands,
+                num_vehicles=params["num_vehicles"],
+                vehicle_capacity=params["vehicle_capacity"],
+                depot=self.dataset.depot,
             )
 
-            # Uruchomienie algorytmu genetycznego
-            self.best_routes = vrp.genetic_algorithm(
-                population_size=population_size,
-                generations=generations,
-                mutation_rate=mutation_rate,
+            # Uruchomienie algorytmu genetycznego generacja po generacji
+            stats = None
+            for stats in vrp.genetic_algorithm_steps(
+                population_size=params["population_size"],
+                generations=params["generations"],
+                mutation_rate=params["mutation_rate"],
+            ):
+                self.progress_queue.put(("progress", stats))
+                if self.cancel_event.is_set():
+                    break
+
+            self.progress_queue.put(("done", (vrp, stats, self.cancel_event.is_set())))
+
+        except Exception as e:
+            error_msg = (
+                f"Błąd podczas optymalizacji:\n{str(e)}\n\n{traceback.format_exc()}"
             )
+            self.progress_queue.put(("error", error_msg))
 
-            # Przygotowanie wyników
-            results = "Optymalne trasy dla pojazdów:\n\n"
-            total_distance = 0
+    def _poll_progress(self):
+        """Odczyt postępu z kolejki w wątku interfejsu"""
+        finished = False
+        latest = None
 
-            for i, route in enumerate(self.best_routes, 1):
-                results += f"Pojazd {i}:\n"
-                full_route = ["Kraków"] + route + ["Kraków"]
-                results += " -> ".join(full_route) + "\n\n"
+        try:
+            while True:
+                kind, payload = self.progress_queue.get_nowait()
+                if kind == "progress":
+                    latest = payload
+                elif kind == "done":
+                    vrp, stats, cancelled = payload
+                    self._finish_optimization(vrp, stats, cancelled)
+                    finished = True
+                else:
+                    self.results_text.delete(1.0, tk.END)
+                    self.results_text.insert(tk.END, payload)
+                    self.progress_var.set("Optymalizacja zakończona błędem.")
+                    finished = True
+        except queue.Empty:
+            pass
+
+        if latest is not None and not finished:
+            self.progress_var.set(
+                f"Generacja {latest.generation} | "
+                f"najlepszy: {latest.best_distance:.2f} km | "
+                f"średnia: {latest.mean_distance:.2f} km | "
+                f"czas: {latest.elapsed:.1f} s"
+            )
 
-                route_distance = 0
-                current_city = "Kraków"
-                current_demand = 0
+        if finished:
+            self.optimize_button.config(state="normal")
+            self.load_button.config(state="normal")
+            self.cancel_button.config(state="disabled")
+        else:
+            self.master.after(100, self._poll_progress)
 
-                for city in route:
-                    current_demand += city_demands[city]
-                    city_index = list(cities_data.keys()).index(city)
-                    current_index = list(cities_data.keys()).index(current_city)
-                    route_distance += vrp.distance_matrix[current_index][city_index]
-                    current_city = city
+    def _finish_optimization(self, vrp, stats, cancelled):
+        if stats is None:
+            self.progress_var.set("Optymalizacja przerwana przed pierwszą generacją.")
+            return
 
-                # Dodanie dystansu powrotu do Krakowa
-                city_index = list(cities_data.keys()).index("Kraków")
-                current_index = list(cities_data.keys()).index(current_city)
-                route_distance += vrp.distance_matrix[current_index][city_index]
+        self.best_routes = vrp.solution(stats.best_routes)
+        status = "przerwana" if cancelled else "zakończona"
+        self.progress_var.set(
+            f"Optymalizacja {status} po generacji {stats.generation} "
+            f"({stats.elapsed:.1f} s), najlepszy wynik: {stats.best_distance:.2f} km"
+        )
 
-                total_distance += route_distance
-                results += f"Trasa pojazdu {i}: {route_distance:.2f} km, zapotrzebowanie: {current_demand}\n"
+        # Przygotowanie wyników (dystanse i obciążenia policzone w Solution)
+        results = "Optymalne trasy dla pojazdów:\n\n"
+        if cancelled:
+            results = "Najlepsze trasy znalezione przed przerwaniem:\n\n"
 
-            results += f"\nŁączna długość tras: {total_distance:.2f} km"
+        for i, route, route_distance, route_demand in self.best_routes.summaries():
+            results += f"Pojazd {i}:\n"
+            full_route = [vrp.depot] + route + [vrp.depot]
+            results += " -> ".join(full_route) + "\n\n"
+            results += f"Trasa pojazdu {i}: {route_distance:.2f} km, zapotrzebowanie: {route_demand}\n"
 
-            # Wyświetlenie wyników
-            self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, results)
+        results += f"\nŁączna długość tras: {self.best_routes.total_distance:.2f} km"
 
-            # Włączenie przycisku mapy
-            self.show_map_button.config(state="normal")
+        # Wyświetlenie wyników
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, results)
 
-        except Exception as e:
-            error_msg = (
-                f"Błąd podczas optymalizacji:\n{str(e)}\n\n{traceback.format_exc()}"
-            )
-            self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, error_msg)
+        # Włączenie przycisku mapy
+        self.show_map_button.config(state="normal")
+        self.export_button.config(state="normal")
 
     def show_map(self):
         if self.best_routes is None:
@@ -175,7 +328,7 @@ class VRPOptimizationApp:
 
         try:
             # Wizualizacja tras
-            visualize_routes(cities_data, self.best_routes)
+            visualize_routes(self.dataset.cities_data, self.best_routes)
 
             # Próba otwarcia mapy w domyślnej przeglądarce
             map_path = os.path.join(os.getcwd(), "vehicle_routing_map.html")
@@ -184,10 +337,34 @@ class VRPOptimizationApp:
         except Exception as e:
             messagebox.showerror("Błąd", f"Nie można wyświetlić mapy: {str(e)}")
 
+    def export_routes(self):
+        if self.best_routes is None:
+            messagebox.showwarning("Uwaga", "Najpierw przeprowadź optymalizację!")
+            return
+
+        path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")],
+        )
+        if not path:
+            return
+
+        try:
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                if path.endswith(".jsonl"):
+                    self.best_routes.write_json_lines(f)
+                else:
+                    self.best_routes.write_csv(f)
+        except OSError as e:
+            messagebox.showerror("Błąd", f"Nie można zapisać tras: {str(e)}")
+
 
 def main():
+    # Opcjonalnie: ścieżka do danych (.csv, .json lub katalog .npy)
+    dataset = load_dataset(sys.argv[1]) if len(sys.argv) > 1 else None
+
     root = tk.Tk()
-    app = VRPOptimizationApp(root)
+    app = VRPOptimizationApp(root, dataset)
     root.mainloop()
 
 
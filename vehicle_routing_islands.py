@@ -0,0 +1,315 @@
+import inspect
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vehicle_routing_optimization import (
+    CondensedDistanceMatrix,
+    DistanceMatrix,
+    ImprovementCallback,
+    Individual,
+    SparseDistanceMatrix,
+    VehicleRoutingProblem,
+)
+from vehicle_routing_solution import Solution
+
+TOPOLOGIES = ("ring", "full")
+
+# Ustawienia przebiegu przekazywane procesom roboczym (argumenty _start_run);
+# pozostałe argumenty genetic_algorithm, np. checkpoint_path czy
+# initial_population, nie są obsługiwane w modelu wyspowym
+RUN_OPTIONS = tuple(inspect.signature(VehicleRoutingProblem._start_run).parameters)[1:]
+
+# Problem odtworzony w procesie roboczym na macierzy z pamięci współdzielonej
+_worker_problem: Optional[VehicleRoutingProblem] = None
+_worker_memory: Optional[shared_memory.SharedMemory] = None
+
+
+def _share_distance_matrix(
+    matrix: DistanceMatrix,
+) -> Tuple[Optional[shared_memory.SharedMemory], dict]:
+    """Skopiowanie danych macierzy odległości do pamięci współdzielonej"""
+    if isinstance(matrix, SparseDistanceMatrix):
+        # Macierz rzadka zajmuje pamięć liniową, więc wystarczy przekazać jej kopię
+        return None, {"matrix": matrix}
+
+    condensed = isinstance(matrix, CondensedDistanceMatrix)
+    data = matrix.data if condensed else np.ascontiguousarray(matrix)
+
+    memory = shared_memory.SharedMemory(create=True, size=max(1, data.nbytes))
+    view = np.ndarray(data.shape, dtype=data.dtype, buffer=memory.buf)
+    view[...] = data
+
+    layout = {
+        "name": memory.name,
+        "shape": data.shape,
+        "dtype": data.dtype.str,
+        "condensed_size": matrix.size if condensed else None,
+    }
+    return memory, layout
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        # Pamięć należy do procesu głównego, który ją zwalnia
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _open_shared_matrix(
+    layout: dict,
+) -> Tuple[Optional[shared_memory.SharedMemory], DistanceMatrix]:
+    """Macierz odległości opisana przez _share_distance_matrix"""
+    if "matrix" in layout:
+        return None, layout["matrix"]
+
+    memory = _attach_shared_memory(layout["name"])
+    data = np.ndarray(
+        layout["shape"], dtype=np.dtype(layout["dtype"]), buffer=memory.buf
+    )
+    if layout["condensed_size"] is not None:
+        return memory, CondensedDistanceMatrix(data, layout["condensed_size"])
+    return memory, data
+
+
+def _init_worker(problem_args: dict, layout: dict, run_options: dict) -> None:
+    """Inicjalizacja procesu roboczego bez ponownego liczenia macierzy odległości"""
+    global _worker_problem, _worker_memory
+
+    _worker_memory, matrix = _open_shared_matrix(layout)
+    _worker_problem = VehicleRoutingProblem(distance_matrix=matrix, **problem_args)
+    _worker_problem._start_run(**run_options)
+
+
+def _run_island(
+    population: Optional[List[Individual]],
+    rng_state: tuple,
+    penalty_weights: Optional[List[float]],
+    population_size: int,
+    generations: int,
+    mutation_rate: float,
+) -> Tuple[List[Individual], List[float], List[float], tuple, List[float], int]:
+    """Jedna epoka wyspy: ewolucja do najbliższej migracji.
+
+    Wagi kar są częścią stanu wyspy (jak generator liczb losowych), bo proces
+    roboczy może w kolejnej epoce obsługiwać inną wyspę.
+    """
+    problem = _worker_problem
+    rng = random.Random()
+    rng.setstate(rng_state)
+    if penalty_weights is not None:
+        problem.penalty_weights = list(penalty_weights)
+    else:
+        problem.penalty_weights = list(problem._initial_penalties)
+    evaluations_before = problem.fitness_evaluations
+
+    if population is None:
+        population = [
+            problem._create_individual(rng)[0] for _ in range(population_size)
+        ]
+    population = problem._evolve(population, generations, rng, mutation_rate)
+    scores, objectives = problem._score_population(population)
+
+    return (
+        population,
+        scores,
+        objectives,
+        rng.getstate(),
+        problem.penalty_weights,
+        problem.fitness_evaluations - evaluations_before,
+    )
+
+
+def _migration_targets(island: int, num_islands: int, topology: str) -> List[int]:
+    """Wyspy, do których trafiają najlepsze osobniki danej wyspy"""
+    if topology == "ring":
+        return [(island + 1) % num_islands] if num_islands > 1 else []
+    return [target for target in range(num_islands) if target != island]
+
+
+def _migrate(
+    populations: List[List[Individual]],
+    scores: List[List[float]],
+    migration_size: int,
+    topology: str,
+) -> None:
+    """Zastąpienie najgorszych osobników wysp najlepszymi osobnikami sąsiadów"""
+    num_islands = len(populations)
+    emigrants = []
+    for population, island_scores in zip(populations, scores):
+        order = sorted(range(len(population)), key=island_scores.__getitem__)
+        emigrants.append(
+            [
+                (population[i], island_scores[i])
+                for i in reversed(order[-migration_size:])
+            ]
+        )
+
+    immigrants: Dict[int, List[Tuple[Individual, float]]] = {
+        island: [] for island in range(num_islands)
+    }
+    for source in range(num_islands):
+        for target in _migration_targets(source, num_islands, topology):
+            immigrants[target].extend(emigrants[source])
+
+    for island, arrivals in immigrants.items():
+        population, island_scores = populations[island], scores[island]
+        order = sorted(range(len(population)), key=island_scores.__getitem__)
+        # Najgorsze osobniki zastępowane są kopiami imigrantów
+        for slot, (individual, score) in zip(order, arrivals):
+            population[slot] = [list(route) for route in individual]
+            island_scores[slot] = score
+
+
+def island_genetic_algorithm(
+    problem: VehicleRoutingProblem,
+    num_islands: int = 4,
+    workers: Optional[int] = None,
+    population_size: int = 200,
+    generations: int = 300,
+    mutation_rate: float = 0.1,
+    migration_interval: int = 20,
+    migration_size: int = 2,
+    topology: str = "ring",
+    seed: Optional[int] = None,
+    time_limit: Optional[float] = None,
+    max_stagnation: Optional[int] = None,
+    target_distance: Optional[float] = None,
+    on_improvement: Optional[ImprovementCallback] = None,
+    **run_options,
+) -> Solution:
+    """Algorytm genetyczny w modelu wyspowym uruchamiany w puli procesów.
+
+    Każda wyspa ma własny generator liczb losowych wyprowadzony z `seed`, a migracja
+    odbywa się w procesie głównym w stałej kolejności, dzięki czemu wynik zależy
+    wyłącznie od ziarna i parametrów (nie od kolejności pracy procesów).
+    Pozostałe argumenty (`run_options`) przekazywane są jak w genetic_algorithm,
+    np. fitness_cache_size, batch_evaluation czy local_search; dozwolone są
+    nazwy z RUN_OPTIONS.
+
+    `time_limit`, `max_stagnation` (liczba generacji bez poprawy) i
+    `target_distance` sprawdzane są po każdej epoce migracji, a najlepsze
+    rozwiązanie ze wszystkich epok jest zwracane i przekazywane do
+    `on_improvement`.
+    """
+    start_time = time.perf_counter()
+    unknown = set(run_options).difference(RUN_OPTIONS)
+    if unknown:
+        raise ValueError(
+            f"Nieobsługiwane argumenty modelu wyspowego: {', '.join(sorted(unknown))}"
+        )
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Nieznana topologia migracji: {topology}")
+    if num_islands < 1 or migration_interval < 1:
+        raise ValueError("Liczba wysp i interwał migracji muszą być dodatnie.")
+
+    seeds = np.random.SeedSequence(seed).generate_state(num_islands)
+    rng_states = [random.Random(int(island_seed)).getstate() for island_seed in seeds]
+    penalty_weights: List[Optional[List[float]]] = [None] * num_islands
+    populations: List[Optional[List[Individual]]] = [None] * num_islands
+    scores: List[List[float]] = [[] for _ in range(num_islands)]
+    best_individual: Optional[Individual] = None
+    best_score = float("-inf")
+    stagnation = 0
+
+    problem_args = {
+        "cities_data": problem.cities_data,
+        "city_demands": problem.city_demands,
+        "num_vehicles": problem.num_vehicles,
+        "vehicle_capacity": problem.vehicle_capacity,
+        "depot": problem.depot,
+        "distance_metric": problem.distance_metric,
+        "distance_neighbours": problem.distance_neighbours,
+        "distance_provider": problem.distance_provider,
+        "time_windows": problem.time_windows,
+        "service_times": problem.city_service_times,
+        "max_route_duration": problem.max_route_duration,
+        "travel_speed": problem.travel_speed,
+        "backend": problem.backend,
+    }
+    memory, layout = _share_distance_matrix(problem.distance_matrix)
+    problem._start_run(**run_options)
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers or min(num_islands, 32),
+            initializer=_init_worker,
+            initargs=(problem_args, layout, run_options),
+        ) as executor:
+            remaining = generations
+            completed = 0
+            # Pierwsza epoka tworzy populacje; kolejne kończą się migracją
+            while True:
+                epoch = min(migration_interval, remaining)
+                improved = False
+                results = list(
+                    executor.map(
+                        _run_island,
+                        populations,
+                        rng_states,
+                        penalty_weights,
+                        [population_size] * num_islands,
+                        [epoch] * num_islands,
+                        [mutation_rate] * num_islands,
+                    )
+                )
+                for island, (
+                    population,
+                    island_scores,
+                    objectives,
+                    state,
+                    weights,
+                    count,
+                ) in enumerate(results):
+                    populations[island] = population
+                    scores[island] = island_scores
+                    rng_states[island] = state
+                    penalty_weights[island] = weights
+                    problem.fitness_evaluations += count
+
+                    # Bez rozwiązań dopuszczalnych porównanie przy wagach tej wyspy
+                    island_best = problem._improved_best(
+                        population,
+                        island_scores,
+                        objectives,
+                        best_individual,
+                        best_score,
+                        weights,
+                    )
+                    if island_best is not None:
+                        improved = True
+                        best_individual = population[island_best]
+                        best_score = objectives[island_best]
+                        if on_improvement is not None and best_score > float("-inf"):
+                            on_improvement(
+                                problem._decode(best_individual),
+                                -best_score,
+                                completed + epoch,
+                            )
+
+                remaining -= epoch
+                completed += epoch
+                # Poprawa w trakcie epoki zeruje licznik (znana jest tylko jej epoka)
+                stagnation = 0 if improved else stagnation + epoch
+                if (
+                    remaining <= 0
+                    or (
+                        time_limit is not None
+                        and time.perf_counter() - start_time >= time_limit
+                    )
+                    or (max_stagnation is not None and stagnation >= max_stagnation)
+                    or (target_distance is not None and -best_score <= target_distance)
+                ):
+                    break
+                _migrate(populations, scores, migration_size, topology)
+    finally:
+        if memory is not None:
+            memory.close()
+            memory.unlink()
+
+    return problem.solution(problem._decode(best_individual))
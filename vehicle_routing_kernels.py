@@ -0,0 +1,479 @@
+import argparse
+import importlib.util
+import random
+import sys
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from vehicle_routing_giant_tour import (
+    crossover_points,
+    giant_tour,
+    order_crossover,
+    split_inputs,
+    split_tour,
+)
+
+# Backend operatorów algorytmu genetycznego: "python" - kod modułu optymalizacji,
+# "numba" - funkcje tego modułu skompilowane do kodu maszynowego, "auto" - numba,
+# o ile jest zainstalowana. Funkcje operują na tablicach liczb całkowitych i
+# zmiennoprzecinkowych, a liczby losowe losowane są w Pythonie w tej samej
+# kolejności co w backendzie "python", więc oba dają identyczne wyniki.
+BACKENDS = ("auto", "python", "numba")
+
+# Kodowania osobników obsługiwane przez funkcje tego modułu
+ENCODINGS = ("routes", "giant_tour")
+
+# Sprawdzenie bez importu - numba importowana jest dopiero przy użyciu backendu, bo
+# ten moduł importuje każdy proces rozwiązujący problem
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+# Nazwy funkcji kompilowanych przez numba przy pierwszym użyciu backendu
+_KERNELS: List[str] = []
+_compiled = False
+
+
+def _jit(function):
+    """Oznaczenie funkcji do kompilacji przez numba (_compile_kernels); do tego
+    czasu funkcja działa jako zwykły Python"""
+    _KERNELS.append(function.__name__)
+    return function
+
+
+def _compile_kernels() -> None:
+    """Zastąpienie oznaczonych funkcji modułu funkcjami numba (raz na proces).
+
+    numba kompiluje funkcję przy pierwszym wywołaniu, więc funkcje wywołujące się
+    nawzajem korzystają już z wersji skompilowanych.
+    """
+    global _compiled
+    if _compiled:
+        return
+    import numba
+
+    for name in _KERNELS:
+        globals()[name] = numba.njit(cache=True, nogil=True)(globals()[name])
+    _compiled = True
+
+
+def resolve_backend(backend: str) -> str:
+    """Backend używany dla ustawienia `backend` ("auto" wybiera numba, o ile jest)"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Nieznany backend operatorów: {backend}")
+    if backend == "numba" and not NUMBA_AVAILABLE:
+        raise ValueError("Backend numba wymaga zainstalowanego pakietu numba.")
+    if backend == "auto":
+        return "numba" if NUMBA_AVAILABLE else "python"
+    return backend
+
+
+@_jit
+def _split_layer(
+    costs, offsets, closing, loads, capacity, first, best, previous, queue
+):
+    """Warstwa Split (jak giant_tour._split_layer) zapisywana do `best` i `previous`.
+
+    Podział bez limitu tras to wywołanie z `costs` będącym tą samą tablicą co `best`.
+    Kolejka monotoniczna trzymana jest w tablicy `queue` (początek head, koniec tail).
+    """
+    n = offsets.shape[0] - 1
+    best[:] = np.inf
+    best[0] = 0.0
+    previous[:] = -1
+    head = 0
+    tail = 0
+    for j in range(first + 1, n + 1):
+        i = j - 1
+        if costs[i] < np.inf:
+            value = costs[i] + offsets[i]
+            while tail > head and costs[queue[tail - 1]] + offsets[queue[tail - 1]] > (
+                value
+            ):
+                tail -= 1
+            queue[tail] = i
+            tail += 1
+        while tail > head and loads[j] - loads[queue[head]] > capacity:
+            head += 1
+        if tail == head:
+            if costs[j] == np.inf:
+                break
+            continue
+        i = queue[head]
+        best[j] = costs[i] + offsets[i] + closing[j]
+        previous[j] = i
+
+
+@_jit
+def _split_limited(offsets, closing, loads, capacity, vehicles, penalty, prune):
+    """Podział na co najwyżej `vehicles` tras (jak giant_tour._split_limited).
+
+    Zwraca granice tras [0, ..., n]; pusta tablica oznacza brak podziału w ładowności
+    (tylko z `prune`).
+    """
+    n = offsets.shape[0] - 1
+    costs = np.full(n + 1, np.inf)
+    costs[0] = 0.0
+    best = np.empty(n + 1)
+    layers = np.empty((vehicles, n + 1), dtype=np.int64)
+    queue = np.empty(n + 1, dtype=np.int64)
+    first = 0
+    last = 0
+    for vehicle in range(vehicles):
+        previous = layers[vehicle]
+        _split_layer(
+            costs, offsets, closing, loads, capacity, first, best, previous, queue
+        )
+        if vehicle == vehicles - 1 and best[n] == np.inf:
+            if prune:
+                return np.empty(0, dtype=np.int64)
+            # Ostatnia trasa bez limitu ładowności, z karą za nadmiar ładunku
+            for i in range(n):
+                excess = max(loads[n] - loads[i] - capacity, 0)
+                total = costs[i] + offsets[i] + closing[n] + penalty * excess
+                if i == 0 or total < best[n]:
+                    best[n] = total
+                    previous[n] = i
+        for j in range(first, last + 1):
+            if costs[j] <= best[j]:
+                best[j] = costs[j]
+                previous[j] = -1
+        while last < n and best[last + 1] < np.inf:
+            last += 1
+        if prune:
+            remaining = (vehicles - vehicle - 1) * capacity
+            while first <= last and loads[n] - loads[first] > remaining:
+                best[first] = np.inf
+                first += 1
+            if first > last:
+                return np.empty(0, dtype=np.int64)
+        costs, best = best, costs
+
+    cuts = np.empty(vehicles + 1, dtype=np.int64)
+    count = 0
+    j = n
+    for vehicle in range(vehicles - 1, -1, -1):
+        if layers[vehicle, j] >= 0:
+            cuts[count] = j
+            count += 1
+            j = layers[vehicle, j]
+    cuts[count] = 0
+    return cuts[count::-1].copy()
+
+
+@_jit
+def split_bounds(offsets, closing, loads, capacity, vehicles, penalty):
+    """Granice tras optymalnego podziału permutacji (jak giant_tour.split_tour)"""
+    n = offsets.shape[0] - 1
+    best = np.empty(n + 1)
+    previous = np.empty(n + 1, dtype=np.int64)
+    queue = np.empty(n + 1, dtype=np.int64)
+    _split_layer(best, offsets, closing, loads, capacity, 0, best, previous, queue)
+    if best[n] < np.inf:
+        count = 0
+        j = n
+        while j > 0:
+            count += 1
+            j = previous[j]
+        if count <= vehicles:
+            bounds = np.empty(count + 1, dtype=np.int64)
+            j = n
+            for k in range(count, -1, -1):
+                bounds[k] = j
+                if j > 0:
+                    j = previous[j]
+            return bounds
+    bounds = _split_limited(offsets, closing, loads, capacity, vehicles, penalty, True)
+    if bounds.shape[0] == 0:
+        bounds = _split_limited(
+            offsets, closing, loads, capacity, vehicles, penalty, False
+        )
+    return bounds
+
+
+@_jit
+def order_crossover_kernel(tour1, tour2, start, end, size):
+    """Krzyżowanie OX (jak giant_tour.order_crossover) dla wylosowanych granic"""
+    n = tour1.shape[0]
+    child = np.empty(n, dtype=np.int64)
+    taken = np.zeros(size, dtype=np.bool_)
+    for k in range(start, end):
+        child[k] = tour1[k]
+        taken[tour1[k]] = True
+    position = end
+    for k in range(n):
+        city = tour2[(end + k) % n]
+        if not taken[city]:
+            if position == n:
+                position = 0
+            child[position] = city
+            position += 1
+    return child
+
+
+@_jit
+def route_crossover_kernel(
+    flat1, starts1, flat2, starts2, take_first, demands, customers, capacity
+):
+    """Krzyżowanie tras (jak VehicleRoutingProblem._crossover bez okien czasowych).
+
+    Rodzice i dziecko zapisani są jako połączone trasy `flat` z początkami tras
+    `starts`. Zwraca (flat, starts, loads, repaired, overloaded) dziecka.
+    """
+    vehicles = take_first.shape[0]
+    size = demands.shape[0]
+    assigned = np.zeros(size, dtype=np.bool_)
+    loads = np.zeros(vehicles, dtype=np.int64)
+    # Miasta w kolejności dołączania i pojazdy, do których trafiły
+    order = np.empty(customers.shape[0], dtype=np.int64)
+    owners = np.empty(customers.shape[0], dtype=np.int64)
+    count = 0
+
+    for vehicle in range(vehicles):
+        if take_first[vehicle]:
+            flat, begin, end = flat1, starts1[vehicle], starts1[vehicle + 1]
+        else:
+            flat, begin, end = flat2, starts2[vehicle], starts2[vehicle + 1]
+        for k in range(begin, end):
+            city = flat[k]
+            if not assigned[city] and loads[vehicle] + demands[city] <= capacity:
+                order[count] = city
+                owners[count] = vehicle
+                count += 1
+                loads[vehicle] += demands[city]
+                assigned[city] = True
+
+    repaired = 0
+    overloaded = 0
+    for city in customers:
+        if not assigned[city]:
+            vehicle = np.argmin(loads)
+            order[count] = city
+            owners[count] = vehicle
+            count += 1
+            loads[vehicle] += demands[city]
+            repaired += 1
+            if loads[vehicle] > capacity:
+                overloaded += 1
+
+    # Stabilne uporządkowanie miast według pojazdów (sortowanie przez zliczanie)
+    starts = np.zeros(vehicles + 1, dtype=np.int64)
+    for k in range(count):
+        starts[owners[k] + 1] += 1
+    for vehicle in range(vehicles):
+        starts[vehicle + 1] += starts[vehicle]
+    filled = starts[:-1].copy()
+    child = np.empty(count, dtype=np.int64)
+    for k in range(count):
+        child[filled[owners[k]]] = order[k]
+        filled[owners[k]] += 1
+    return child, starts, loads, repaired, overloaded
+
+
+def _flatten(individual: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Trasy osobnika jako połączone miasta i początki tras"""
+    starts = np.zeros(len(individual) + 1, dtype=np.int64)
+    np.cumsum([len(route) for route in individual], out=starts[1:])
+    return np.array(giant_tour(individual), dtype=np.int64), starts
+
+
+def _unflatten(flat: np.ndarray, bounds: np.ndarray) -> List[List[int]]:
+    cities = flat.tolist()
+    bounds = bounds.tolist()
+    return [cities[i:j] for i, j in zip(bounds, bounds[1:])]
+
+
+class KernelBackend:
+    """Operatory algorytmu genetycznego wykonywane przez funkcje tego modułu.
+
+    Metody przyjmują i zwracają osobniki jak odpowiadające im metody
+    VehicleRoutingProblem i losują liczby z `rng` w tej samej kolejności. Przy
+    zainstalowanej numba funkcje są kompilowane, bez niej działają jako Python.
+    """
+
+    def __init__(self, problem):
+        if NUMBA_AVAILABLE:
+            _compile_kernels()
+        self.problem = problem
+        self.demands = np.asarray(problem.demands, dtype=np.int64)
+        self.customers = np.asarray(problem.customers, dtype=np.int64)
+
+    def split_tour(self, tour: List[int]) -> Tuple[List[List[int]], List[int]]:
+        problem = self.problem
+        vehicles = problem.num_vehicles
+        if not tour:
+            return [[] for _ in range(vehicles)], [0] * vehicles
+
+        offsets, closing, loads = split_inputs(problem, tour, self.demands)
+        bounds = split_bounds(
+            offsets,
+            closing,
+            loads,
+            problem.vehicle_capacity,
+            vehicles,
+            problem.penalty_weights[0] if problem.penalty_weights else 0.0,
+        )
+        individual = _unflatten(np.asarray(tour, dtype=np.int64), bounds)
+        individual.extend([] for _ in range(vehicles - len(individual)))
+        return individual, problem._route_loads(individual)
+
+    def order_crossover(
+        self, tour1: List[int], tour2: List[int], rng: random.Random
+    ) -> List[int]:
+        n = len(tour1)
+        if n < 2:
+            return list(tour1)
+        start, end = crossover_points(n, rng)
+        return order_crossover_kernel(
+            np.array(tour1, dtype=np.int64),
+            np.array(tour2, dtype=np.int64),
+            start,
+            end,
+            len(self.problem.cities),
+        ).tolist()
+
+    def route_crossover(
+        self, parent1: List[List[int]], parent2: List[List[int]], rng: random.Random
+    ) -> Tuple[List[List[int]], List[int], int, int]:
+        """Krzyżowanie tras; zwraca dziecko, ładunki oraz liczby miast przypisanych
+        po skopiowaniu tras i przypisanych z przekroczeniem ładowności"""
+        flat1, starts1 = _flatten(parent1)
+        flat2, starts2 = _flatten(parent2)
+        take_first = np.array(
+            [rng.random() < 0.5 for _ in range(self.problem.num_vehicles)]
+        )
+        child, starts, loads, repaired, overloaded = route_crossover_kernel(
+            flat1,
+            starts1,
+            flat2,
+            starts2,
+            take_first,
+            self.demands,
+            self.customers,
+            self.problem.vehicle_capacity,
+        )
+        return _unflatten(child, starts), loads.tolist(), int(repaired), int(overloaded)
+
+
+def check_parity(
+    problem,
+    seeds: Sequence[int] = (0, 1, 2),
+    generations: int = 20,
+    population_size: int = 30,
+) -> List[str]:
+    """Porównanie backendu "python" z funkcjami tego modułu na tym samym problemie.
+
+    Dla każdego ziarna i kodowania osobników algorytm genetyczny uruchamiany jest
+    z obydwoma backendami, a dodatkowo porównywane są pojedyncze wywołania Split
+    i krzyżowań. Bez numba funkcje działają jako zwykły Python, co sprawdza ich
+    logikę. Zwraca opisy rozbieżności (pusta lista - wyniki identyczne).
+    """
+    mismatches = []
+    kernels = KernelBackend(problem)
+    # Okna czasowe obsługuje tylko backend "python"
+    encodings = ("routes",) if problem.time_constrained else ENCODINGS
+    saved = problem._kernels
+    try:
+        for seed in seeds:
+            for encoding in encodings:
+                results = []
+                for backend in (None, kernels):
+                    problem._kernels = backend
+                    solution = problem.genetic_algorithm(
+                        population_size,
+                        generations,
+                        seed=seed,
+                        encoding=encoding,
+                        local_search="offspring",
+                    )
+                    results.append((list(solution), solution.total_distance))
+                if results[0] != results[1]:
+                    mismatches.append(
+                        f"genetic_algorithm(seed={seed}, encoding={encoding}): "
+                        f"{results[0][1]} != {results[1][1]}"
+                    )
+            if not problem.time_constrained:
+                mismatches.extend(
+                    _check_operators(problem, kernels, seed, population_size)
+                )
+    finally:
+        problem._kernels = saved
+    return mismatches
+
+
+def _check_operators(
+    problem, kernels: KernelBackend, seed: int, count: int
+) -> List[str]:
+    """Porównanie pojedynczych krzyżowań i podziałów Split dla losowych rodziców"""
+    mismatches = []
+    problem._kernels = None
+    problem._start_run()
+    rng = random.Random(seed)
+    size = len(problem.cities)
+    for _ in range(count):
+        parents = [problem._create_individual(rng)[0] for _ in range(2)]
+        state = rng.getstate()
+        expected = problem._crossover(parents[0], parents[1], rng)
+        rng.setstate(state)
+        child, loads, _, _ = kernels.route_crossover(parents[0], parents[1], rng)
+        if (child, loads) != expected:
+            mismatches.append(f"_crossover(seed={seed}): {child} != {expected[0]}")
+
+        tours = [giant_tour(parent) for parent in parents]
+        state = rng.getstate()
+        expected_tour = order_crossover(tours[0], tours[1], rng, size)
+        rng.setstate(state)
+        tour = kernels.order_crossover(tours[0], tours[1], rng)
+        if tour != expected_tour:
+            mismatches.append(f"order_crossover(seed={seed}): {tour}")
+        if kernels.split_tour(tour) != split_tour(problem, tour):
+            mismatches.append(f"split_tour(seed={seed}): {tour}")
+    return mismatches
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    # Import lokalny - moduł benchmarku zależy od modułu optymalizacji, a ten od
+    # tego modułu
+    from vehicle_routing_benchmark import (
+        builtin_instance,
+        instance_distance_matrix,
+        load_instance,
+    )
+    from vehicle_routing_optimization import VehicleRoutingProblem
+
+    parser = argparse.ArgumentParser(
+        description="Zgodność backendów operatorów algorytmu genetycznego"
+    )
+    parser.add_argument(
+        "instances",
+        nargs="*",
+        help="ścieżki lub nazwy instancji CVRPLIB (domyślnie instancja wbudowana)",
+    )
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--population-size", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    print(f"numba: {'dostępna' if NUMBA_AVAILABLE else 'niedostępna'}")
+    instances = [load_instance(spec) for spec in args.instances] or [builtin_instance()]
+    failed = False
+    for instance in instances:
+        problem = VehicleRoutingProblem(
+            instance.coordinates,
+            instance.demands,
+            num_vehicles=instance.num_vehicles,
+            vehicle_capacity=instance.capacity,
+            distance_matrix=instance_distance_matrix(instance),
+            depot=instance.depot,
+        )
+        mismatches = check_parity(
+            problem, args.seeds, args.generations, args.population_size
+        )
+        print(f"{instance.name}: {'OK' if not mismatches else 'ROZBIEŻNOŚCI'}")
+        for mismatch in mismatches:
+            print(f"  {mismatch}")
+        failed = failed or bool(mismatches)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import random
+from typing import Optional
+
+import numpy as np
+
+from vehicle_routing_moves import RouteState
+from vehicle_routing_optimization import (
+    CondensedDistanceMatrix,
+    DistanceMatrix,
+    Individual,
+    SparseDistanceMatrix,
+    VehicleRoutingProblem,
+)
+
+# Minimalna poprawa uznawana za zysk (chroni przed zapętleniem na błędach zaokrągleń)
+IMPROVEMENT_EPSILON = 1e-9
+
+
+def nearest_neighbours(
+    distance_matrix: DistanceMatrix,
+    k: int,
+    exclude: Optional[int] = None,
+    chunk_size: int = 1024,
+) -> np.ndarray:
+    """Listy k najbliższych sąsiadów każdego miasta, posortowane według odległości"""
+    n = len(distance_matrix)
+    k = max(0, min(k, n - 1 - (exclude is not None)))
+
+    if isinstance(distance_matrix, SparseDistanceMatrix) and (
+        distance_matrix.k >= k + (exclude is not None)
+    ):
+        # Listy sąsiadów są już zapisane - wykluczone miasto przesuwamy na koniec
+        stored = distance_matrix.neighbours.astype(np.int64)
+        order = np.argsort(stored == exclude, axis=1, kind="stable")
+        return np.take_along_axis(stored, order, axis=1)[:, :k]
+    neighbours = np.empty((n, k), dtype=np.int64)
+
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        if isinstance(distance_matrix, (CondensedDistanceMatrix, SparseDistanceMatrix)):
+            block = np.array([distance_matrix.row(i) for i in range(start, stop)])
+        else:
+            block = np.array(distance_matrix[start:stop], dtype=np.float64)
+
+        block[np.arange(stop - start), np.arange(start, stop)] = np.inf
+        if exclude is not None:
+            block[:, exclude] = np.inf
+
+        if k == 0:
+            continue
+        candidates = np.argpartition(block, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(block, candidates, axis=1).argsort(axis=1)
+        neighbours[start:stop] = np.take_along_axis(candidates, order, axis=1)
+
+    return neighbours
+
+
+class LocalSearch:
+    """Przeszukiwanie lokalne (2-opt, Or-opt, relocate, swap, 2-opt*).
+
+    Ruchy rozważane są tylko dla par (miasto, jeden z k najbliższych sąsiadów), tak aby
+    po ruchu miasto sąsiadowało z kandydatem. Koszt ruchów liczy RouteState w czasie
+    stałym, więc przebieg kosztuje O(n·k) zamiast O(n²).
+    """
+
+    def __init__(
+        self,
+        problem: VehicleRoutingProblem,
+        neighbours: int = 10,
+        max_passes: int = 5,
+        max_segment: int = 3,
+    ):
+        self.problem = problem
+        self.max_passes = max_passes
+        self.max_segment = max_segment
+        # 2-opt odwraca fragment trasy, co przy odległościach asymetrycznych zmienia
+        # koszt wszystkich jego odcinków - ruch jest wtedy pomijany
+        self.two_opt = problem.symmetric_distances
+        self.neighbours = nearest_neighbours(
+            problem.distance_matrix, neighbours, exclude=problem.depot_index
+        ).tolist()
+
+    def improve(
+        self, individual: Individual, rng: Optional[random.Random] = None
+    ) -> Individual:
+        """Poprawa osobnika do lokalnego optimum (lub limitu przebiegów)"""
+        state = RouteState(self.problem, individual)
+        cities = list(self.problem.customers)
+
+        for _ in range(self.max_passes):
+            if rng is not None:
+                rng.shuffle(cities)
+
+            improved = False
+            for city in cities:
+                for neighbour in self.neighbours[city]:
+                    if self._improve_pair(state, city, neighbour):
+                        improved = True
+                        break
+
+            if not improved:
+                break
+
+        return state.to_individual()
+
+    def _improve_pair(self, state: RouteState, city: int, neighbour: int) -> bool:
+        """Pierwszy poprawiający ruch, po którym `city` sąsiaduje z `neighbour`"""
+        route = state.route_of[city]
+        target = state.route_of[neighbour]
+        target_position = state.position[neighbour]
+
+        # Relocate i Or-opt: fragment od `city` wstawiony za lub przed sąsiadem
+        route_length = len(state.routes[route])
+        for length in range(1, self.max_segment + 1):
+            if state.position[city] + length > route_length:
+                break
+            if not state.segment_feasible(city, length, target):
+                continue
+            for position in (target_position + 1, target_position):
+                if state.segment_delta(city, length, target, position) < (
+                    -IMPROVEMENT_EPSILON
+                ) and state.segment_times_feasible(city, length, target, position):
+                    state.apply_segment(city, length, target, position)
+                    return True
+
+        # Swap: `city` zajmuje miejsce następnika sąsiada
+        successor = state.successor(neighbour)
+        if (
+            successor != state.depot
+            and successor != city
+            and state.swap_feasible(city, successor)
+            and state.swap_delta(city, successor) < -IMPROVEMENT_EPSILON
+            and state.swap_times_feasible(city, successor)
+        ):
+            state.apply_swap(city, successor)
+            return True
+
+        position = state.position[city]
+        if route == target:
+            # 2-opt: odwrócenie fragmentu między miastami tak, by stały obok siebie
+            first, second = sorted((position, target_position))
+            if (
+                self.two_opt
+                and second - first > 1
+                and (
+                    state.two_opt_delta(route, first + 1, second) < -IMPROVEMENT_EPSILON
+                )
+                and state.two_opt_times_feasible(route, first + 1, second)
+            ):
+                state.apply_two_opt(route, first + 1, second)
+                return True
+        elif (
+            state.exchange_feasible(route, position + 1, target, target_position)
+            and state.exchange_delta(route, position + 1, target, target_position)
+            < -IMPROVEMENT_EPSILON
+            and state.exchange_times_feasible(
+                route, position + 1, target, target_position
+            )
+        ):
+            # 2-opt*: końcówka trasy sąsiada doklejona za `city`
+            state.apply_exchange(route, position + 1, target, target_position)
+            return True
+
+        return False
@@ -0,0 +1,380 @@
+from typing import List, Tuple
+
+from vehicle_routing_optimization import Individual, VehicleRoutingProblem
+from vehicle_routing_time_windows import (
+    RouteSchedule,
+    connection_feasible,
+    route_times_feasible,
+)
+
+
+class RouteState:
+    """Rozwiązanie z buforowanymi pozycjami miast, obciążeniami i długościami tras.
+
+    Zmiana długości i obciążenia dla ruchów relocate, swap i exchange liczona jest
+    w czasie stałym na podstawie poprzedników i następników miast. Dopiero przyjęcie
+    ruchu aktualizuje zmienione trasy.
+
+    Przy oknach czasowych każda trasa ma harmonogram z luzami (RouteSchedule), więc
+    ruchy między trasami sprawdzane są w czasie stałym (lub proporcjonalnym do
+    długości przenoszonego fragmentu). Ruchy w obrębie jednej trasy, które zmieniają
+    kolejność wielu miast, sprawdzane są przejściem po nowej trasie.
+    """
+
+    def __init__(self, problem: VehicleRoutingProblem, individual: Individual):
+        self.problem = problem
+        self.matrix = problem.distance_matrix
+        self.depot = problem.depot_index
+        self.demands = problem.demands
+        self.capacity = problem.vehicle_capacity
+
+        self.routes = [list(route) for route in individual]
+        self.route_of = [-1] * len(problem.cities)
+        self.position = [-1] * len(problem.cities)
+        self.loads = [0] * len(self.routes)
+        self.prefix_loads: List[List[int]] = [[] for _ in self.routes]
+        self.route_distances = [0.0] * len(self.routes)
+        self.timed = problem.time_constrained
+        self.schedules: List[RouteSchedule] = [None] * len(self.routes)
+
+        for route_index in range(len(self.routes)):
+            self._index_route(route_index)
+
+    def _index_route(self, route_index: int) -> None:
+        """Przeliczenie pozycji, obciążeń i długości jednej trasy"""
+        route = self.routes[route_index]
+        prefix = [0]
+        for position, city in enumerate(route):
+            self.route_of[city] = route_index
+            self.position[city] = position
+            prefix.append(prefix[-1] + self.demands[city])
+
+        self.prefix_loads[route_index] = prefix
+        self.loads[route_index] = prefix[-1]
+        self.route_distances[route_index] = self.problem._route_distance(route)
+        if self.timed:
+            self.schedules[route_index] = RouteSchedule(self.problem, route)
+
+    def _node(self, route_index: int, position: int) -> int:
+        """Miasto na danej pozycji trasy; poza trasą znajduje się baza"""
+        route = self.routes[route_index]
+        if 0 <= position < len(route):
+            return route[position]
+        return self.depot
+
+    def predecessor(self, city: int) -> int:
+        return self._node(self.route_of[city], self.position[city] - 1)
+
+    def successor(self, city: int) -> int:
+        return self._node(self.route_of[city], self.position[city] + 1)
+
+    @property
+    def total_distance(self) -> float:
+        return sum(self.route_distances)
+
+    def is_feasible(self) -> bool:
+        if not all(load <= self.capacity for load in self.loads):
+            return False
+        return not self.timed or all(schedule.feasible for schedule in self.schedules)
+
+    def fitness(self) -> float:
+        """Ocena zgodna z VehicleRoutingProblem._fitness"""
+        return -self.total_distance if self.is_feasible() else float("-inf")
+
+    def to_individual(self) -> Individual:
+        return [list(route) for route in self.routes]
+
+    # Relocate: przeniesienie miasta przed pozycję `position` trasy `route_index`
+
+    def relocate_delta(self, city: int, route_index: int, position: int) -> float:
+        """Zmiana długości po przeniesieniu miasta (pozycja liczona przed usunięciem)"""
+        source = self.route_of[city]
+        source_position = self.position[city]
+        if route_index == source and position in (source_position, source_position + 1):
+            return 0.0
+
+        matrix = self.matrix
+        prev = self._node(source, source_position - 1)
+        nxt = self._node(source, source_position + 1)
+        removal = matrix[prev, nxt] - matrix[prev, city] - matrix[city, nxt]
+
+        before = self._node(route_index, position - 1)
+        after = self._node(route_index, position)
+        insertion = matrix[before, city] + matrix[city, after] - matrix[before, after]
+        return removal + insertion
+
+    def relocate_feasible(self, city: int, route_index: int) -> bool:
+        if route_index == self.route_of[city]:
+            return True
+        return self.loads[route_index] + self.demands[city] <= self.capacity
+
+    def apply_relocate(self, city: int, route_index: int, position: int) -> None:
+        source = self.route_of[city]
+        source_position = self.position[city]
+        if route_index == source and position > source_position:
+            position -= 1
+
+        del self.routes[source][source_position]
+        self.routes[route_index].insert(position, city)
+
+        self._index_route(source)
+        if route_index != source:
+            self._index_route(route_index)
+
+    # Swap: zamiana miejscami dwóch miast (w jednej lub w dwóch trasach)
+
+    def swap_delta(self, city_a: int, city_b: int) -> float:
+        """Zmiana długości po zamianie miejscami dwóch miast"""
+        if city_a == city_b:
+            return 0.0
+
+        matrix = self.matrix
+        route_a, position_a = self.route_of[city_a], self.position[city_a]
+        route_b, position_b = self.route_of[city_b], self.position[city_b]
+
+        if route_a == route_b and abs(position_a - position_b) == 1:
+            first, second = (
+                (city_a, city_b) if position_a < position_b else (city_b, city_a)
+            )
+            prev = self.predecessor(first)
+            nxt = self.successor(second)
+            return (
+                matrix[prev, second]
+                + matrix[second, first]
+                + matrix[first, nxt]
+                - matrix[prev, first]
+                - matrix[first, second]
+                - matrix[second, nxt]
+            )
+
+        prev_a, next_a = self.predecessor(city_a), self.successor(city_a)
+        prev_b, next_b = self.predecessor(city_b), self.successor(city_b)
+        return (
+            matrix[prev_a, city_b]
+            + matrix[city_b, next_a]
+            + matrix[prev_b, city_a]
+            + matrix[city_a, next_b]
+            - matrix[prev_a, city_a]
+            - matrix[city_a, next_a]
+            - matrix[prev_b, city_b]
+            - matrix[city_b, next_b]
+        )
+
+    def swap_feasible(self, city_a: int, city_b: int) -> bool:
+        route_a, route_b = self.route_of[city_a], self.route_of[city_b]
+        if route_a == route_b:
+            return True
+
+        difference = self.demands[city_b] - self.demands[city_a]
+        return (
+            self.loads[route_a] + difference <= self.capacity
+            and self.loads[route_b] - difference <= self.capacity
+        )
+
+    def apply_swap(self, city_a: int, city_b: int) -> None:
+        route_a, position_a = self.route_of[city_a], self.position[city_a]
+        route_b, position_b = self.route_of[city_b], self.position[city_b]
+
+        self.routes[route_a][position_a] = city_b
+        self.routes[route_b][position_b] = city_a
+
+        self._index_route(route_a)
+        if route_b != route_a:
+            self._index_route(route_b)
+
+    # Exchange (2-opt*): wymiana końcówek dwóch różnych tras od pozycji i oraz j
+
+    def exchange_delta(
+        self, route_1: int, position_1: int, route_2: int, position_2: int
+    ) -> float:
+        """Zmiana długości po wymianie końcówek route_1[position_1:] i route_2[position_2:]"""
+        matrix = self.matrix
+        before_1 = self._node(route_1, position_1 - 1)
+        tail_1 = self._node(route_1, position_1)
+        before_2 = self._node(route_2, position_2 - 1)
+        tail_2 = self._node(route_2, position_2)
+        return (
+            matrix[before_1, tail_2]
+            + matrix[before_2, tail_1]
+            - matrix[before_1, tail_1]
+            - matrix[before_2, tail_2]
+        )
+
+    def exchange_loads(
+        self, route_1: int, position_1: int, route_2: int, position_2: int
+    ) -> Tuple[int, int]:
+        """Obciążenia obu tras po wymianie końcówek (z sum prefiksowych)"""
+        head_1 = self.prefix_loads[route_1][position_1]
+        head_2 = self.prefix_loads[route_2][position_2]
+        return (
+            head_1 + self.loads[route_2] - head_2,
+            head_2 + self.loads[route_1] - head_1,
+        )
+
+    def exchange_feasible(
+        self, route_1: int, position_1: int, route_2: int, position_2: int
+    ) -> bool:
+        load_1, load_2 = self.exchange_loads(route_1, position_1, route_2, position_2)
+        return load_1 <= self.capacity and load_2 <= self.capacity
+
+    def apply_exchange(
+        self, route_1: int, position_1: int, route_2: int, position_2: int
+    ) -> None:
+        first, second = self.routes[route_1], self.routes[route_2]
+        self.routes[route_1] = first[:position_1] + second[position_2:]
+        self.routes[route_2] = second[:position_2] + first[position_1:]
+
+        self._index_route(route_1)
+        self._index_route(route_2)
+
+    # 2-opt: odwrócenie fragmentu route[position_1 : position_2 + 1] jednej trasy
+
+    def two_opt_delta(
+        self, route_index: int, position_1: int, position_2: int
+    ) -> float:
+        """Zmiana długości po odwróceniu fragmentu trasy (macierz symetryczna)"""
+        matrix = self.matrix
+        before = self._node(route_index, position_1 - 1)
+        first = self._node(route_index, position_1)
+        last = self._node(route_index, position_2)
+        after = self._node(route_index, position_2 + 1)
+        return (
+            matrix[before, last]
+            + matrix[first, after]
+            - matrix[before, first]
+            - matrix[last, after]
+        )
+
+    def apply_two_opt(self, route_index: int, position_1: int, position_2: int) -> None:
+        route = self.routes[route_index]
+        route[position_1 : position_2 + 1] = route[position_1 : position_2 + 1][::-1]
+        self._index_route(route_index)
+
+    # Or-opt: przeniesienie fragmentu `length` miast zaczynającego się od `city`
+
+    def segment_delta(
+        self, city: int, length: int, route_index: int, position: int
+    ) -> float:
+        """Zmiana długości po przeniesieniu fragmentu przed pozycję `position`"""
+        source = self.route_of[city]
+        start = self.position[city]
+        end = start + length - 1
+        if route_index == source and start <= position <= end + 1:
+            return 0.0
+
+        matrix = self.matrix
+        last = self.routes[source][end]
+        prev = self._node(source, start - 1)
+        nxt = self._node(source, end + 1)
+        removal = matrix[prev, nxt] - matrix[prev, city] - matrix[last, nxt]
+
+        before = self._node(route_index, position - 1)
+        after = self._node(route_index, position)
+        insertion = matrix[before, city] + matrix[last, after] - matrix[before, after]
+        return removal + insertion
+
+    def segment_feasible(self, city: int, length: int, route_index: int) -> bool:
+        source = self.route_of[city]
+        if route_index == source:
+            return True
+
+        prefix = self.prefix_loads[source]
+        start = self.position[city]
+        segment_load = prefix[start + length] - prefix[start]
+        return self.loads[route_index] + segment_load <= self.capacity
+
+    def apply_segment(
+        self, city: int, length: int, route_index: int, position: int
+    ) -> None:
+        source = self.route_of[city]
+        start = self.position[city]
+        segment = self.routes[source][start : start + length]
+        if route_index == source and position > start:
+            position -= length
+
+        del self.routes[source][start : start + length]
+        self.routes[route_index][position:position] = segment
+
+        self._index_route(source)
+        if route_index != source:
+            self._index_route(route_index)
+
+    # Okna czasowe: sprawdzenia wykonywane dopiero dla ruchów, które skracają trasy
+
+    def segment_times_feasible(
+        self, city: int, length: int, route_index: int, position: int
+    ) -> bool:
+        """Okna czasowe po przeniesieniu fragmentu przed pozycję `position`"""
+        if not self.timed:
+            return True
+        source = self.route_of[city]
+        start = self.position[city]
+        end = start + length - 1
+        segment = self.routes[source][start : end + 1]
+
+        if route_index == source:
+            route = self.routes[source][:start] + self.routes[source][end + 1 :]
+            if position > start:
+                position -= length
+            route[position:position] = segment
+            return route_times_feasible(self.problem, route)
+
+        return self.schedules[source].can_replace(start, end, ()) and self.schedules[
+            route_index
+        ].can_replace(position, position - 1, segment)
+
+    def swap_times_feasible(self, city_a: int, city_b: int) -> bool:
+        """Okna czasowe po zamianie miejscami dwóch miast"""
+        if not self.timed:
+            return True
+        route_a, position_a = self.route_of[city_a], self.position[city_a]
+        route_b, position_b = self.route_of[city_b], self.position[city_b]
+
+        if route_a == route_b:
+            route = list(self.routes[route_a])
+            route[position_a], route[position_b] = city_b, city_a
+            return route_times_feasible(self.problem, route)
+
+        return self.schedules[route_a].can_replace(
+            position_a, position_a, (city_b,)
+        ) and self.schedules[route_b].can_replace(position_b, position_b, (city_a,))
+
+    def exchange_times_feasible(
+        self, route_1: int, position_1: int, route_2: int, position_2: int
+    ) -> bool:
+        """Okna czasowe po wymianie końcówek - czas stały: początek jednej trasy
+        łączony jest z luzem końcówki drugiej"""
+        if not self.timed:
+            return True
+        first, second = self.schedules[route_1], self.schedules[route_2]
+        return _joins(self.problem, first, position_1, second, position_2) and _joins(
+            self.problem, second, position_2, first, position_1
+        )
+
+    def two_opt_times_feasible(
+        self, route_index: int, position_1: int, position_2: int
+    ) -> bool:
+        """Okna czasowe po odwróceniu fragmentu trasy"""
+        if not self.timed:
+            return True
+        route = list(self.routes[route_index])
+        route[position_1 : position_2 + 1] = route[position_1 : position_2 + 1][::-1]
+        return route_times_feasible(self.problem, route)
+
+
+def _joins(
+    problem: VehicleRoutingProblem,
+    head: RouteSchedule,
+    head_end: int,
+    tail: RouteSchedule,
+    tail_start: int,
+) -> bool:
+    """Czy miasta head[:head_end] i po nich tail[tail_start:] tworzą dopuszczalną trasę"""
+    return head.prefix_feasible[head_end] and connection_feasible(
+        problem,
+        head.departures[head_end],
+        head.nodes[head_end],
+        (),
+        tail.nodes[tail_start + 1],
+        tail.latest[tail_start + 1],
+    )
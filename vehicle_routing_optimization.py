@@ -1,7 +1,629 @@
 import numpy as np
 import random
 import itertools
-from typing import List, Dict, Tuple
+import hashlib
+import time
+from array import array
+from collections import OrderedDict
+from math import radians, sin, cos, sqrt, atan2, asin
+from typing import List, Dict, Tuple, Optional, Union, Callable, Iterator, NamedTuple
+
+from vehicle_routing_datasets import ArrayMapping
+from vehicle_routing_giant_tour import giant_tour, order_crossover, split_tour
+from vehicle_routing_kernels import KernelBackend, resolve_backend
+from vehicle_routing_selection import SELECTION_METHODS, elite_count, elite_indices
+from vehicle_routing_solution import Solution
+from vehicle_routing_time_windows import (
+    RouteSchedule,
+    append_departure,
+    route_lateness,
+    route_times_feasible,
+)
+
+EARTH_RADIUS_KM = 6371  # promień Ziemi w km
+
+# Tryby przeszukiwania lokalnego w algorytmie genetycznym
+LOCAL_SEARCH_MODES = (None, "offspring", "elites")
+
+# Kodowanie osobników: trasy pojazdów lub jedna permutacja miast dzielona procedurą Split
+ENCODINGS = ("routes", "giant_tour")
+
+# Ocena osobników naruszających ograniczenia: odrzucenie (-inf) lub kara
+CONSTRAINT_HANDLING_MODES = ("discard", "penalty")
+
+# Adaptacja wag kar: mnożniki przy zbyt małym i zbyt dużym udziale osobników
+# spełniających ograniczenie oraz dopuszczalne odchylenie od udziału docelowego
+PENALTY_INCREASE = 1.2
+PENALTY_DECREASE = 0.85
+PENALTY_TOLERANCE = 0.05
+PENALTY_RANGE = 100.0  # wagi w przedziale [początkowa / 100, początkowa * 100]
+
+# Najmniej osobników ocenianych wektorowo - przy mniejszej liczbie narzut NumPy
+# przewyższa koszt oceny pojedynczych osobników
+MIN_BATCH_SIZE = 4
+
+# Wywołanie zwrotne przy poprawie najlepszego rozwiązania: (trasy, dystans, generacja)
+ImprovementCallback = Callable[[List[List[str]], float, int], None]
+
+
+class GenerationStats(NamedTuple):
+    """Statystyki jednej generacji przekazywane przez genetic_algorithm_steps"""
+
+    generation: int
+    best_distance: float  # najlepszy dystans z całego przebiegu
+    mean_distance: float  # średni dystans dopuszczalnych osobników generacji
+    elapsed: float  # sekundy od startu
+    improved: bool
+    best_routes: List[List[str]]
+
+
+# Osobnik: lista tras pojazdów, każda trasa to lista indeksów miast
+Individual = List[List[int]]
+
+
+def haversine_matrix(
+    coords_a: np.ndarray, coords_b: np.ndarray, dtype=np.float64
+) -> np.ndarray:
+    """Macierz odległości haversine między dwoma zbiorami współrzędnych (lat, lon)"""
+    coords_a = np.radians(np.asarray(coords_a, dtype=np.float64))
+    coords_b = np.radians(np.asarray(coords_b, dtype=np.float64))
+
+    lat1 = coords_a[:, 0][:, None]
+    lat2 = coords_b[:, 0][None, :]
+    dlat = lat2 - lat1
+    dlon = coords_b[:, 1][None, :] - coords_a[:, 1][:, None]
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    # Przycięcie chroni przed wartościami > 1 wynikającymi z błędów zaokrągleń
+    c = 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    return (EARTH_RADIUS_KM * c).astype(dtype, copy=False)
+
+
+def euclidean_matrix(
+    coords_a: np.ndarray, coords_b: np.ndarray, dtype=np.float64
+) -> np.ndarray:
+    """Macierz odległości euklidesowych między dwoma zbiorami punktów (x, y)"""
+    coords_a = np.asarray(coords_a, dtype=np.float64)
+    coords_b = np.asarray(coords_b, dtype=np.float64)
+    dx = coords_a[:, 0][:, None] - coords_b[:, 0][None, :]
+    dy = coords_a[:, 1][:, None] - coords_b[:, 1][None, :]
+    return np.sqrt(dx**2 + dy**2).astype(dtype, copy=False)
+
+
+# Funkcje liczące bloki macierzy odległości dla obsługiwanych metryk
+DISTANCE_METRICS = {"haversine": haversine_matrix, "euclidean": euclidean_matrix}
+
+
+def haversine_pairs(coords_a: np.ndarray, coords_b: np.ndarray) -> np.ndarray:
+    """Odległości haversine między odpowiadającymi sobie punktami dwóch tablic"""
+    coords_a = np.radians(np.asarray(coords_a, dtype=np.float64))
+    coords_b = np.radians(np.asarray(coords_b, dtype=np.float64))
+    dlat = coords_b[..., 0] - coords_a[..., 0]
+    dlon = coords_b[..., 1] - coords_a[..., 1]
+
+    a = (
+        np.sin(dlat / 2) ** 2
+        + np.cos(coords_a[..., 0]) * np.cos(coords_b[..., 0]) * np.sin(dlon / 2) ** 2
+    )
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def euclidean_pairs(coords_a: np.ndarray, coords_b: np.ndarray) -> np.ndarray:
+    """Odległości euklidesowe między odpowiadającymi sobie punktami dwóch tablic"""
+    delta = np.asarray(coords_b, dtype=np.float64) - np.asarray(
+        coords_a, dtype=np.float64
+    )
+    return np.sqrt(delta[..., 0] ** 2 + delta[..., 1] ** 2)
+
+
+# Odległości między parami punktów (bez budowy macierzy) dla obsługiwanych metryk
+PAIRWISE_METRICS = {"haversine": haversine_pairs, "euclidean": euclidean_pairs}
+
+
+def _index_points(coords: np.ndarray, metric: str) -> np.ndarray:
+    """Punkty, dla których odległość euklidesowa zachowuje kolejność odległości metryki.
+
+    Dla haversine są to wektory jednostkowe na sferze - długość cięciwy rośnie
+    monotonicznie z odległością po okręgu wielkim.
+    """
+    if metric != "haversine":
+        return coords
+    lat, lon = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+    return np.column_stack(
+        (np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat))
+    )
+
+
+def _nearest_indices(points: np.ndarray, k: int, chunk_size: int) -> np.ndarray:
+    """Indeksy k najbliższych punktów (bez samego punktu) w metryce euklidesowej"""
+    n = len(points)
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        cKDTree = None
+
+    if cKDTree is not None:
+        _, candidates = cKDTree(points).query(points, k=k + 1)
+        candidates = candidates.reshape(n, k + 1)
+        # Przy powtórzonych współrzędnych punkt nie musi być pierwszy na liście
+        own = candidates == np.arange(n)[:, None]
+        own[~own.any(axis=1), -1] = True
+        return candidates[~own].reshape(n, k)
+
+    # Bez SciPy: przeszukanie blokami - czas kwadratowy, ale pamięć liniowa
+    neighbours = np.empty((n, k), dtype=np.int64)
+    squared = (points**2).sum(axis=1)
+    rows = max(1, min(chunk_size, 2**24 // max(n, 1)))
+    for start in range(0, n, rows):
+        stop = min(start + rows, n)
+        block = squared[start:stop, None] + squared[None, :]
+        block -= 2 * points[start:stop] @ points.T
+        block[np.arange(stop - start), np.arange(start, stop)] = np.inf
+        candidates = np.argpartition(block, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(block, candidates, axis=1).argsort(axis=1)
+        neighbours[start:stop] = np.take_along_axis(candidates, order, axis=1)
+    return neighbours
+
+
+class CondensedDistanceMatrix:
+    """Symetryczna macierz odległości przechowywana jako górny trójkąt bez przekątnej"""
+
+    def __init__(self, data: np.ndarray, size: int):
+        if len(data) != size * (size - 1) // 2:
+            raise ValueError(
+                f"Rozmiar danych ({len(data)}) nie odpowiada macierzy {size}x{size}."
+            )
+        self.data = data
+        self.size = size
+
+    @classmethod
+    def from_coordinates(
+        cls,
+        coords: np.ndarray,
+        dtype=np.float32,
+        chunk_size: int = 1024,
+        metric: Union[str, Callable[..., np.ndarray]] = "haversine",
+    ) -> "CondensedDistanceMatrix":
+        """Budowa macierzy blokami wierszy, aby ograniczyć szczytowe zużycie pamięci.
+
+        `metric` to nazwa metryki lub funkcja bloku (np. DistanceProvider.block).
+        """
+        distance_function = (
+            DISTANCE_METRICS[metric] if isinstance(metric, str) else metric
+        )
+        coords = np.asarray(coords, dtype=np.float64)
+        n = len(coords)
+        data = np.empty(n * (n - 1) // 2, dtype=dtype)
+
+        for start in range(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            # Blok zawiera tylko kolumny od `start`, bo dolny trójkąt jest pomijany
+            block = distance_function(coords[start:stop], coords[start:], dtype=dtype)
+            for i in range(start, stop):
+                offset = cls._row_offset(i, n)
+                data[offset : offset + n - i - 1] = block[i - start, i - start + 1 :]
+
+        return cls(data, n)
+
+    @staticmethod
+    def _row_offset(i, n):
+        """Pozycja pierwszego elementu wiersza `i` (kolumna i + 1) w danych"""
+        return n * i - i * (i + 1) // 2
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (self.size, self.size)
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def __len__(self) -> int:
+        return self.size
+
+    def row(self, i: int) -> np.ndarray:
+        """Pełny wiersz macierzy (odległości z miasta `i` do wszystkich miast)"""
+        n = self.size
+        result = np.empty(n, dtype=self.data.dtype)
+        upper = np.arange(i, dtype=np.int64)
+        result[:i] = self.data[self._row_offset(upper, n) + (i - upper - 1)]
+        result[i] = 0
+        offset = self._row_offset(i, n)
+        result[i + 1 :] = self.data[offset : offset + n - i - 1]
+        return result
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            return self.row(int(key))
+
+        i, j = key
+        if np.isscalar(i) and np.isscalar(j):
+            if i == j:
+                return self.data.dtype.type(0)
+            if i > j:
+                i, j = j, i
+            return self.data[self._row_offset(i, self.size) + (j - i - 1)]
+
+        i = np.asarray(i, dtype=np.int64)
+        j = np.asarray(j, dtype=np.int64)
+        low = np.minimum(i, j)
+        high = np.maximum(i, j)
+        index = self._row_offset(low, self.size) + (high - low - 1)
+        diagonal = low == high
+        # Dla przekątnej indeks byłby niepoprawny, więc podstawiamy 0 i zerujemy wynik
+        result = self.data[np.where(diagonal, 0, index)]
+        return np.where(diagonal, 0, result).astype(self.data.dtype, copy=False)
+
+    def to_dense(self) -> np.ndarray:
+        """Konwersja do pełnej macierzy n×n"""
+        return np.array([self.row(i) for i in range(self.size)])
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self.to_dense()
+        return dense if dtype is None else dense.astype(dtype)
+
+
+class SparseDistanceMatrix:
+    """Odległości do k najbliższych sąsiadów każdego miasta, pozostałe liczone na żądanie.
+
+    Sąsiedzi wyznaczani są indeksem przestrzennym (drzewo k-d z SciPy na wektorach
+    jednostkowych, a bez SciPy - przeszukaniem blokami), więc pamięć rośnie liniowo
+    z liczbą miast. Wiersze posortowane są według odległości i służą też jako listy
+    kandydatów przeszukiwania lokalnego.
+    """
+
+    def __init__(
+        self,
+        coords: np.ndarray,
+        neighbours: np.ndarray,
+        distances: np.ndarray,
+        metric: str = "haversine",
+    ):
+        if neighbours.shape != distances.shape or len(neighbours) != len(coords):
+            raise ValueError("Niezgodne rozmiary tablic sąsiadów i odległości.")
+        self.coords = np.asarray(coords, dtype=np.float64)
+        self.neighbours = neighbours
+        self.distances = distances
+        self.metric = metric
+        self.size = len(coords)
+        self.k = neighbours.shape[1]
+        self._pairs = PAIRWISE_METRICS[metric]
+        # Posortowane klucze par (wiersz, sąsiad) do wyszukiwania wielu par naraz,
+        # tworzone przy pierwszym użyciu
+        self._keys: Optional[np.ndarray] = None
+        self._key_distances: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_coordinates(
+        cls,
+        coords: np.ndarray,
+        k: int = 16,
+        dtype=np.float32,
+        chunk_size: int = 1024,
+        metric: str = "haversine",
+    ) -> "SparseDistanceMatrix":
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        n = len(coords)
+        k = max(0, min(k, n - 1))
+        if k == 0:
+            neighbours = np.empty((n, 0), dtype=np.int32)
+        else:
+            neighbours = _nearest_indices(
+                _index_points(coords, metric), k, chunk_size
+            ).astype(np.int32)
+
+        distances = PAIRWISE_METRICS[metric](coords[:, None, :], coords[neighbours])
+        order = distances.argsort(axis=1, kind="stable")
+        return cls(
+            coords,
+            np.take_along_axis(neighbours, order, axis=1),
+            np.take_along_axis(distances, order, axis=1).astype(dtype),
+            metric,
+        )
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (self.size, self.size)
+
+    @property
+    def dtype(self):
+        return self.distances.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.coords.nbytes + self.neighbours.nbytes + self.distances.nbytes
+
+    def __len__(self) -> int:
+        return self.size
+
+    def row(self, i: int) -> np.ndarray:
+        """Pełny wiersz macierzy (liczony na żądanie)"""
+        return self[np.full(self.size, i), np.arange(self.size)]
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            return self.row(int(key))
+
+        i, j = key
+        if np.isscalar(i) and np.isscalar(j):
+            # Wartość pary zawsze z wiersza mniejszego indeksu, co zapewnia symetrię
+            low, high = (int(i), int(j)) if i <= j else (int(j), int(i))
+            if low == high:
+                return self.dtype.type(0)
+            position = np.flatnonzero(self.neighbours[low] == high)
+            if len(position):
+                return self.distances[low, position[0]]
+            return self.dtype.type(self._pair_distance(low, high))
+
+        i, j = np.broadcast_arrays(
+            np.asarray(i, dtype=np.int64), np.asarray(j, dtype=np.int64)
+        )
+        low = np.minimum(i, j).ravel()
+        high = np.maximum(i, j).ravel()
+        keys, key_distances = self._lookup()
+        wanted = low * self.size + high
+        # Pamięć proporcjonalna do liczby par (bez porównania z całymi wierszami)
+        position = np.searchsorted(keys, wanted)
+        stored = np.zeros(len(low), dtype=bool)
+        inside = position < len(keys)
+        stored[inside] = keys[position[inside]] == wanted[inside]
+
+        result = np.empty(len(low), dtype=self.dtype)
+        result[stored] = key_distances[position[stored]]
+        computed = ~stored
+        result[computed] = self._pairs(
+            self.coords[low[computed]], self.coords[high[computed]]
+        )
+        result[low == high] = 0
+        return result.reshape(i.shape)
+
+    def _lookup(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Klucze wiersz · n + sąsiad posortowane rosnąco i odpowiadające im
+        odległości; przy powtórzonym sąsiedzie pierwszy jest ten z wiersza"""
+        if self._keys is None:
+            keys = (
+                np.arange(self.size, dtype=np.int64)[:, None] * self.size
+                + self.neighbours
+            ).ravel()
+            order = np.argsort(keys, kind="stable")
+            self._keys = keys[order]
+            self._key_distances = self.distances.ravel()[order]
+        return self._keys, self._key_distances
+
+    def _pair_distance(self, i: int, j: int) -> float:
+        """Odległość pojedynczej pary - te same wzory co haversine_pairs i euclidean_pairs"""
+        x1, y1 = self.coords[i].tolist()
+        x2, y2 = self.coords[j].tolist()
+        if self.metric == "euclidean":
+            return sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+
+        lat1, lon1, lat2, lon2 = map(radians, (x1, y1, x2, y2))
+        a = (
+            sin((lat2 - lat1) / 2) ** 2
+            + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+        )
+        return EARTH_RADIUS_KM * 2 * asin(sqrt(min(max(a, 0.0), 1.0)))
+
+    def to_dense(self) -> np.ndarray:
+        """Konwersja do pełnej macierzy n×n"""
+        return np.array([self.row(i) for i in range(self.size)])
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self.to_dense()
+        return dense if dtype is None else dense.astype(dtype)
+
+
+# Obsługiwane postaci macierzy odległości
+DistanceMatrix = Union[np.ndarray, CondensedDistanceMatrix, SparseDistanceMatrix]
+
+
+class FitnessCache:
+    """Ograniczona pamięć podręczna LRU ocen osobników"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, float]" = OrderedDict()
+
+    @staticmethod
+    def key(individual: Individual) -> bytes:
+        """Kanoniczny skrót tras - kolejność pojazdów i puste trasy nie mają znaczenia"""
+        flat = array("l")
+        for route in sorted(route for route in individual if route):
+            flat.extend(route)
+            flat.append(-1)
+        return hashlib.blake2b(flat.tobytes(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[float]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: bytes, value: float) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class PopulationEvaluator:
+    """Wektorowa ocena całej populacji w jednym przebiegu NumPy"""
+
+    def __init__(self, problem: "VehicleRoutingProblem", chunk_size: int = 256):
+        self.problem = problem
+        self.chunk_size = chunk_size
+        self.demands = np.asarray(problem.demands, dtype=np.int64)
+
+    def encode(self, population: List[Individual]) -> np.ndarray:
+        """Populacja jako tablica (osobniki, pojazdy, przystanki) dopełniona bazą"""
+        depot = self.problem.depot_index
+        vehicles = self.problem.num_vehicles
+        routes_list = list(itertools.chain.from_iterable(population))
+        lengths = np.array([len(route) for route in routes_list], dtype=np.int64)
+        cities = np.fromiter(
+            itertools.chain.from_iterable(routes_list),
+            dtype=np.int64,
+            count=int(lengths.sum()),
+        )
+        longest = int(lengths.max(initial=0))
+        # Baza na początku i końcu każdej trasy; dopełnienie bazą ma zerowy koszt
+        routes = np.full((len(routes_list), longest + 2), depot, dtype=np.int64)
+        # Wszystkie miasta populacji jednym przypisaniem: wiersz to trasa, kolumna -
+        # pozycja miasta w trasie (od 1, za bazą)
+        starts = np.cumsum(lengths) - lengths
+        routes[
+            np.repeat(np.arange(len(routes_list)), lengths),
+            np.arange(1, len(cities) + 1) - np.repeat(starts, lengths),
+        ] = cities
+        return routes.reshape(len(population), vehicles, longest + 2)
+
+    def evaluate(
+        self, population: List[Individual]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Długości tras, obciążenia pojazdów, liczba obsłużonych miast oraz łączne
+        spóźnienie osobników (okna czasowe i limit czasu tras)"""
+        matrix = self.problem.distance_matrix
+        depot = self.problem.depot_index
+        distances = []
+        loads = []
+        served = []
+        lateness = []
+
+        # Przetwarzanie blokami ogranicza rozmiar tablic pomocniczych
+        for start in range(0, len(population), self.chunk_size):
+            routes = self.encode(population[start : start + self.chunk_size])
+            legs = np.asarray(matrix[routes[:, :, :-1], routes[:, :, 1:]])
+            # Sumy narastające liczą od lewej do prawej, więc wynik nie zależy od
+            # długości dopełnienia i jest identyczny z VehicleRoutingProblem._fitness
+            distances.append(np.cumsum(legs, axis=2)[:, :, -1])
+            loads.append(self.demands[routes].sum(axis=2))
+            served.append((routes != depot).sum(axis=(1, 2)))
+            if self.problem.time_constrained:
+                lateness.append(self._lateness(routes, legs))
+            else:
+                lateness.append(np.zeros(len(routes)))
+
+        if not distances:
+            empty = np.empty((0, self.problem.num_vehicles))
+            return (
+                empty,
+                empty.astype(np.int64),
+                np.empty(0, dtype=np.int64),
+                np.empty(0),
+            )
+        return (
+            np.concatenate(distances),
+            np.concatenate(loads),
+            np.concatenate(served),
+            np.concatenate(lateness),
+        )
+
+    def _lateness(self, routes: np.ndarray, legs: np.ndarray) -> np.ndarray:
+        """Symulacja harmonogramu wszystkich tras naraz, przystanek po przystanku,
+        zgodna z route_lateness.
+
+        Dopełnienie bazą nie zmienia wyniku: przejazd baza-baza trwa 0, a okno bazy
+        kończy się terminem powrotu z trasy.
+        """
+        problem = self.problem
+        earliest = np.asarray(problem.earliest)
+        latest = np.asarray(problem.latest)
+        latest[problem.depot_index] = problem.route_deadline
+        service = np.asarray(problem.service_times)
+        times = legs / problem.travel_speed
+
+        time = np.full(routes.shape[:2], float(problem.route_start))
+        lateness = np.zeros(routes.shape[:2])
+        for k in range(1, routes.shape[2]):
+            previous, city = routes[:, :, k - 1], routes[:, :, k]
+            time = np.maximum(
+                earliest[city], time + service[previous] + times[:, :, k - 1]
+            )
+            lateness += np.maximum(time - latest[city], 0.0)
+            time = np.minimum(time, latest[city])
+        return np.cumsum(lateness, axis=1)[:, -1]
+
+    def objectives(
+        self, population: List[Individual]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Składniki oceny zgodne z VehicleRoutingProblem._objectives: długość tras
+        (nieskończona, gdy pominięto miasta), nadmiar ładunku i łączne spóźnienie"""
+        distances, loads, served, lateness = self.evaluate(population)
+        totals = np.cumsum(distances, axis=1)[:, -1]
+        totals[served != len(self.problem.customers)] = np.inf
+        excess = np.maximum(loads - self.problem.vehicle_capacity, 0).sum(axis=1)
+        return totals, excess, lateness
+
+    def fitness(self, population: List[Individual]) -> np.ndarray:
+        """Ocena populacji zgodna z VehicleRoutingProblem._fitness"""
+        totals, excess, lateness = self.objectives(population)
+        return np.where((excess == 0) & (lateness == 0), -totals, -np.inf)
+
+
+def build_distance_matrix(
+    coords: np.ndarray,
+    storage: str = "dense",
+    metric: str = "haversine",
+    provider=None,
+    chunk_size: int = 1024,
+    neighbours: int = 16,
+) -> DistanceMatrix:
+    """Macierz odległości między punktami `coords` w wybranej postaci (dense,
+    condensed lub sparse), liczona metryką albo dostawcą odległości"""
+    chunk_size = max(1, chunk_size)
+    if provider is None and metric not in DISTANCE_METRICS:
+        raise ValueError(f"Nieznana metryka odległości: {metric}")
+    if provider is not None and storage != "dense":
+        if storage == "sparse":
+            raise ValueError(
+                "Przechowywanie rzadkie wymaga metryki, a nie dostawcy odległości."
+            )
+        if not provider.symmetric:
+            raise ValueError(
+                "Odległości asymetryczne wymagają pełnej macierzy (dense)."
+            )
+
+    if storage == "sparse":
+        # Tryb dla bardzo dużych instancji - pamięć liniowa zamiast kwadratowej
+        return SparseDistanceMatrix.from_coordinates(
+            coords,
+            k=neighbours,
+            dtype=np.float32,
+            chunk_size=chunk_size,
+            metric=metric,
+        )
+    if storage == "condensed":
+        return CondensedDistanceMatrix.from_coordinates(
+            coords,
+            dtype=np.float32,
+            chunk_size=chunk_size,
+            metric=provider.block if provider is not None else metric,
+        )
+    if storage != "dense":
+        raise ValueError(f"Nieznany sposób przechowywania odległości: {storage}")
+
+    block = provider.block if provider is not None else DISTANCE_METRICS[metric]
+    n = len(coords)
+    matrix = np.empty((n, n))
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        matrix[start:stop] = block(coords[start:stop], coords)
+    np.fill_diagonal(matrix, 0.0)
+    return matrix
 
 
 class VehicleRoutingProblem:
@@ -11,6 +633,18 @@ class VehicleRoutingProblem:
         city_demands: Dict[str, int],
         num_vehicles: int = 5,
         vehicle_capacity: int = 1000,
+        distance_storage: str = "dense",
+        distance_chunk_size: int = 1024,
+        distance_matrix: Optional[DistanceMatrix] = None,
+        depot: str = "Kraków",
+        distance_metric: str = "haversine",
+        distance_neighbours: int = 16,
+        distance_provider=None,
+        time_windows: Optional[Dict[str, Tuple[float, float]]] = None,
+        service_times: Optional[Dict[str, float]] = None,
+        max_route_duration: Optional[float] = None,
+        travel_speed: float = 1.0,
+        backend: str = "auto",
     ):
         self.cities_data = cities_data
         self.city_demands = city_demands
@@ -18,6 +652,14 @@ class VehicleRoutingProblem:
         self.vehicle_capacity = vehicle_capacity
         self.cities = list(cities_data.keys())
         self.total_demand = sum(city_demands.values())
+        self.distance_storage = distance_storage
+        self.distance_chunk_size = distance_chunk_size
+        self.distance_neighbours = distance_neighbours
+        if distance_metric not in DISTANCE_METRICS:
+            raise ValueError(f"Nieznana metryka odległości: {distance_metric}")
+        self.distance_metric = distance_metric
+        # Dostawca odległości (vehicle_routing_distances) zamiast metryki
+        self.distance_provider = distance_provider
 
         # Sprawdzenie poprawności parametrów
         if self.num_vehicles * self.vehicle_capacity < self.total_demand:
@@ -26,16 +668,108 @@ class VehicleRoutingProblem:
                 f"jest mniejsza niż całkowite zapotrzebowanie miast ({self.total_demand})."
             )
 
-        # Obliczenie macierzy odległości
-        self.distance_matrix = self._calculate_distance_matrix()
+        # Indeksy miast używane wewnętrznie przez algorytm genetyczny
+        self.city_index = {city: i for i, city in enumerate(self.cities)}
+        if depot not in self.city_index:
+            raise ValueError(f"Baza {depot} nie występuje w danych miast.")
+        self.depot = depot
+        self.depot_index = self.city_index[depot]
+        self.customers = [i for i in range(len(self.cities)) if i != self.depot_index]
+        if isinstance(city_demands, ArrayMapping) and city_demands.names == self.cities:
+            # Dane z pliku - bez odczytu miasto po mieście
+            self.demands = city_demands.array.tolist()
+        else:
+            self.demands = [city_demands.get(city, 0) for city in self.cities]
+        self._set_time_constraints(
+            time_windows, service_times, max_route_duration, travel_speed
+        )
+
+        # Statystyki oceny osobników z ostatniego uruchomienia algorytmu
+        self.fitness_cache: Optional[FitnessCache] = None
+        self.fitness_evaluations = 0
+        self.batch_evaluation = True
+        self._population_evaluator: Optional[PopulationEvaluator] = None
+        self.profiler = None
+        self.local_search_mode: Optional[str] = None
+        self.local_search_rate = 0.0
+        self._local_search = None
+        self.selection = "tournament"
+        self.tournament_size = 3
+        self.elite_fraction = 0.02
+        self.constraint_handling = "penalty"
+        self.penalty_target = 0.2
+        self.repair_rate = 0.0
+        self._repair = None
+        self.encoding = "routes"
+
+        # Obliczenie macierzy odległości (o ile nie została przekazana gotowa)
+        if distance_matrix is None:
+            distance_matrix = self._calculate_distance_matrix()
+        elif len(distance_matrix) != len(self.cities):
+            raise ValueError(
+                f"Macierz odległości ({len(distance_matrix)}) nie odpowiada "
+                f"liczbie miast ({len(self.cities)})."
+            )
+        self.distance_matrix = distance_matrix
+        self._initial_penalties = self._initial_penalty_weights()
+        self.penalty_weights = list(self._initial_penalties)
+        # Przy odległościach asymetrycznych odwrócenie fragmentu trasy zmienia jej długość
+        self.symmetric_distances = (
+            distance_provider is None or distance_provider.symmetric
+        )
+        # Operatory na tablicach (vehicle_routing_kernels) zamiast kodu tej klasy
+        self.backend = resolve_backend(backend)
+        self._kernels = KernelBackend(self) if self.backend == "numba" else None
+
+    def _set_time_constraints(
+        self,
+        time_windows: Optional[Dict[str, Tuple[float, float]]],
+        service_times: Optional[Dict[str, float]],
+        max_route_duration: Optional[float],
+        travel_speed: float,
+    ) -> None:
+        """Okna czasowe (początek, koniec obsługi), czasy obsługi i limit czasu trasy.
+
+        Czas przejazdu to odległość podzielona przez `travel_speed` (przy macierzy
+        czasów przejazdu - 1). Pojazdy wyjeżdżają z bazy na początku jej okna, a okno
+        bazy i `max_route_duration` wyznaczają termin powrotu.
+        """
+        if travel_speed <= 0:
+            raise ValueError("Prędkość przejazdu musi być dodatnia.")
+        time_windows = time_windows or {}
+        service_times = service_times or {}
+        for city, (earliest, latest) in time_windows.items():
+            if earliest > latest:
+                raise ValueError(
+                    f"Okno czasowe miasta {city} kończy się przed początkiem."
+                )
+
+        self.time_windows = time_windows
+        self.city_service_times = service_times
+        self.max_route_duration = max_route_duration
+        self.travel_speed = travel_speed
+        self.time_constrained = bool(time_windows) or max_route_duration is not None
+
+        windows = [time_windows.get(city, (0.0, float("inf"))) for city in self.cities]
+        self.earliest = [float(earliest) for earliest, _ in windows]
+        self.latest = [float(latest) for _, latest in windows]
+        self.service_times = [
+            float(service_times.get(city, 0.0)) for city in self.cities
+        ]
+        # Baza nie ma czasu obsługi; jej okno ogranicza wyjazd i powrót
+        self.service_times[self.depot_index] = 0.0
+        self.route_start = self.earliest[self.depot_index]
+        self.route_deadline = self.latest[self.depot_index]
+        if max_route_duration is not None:
+            self.route_deadline = min(
+                self.route_deadline, self.route_start + max_route_duration
+            )
 
     def _haversine_distance(
         self, coord1: Tuple[float, float], coord2: Tuple[float, float]
     ) -> float:
         """Obliczenie odległości między współrzędnymi geograficznymi"""
-        from math import radians, sin, cos, sqrt, atan2
-
-        R = 6371  # promień Ziemi w km
+        R = EARTH_RADIUS_KM
         lat1, lon1 = radians(coord1[0]), radians(coord1[1])
         lat2, lon2 = radians(coord2[0]), radians(coord2[1])
 
@@ -47,203 +781,979 @@ class VehicleRoutingProblem:
 
         return R * c
 
-    def _calculate_distance_matrix(self) -> np.ndarray:
+    def _distance_block(
+        self, coords_a: np.ndarray, coords_b: np.ndarray, dtype=np.float64
+    ) -> np.ndarray:
+        """Blok odległości z punktów `coords_a` do `coords_b` (dostawca lub metryka)"""
+        if self.distance_provider is not None:
+            return self.distance_provider.block(coords_a, coords_b, dtype=dtype)
+        return DISTANCE_METRICS[self.distance_metric](coords_a, coords_b, dtype=dtype)
+
+    def _calculate_distance_matrix(self) -> DistanceMatrix:
         """Utworzenie macierzy odległości między miastami"""
-        matrix = np.zeros((len(self.cities), len(self.cities)))
+        if isinstance(self.cities_data, ArrayMapping):
+            coords = np.asarray(self.cities_data.array, dtype=np.float64)
+        else:
+            coords = np.array([self.cities_data[city] for city in self.cities])
+        return build_distance_matrix(
+            coords,
+            self.distance_storage,
+            self.distance_metric,
+            self.distance_provider,
+            self.distance_chunk_size,
+            self.distance_neighbours,
+        )
 
-        for i, city1 in enumerate(self.cities):
-            for j, city2 in enumerate(self.cities):
-                matrix[i][j] = self._haversine_distance(
-                    self.cities_data[city1], self.cities_data[city2]
-                )
-        return matrix
+    def _encode(self, vehicle_routes: List[List[str]]) -> Individual:
+        """Zamiana nazw miast na ich indeksy"""
+        return [[self.city_index[city] for city in route] for route in vehicle_routes]
+
+    def _decode(self, individual: Individual) -> List[List[str]]:
+        """Zamiana indeksów miast z powrotem na nazwy"""
+        return [[self.cities[city] for city in route] for route in individual]
+
+    def _route_loads(self, individual: Individual) -> List[int]:
+        """Obciążenie każdego pojazdu"""
+        demands = self.demands
+        return [sum(demands[city] for city in route) for route in individual]
+
+    def _route_distance(self, route: List[int]) -> float:
+        """Długość pojedynczej trasy, włączając wyjazd i powrót do bazy"""
+        matrix = self.distance_matrix
+        current = self.depot_index
+        distance = 0.0
+
+        for city in route:
+            distance += matrix[current, city]
+            current = city
+
+        return distance + matrix[current, self.depot_index]
+
+    def _individual_distance(self, individual: Individual) -> float:
+        """Całkowita długość tras osobnika"""
+        return sum(self._route_distance(route) for route in individual)
+
+    def _is_feasible(self, individual: Individual, loads: List[int]) -> bool:
+        """Sprawdzenie osobnika; operatory nigdy nie duplikują miast, więc wystarczy liczba"""
+        if sum(len(route) for route in individual) != len(self.customers):
+            return False
+        if not all(load <= self.vehicle_capacity for load in loads):
+            return False
+        return not self.time_constrained or all(
+            route_times_feasible(self, route) for route in individual
+        )
 
     def _validate_solution(self, vehicle_routes: List[List[str]]) -> bool:
         """Sprawdzenie poprawności rozwiązania"""
         # Sprawdzenie, czy wszystkie miasta są obsłużone
         served_cities = set(itertools.chain(*vehicle_routes))
-        if (
-            len(served_cities) != len(self.cities) - 1
-        ):  # -1 bo Kraków jako punkt startowy
+        if len(served_cities) != len(self.customers):  # bez bazy
             return False
 
         # Sprawdzenie ładowności i zapotrzebowania każdego pojazdu
-        for route in vehicle_routes:
-            route_demand = sum(self.city_demands[city] for city in route)
-            if route_demand > self.vehicle_capacity:
-                return False
+        individual = self._encode(vehicle_routes)
+        loads = self._route_loads(individual)
+        if not all(load <= self.vehicle_capacity for load in loads):
+            return False
 
-        return True
+        # Okna czasowe i limit czasu tras
+        return not self.time_constrained or all(
+            route_times_feasible(self, route) for route in individual
+        )
 
     def _calculate_total_distance(self, vehicle_routes: List[List[str]]) -> float:
-        """Obliczenie całkowitej długości tras, włączając powrót do Krakowa"""
-        total_distance = 0
-        for route in vehicle_routes:
-            route_distance = 0
-            current_city = "Kraków"
+        """Obliczenie całkowitej długości tras, włączając powrót do bazy"""
+        return self._individual_distance(self._encode(vehicle_routes))
 
-            for city in route:
-                city_index = self.cities.index(city)
-                current_index = self.cities.index(current_city)
-                route_distance += self.distance_matrix[current_index][city_index]
-                current_city = city
+    def solution(self, vehicle_routes: List[List[str]]) -> Solution:
+        """Trasy wraz z dystansami odcinków i obciążeniami pojazdów"""
+        matrix = self.distance_matrix
+        legs = []
+        for route in self._encode(vehicle_routes):
+            stops = np.array([self.depot_index] + route + [self.depot_index])
+            legs.append(np.asarray(matrix[stops[:-1], stops[1:]], dtype=float).tolist())
 
-            # Dodanie odległości powrotu do Krakowa
-            city_index = self.cities.index("Kraków")
-            current_index = self.cities.index(current_city)
-            route_distance += self.distance_matrix[current_index][city_index]
+        stops = set(itertools.chain([self.depot], *vehicle_routes))
+        return Solution(
+            vehicle_routes,
+            legs,
+            {city: self.demands[self.city_index[city]] for city in stops},
+            {city: self.cities_data[city] for city in stops},
+            self.depot,
+            self._validate_solution(vehicle_routes),
+        )
 
-            total_distance += route_distance
+    def _fitness(self, individual: Individual) -> float:
+        """Ocena rozwiązania"""
+        if not self._is_feasible(individual, self._route_loads(individual)):
+            return float("-inf")
 
-        return total_distance
+        return -self._individual_distance(individual)
 
-    def genetic_algorithm(
+    def _objectives(self, individual: Individual) -> Tuple[float, int, float]:
+        """Długość tras (nieskończona, gdy pominięto miasta), nadmiar ładunku ponad
+        ładowność pojazdów i łączne spóźnienie - składniki oceny z karami"""
+        distance = float("inf")
+        if sum(len(route) for route in individual) == len(self.customers):
+            distance = self._individual_distance(individual)
+        excess = sum(
+            max(load - self.vehicle_capacity, 0)
+            for load in self._route_loads(individual)
+        )
+        lateness = 0.0
+        if self.time_constrained:
+            lateness = sum(route_lateness(self, route) for route in individual)
+        return distance, excess, lateness
+
+    def _penalized_score(
+        self, individual: Individual, weights: Optional[List[float]] = None
+    ) -> float:
+        """Przystosowanie z karami (jak w _score_population) przy wagach `weights`,
+        domyślnie bieżących - do porównań z populacją ocenioną przy tych wagach"""
+        if self.constraint_handling != "penalty":
+            return self._fitness(individual)
+        load_weight, time_weight = weights or self.penalty_weights
+        distance, excess, lateness = self._objectives(individual)
+        return -(distance + load_weight * excess + time_weight * lateness)
+
+    def _improved_best(
         self,
-        population_size: int = 200,
-        generations: int = 300,
-        mutation_rate: float = 0.1,
-    ) -> List[List[str]]:
-        """Algorytm genetyczny dla VRP"""
-        cities_to_serve = [city for city in self.cities if city != "Kraków"]
+        population: List[Individual],
+        scores: List[float],
+        objectives: List[float],
+        best_individual: Optional[Individual],
+        best_score: float,
+        weights: Optional[List[float]] = None,
+    ) -> Optional[int]:
+        """Indeks osobnika populacji lepszego od najlepszego rozwiązania przebiegu
+        (`best_individual` z oceną `best_score`) lub None, gdy takiego nie ma.
 
-        def create_individual():
-            """Losowe utworzenie rozwiązania z zachowaniem ładowności"""
-            individual = [[] for _ in range(self.num_vehicles)]
-            random.shuffle(cities_to_serve)
+        Rozwiązanie dopuszczalne wygrywa dystansem, a bez rozwiązań dopuszczalnych
+        porównywane jest przystosowanie z karami przy wagach `weights`, z jakimi
+        oceniono populację (zapamiętana ocena mogła mieć inne wagi).
+        """
+        candidate = max(
+            range(len(population)), key=lambda i: (objectives[i], scores[i])
+        )
+        if best_individual is None:
+            return candidate
+        if max(objectives[candidate], best_score) > float("-inf"):
+            improved = objectives[candidate] > best_score
+        else:
+            improved = scores[candidate] > self._penalized_score(
+                best_individual, weights
+            )
+        return candidate if improved else None
+
+    def _least_loaded_vehicle(self, loads: List[int]) -> int:
+        """Pojazd z najmniejszym aktualnym obciążeniem.
+
+        Jeśli miasto nie mieści się w najmniej obciążonym pojeździe, nie zmieści się
+        w żadnym, więc ten sam wybór obsługuje przypadek przeładowania.
+        """
+        return loads.index(min(loads))
+
+    def _feasible_position(self, schedule: RouteSchedule, city: int) -> Optional[int]:
+        """Pierwsza (od końca trasy) pozycja, na której miasto mieści się w czasie"""
+        for position in range(len(schedule.nodes) - 2, -1, -1):
+            if schedule.can_insert(city, position):
+                return position
+        return None
+
+    def _insert_timed(
+        self,
+        individual: Individual,
+        loads: List[int],
+        schedules: List[RouteSchedule],
+        city: int,
+    ) -> bool:
+        """Wstawienie miasta z zachowaniem ładowności i okien czasowych.
+
+        Pojazdy sprawdzane są od najmniej obciążonego. Jeśli miasto nie mieści się
+        nigdzie, trafia na koniec trasy najmniej obciążonego pojazdu (wynik False).
+        """
+        demand = self.demands[city]
+        for vehicle in sorted(range(self.num_vehicles), key=loads.__getitem__):
+            if loads[vehicle] + demand > self.vehicle_capacity:
+                break
+            position = self._feasible_position(schedules[vehicle], city)
+            if position is not None:
+                individual[vehicle].insert(position, city)
+                loads[vehicle] += demand
+                schedules[vehicle] = RouteSchedule(self, individual[vehicle])
+                return True
+
+        vehicle = self._least_loaded_vehicle(loads)
+        individual[vehicle].append(city)
+        loads[vehicle] += demand
+        schedules[vehicle] = RouteSchedule(self, individual[vehicle])
+        return False
 
+    def _create_individual(self, rng: random.Random) -> Tuple[Individual, List[int]]:
+        """Losowe utworzenie rozwiązania z zachowaniem ładowności"""
+        individual = [[] for _ in range(self.num_vehicles)]
+        loads = [0] * self.num_vehicles
+        demands = self.demands
+
+        cities_to_serve = list(self.customers)
+        rng.shuffle(cities_to_serve)
+
+        if self.encoding == "giant_tour" and self._kernels is not None:
+            return self._kernels.split_tour(cities_to_serve)
+        if self.encoding == "giant_tour":
+            return split_tour(self, cities_to_serve)
+
+        if self.time_constrained:
+            schedules = [RouteSchedule(self, route) for route in individual]
             for city in cities_to_serve:
-                # Znajdź pojazd z najmniejszym aktualnym zapotrzebowaniem,
-                # który może przyjąć miasto
-                valid_vehicles = [
-                    i
-                    for i in range(self.num_vehicles)
-                    if sum(self.city_demands[c] for c in individual[i])
-                    + self.city_demands[city]
-                    <= self.vehicle_capacity
-                ]
-
-                if valid_vehicles:
-                    # Wybierz pojazd z najmniejszym aktualnym zapotrzebowaniem
-                    vehicle_index = min(
-                        valid_vehicles,
-                        key=lambda i: sum(self.city_demands[c] for c in individual[i]),
-                    )
-                    individual[vehicle_index].append(city)
-                else:
-                    # Jeśli żaden pojazd nie może przyjąć miasta,
-                    # znajdź pojazd z najmniejszym aktualnym zapotrzebowaniem
-                    vehicle_index = min(
-                        range(self.num_vehicles),
-                        key=lambda i: sum(self.city_demands[c] for c in individual[i]),
-                    )
-                    individual[vehicle_index].append(city)
-
-            return individual
-
-        def fitness(solution):
-            """Ocena rozwiązania"""
-            if not self._validate_solution(solution):
-                return float("-inf")
-
-            return -self._calculate_total_distance(solution)
-
-        def crossover(parent1, parent2):
-            """Krzyżowanie dwóch rodziców z zachowaniem ładowności"""
-            child = [[] for _ in range(self.num_vehicles)]
-
-            # Lista miast do przypisania
-            unassigned_cities = list(cities_to_serve)
-
-            # Próba skopiowania części tras z rodziców
-            for i in range(self.num_vehicles):
-                # Losowy wybór trasy z jednego z rodziców
-                parent_route = parent1[i] if random.random() < 0.5 else parent2[i]
-
-                # Sprawdzenie, które miasta można dodać do trasy
-                for city in parent_route:
-                    if city in unassigned_cities:
-                        # Sprawdzenie ładowności
-                        current_demand = sum(self.city_demands[c] for c in child[i])
-                        if (
-                            current_demand + self.city_demands[city]
-                            <= self.vehicle_capacity
-                        ):
-                            child[i].append(city)
-                            unassigned_cities.remove(city)
-
-            # Przypisanie pozostałych miast
-            while unassigned_cities:
-                city = unassigned_cities.pop(0)
-
-                # Znajdź trasę z najmniejszym obciążeniem, która może przyjąć miasto
-                valid_vehicles = [
-                    i
-                    for i in range(self.num_vehicles)
-                    if sum(self.city_demands[c] for c in child[i])
-                    + self.city_demands[city]
-                    <= self.vehicle_capacity
-                ]
-
-                if valid_vehicles:
-                    # Wybierz pojazd z najmniejszym aktualnym zapotrzebowaniem
-                    vehicle_index = min(
-                        valid_vehicles,
-                        key=lambda i: sum(self.city_demands[c] for c in child[i]),
-                    )
-                else:
-                    # Jeśli żaden pojazd nie może przyjąć miasta,
-                    # znajdź pojazd z najmniejszym aktualnym zapotrzebowaniem
-                    vehicle_index = min(
-                        range(self.num_vehicles),
-                        key=lambda i: sum(self.city_demands[c] for c in child[i]),
+                self._insert_timed(individual, loads, schedules, city)
+            return individual, loads
+
+        for city in cities_to_serve:
+            vehicle_index = self._least_loaded_vehicle(loads)
+            individual[vehicle_index].append(city)
+            loads[vehicle_index] += demands[city]
+
+        return individual, loads
+
+    def _crossover(
+        self, parent1: Individual, parent2: Individual, rng: random.Random
+    ) -> Tuple[Individual, List[int]]:
+        """Krzyżowanie dwóch rodziców z zachowaniem ładowności"""
+        if self.encoding == "giant_tour":
+            tour1, tour2 = giant_tour(parent1), giant_tour(parent2)
+            # Niepełne rozwiązania (np. z initial_population) krzyżowane są po trasach
+            if len(tour1) == len(tour2) == len(self.customers):
+                if self._kernels is not None:
+                    kernels = self._kernels
+                    return kernels.split_tour(
+                        kernels.order_crossover(tour1, tour2, rng)
                     )
+                return split_tour(
+                    self, order_crossover(tour1, tour2, rng, len(self.cities))
+                )
+
+        if self._kernels is not None and not self.time_constrained:
+            child, loads, repaired, overloaded = self._kernels.route_crossover(
+                parent1, parent2, rng
+            )
+            if self.profiler is not None:
+                self.profiler.count("crossover_repairs", repaired)
+                self.profiler.count("overloaded_assignments", overloaded)
+            return child, loads
 
+        child = [[] for _ in range(self.num_vehicles)]
+        loads = [0] * self.num_vehicles
+        assigned = [False] * len(self.cities)
+        demands = self.demands
+        capacity = self.vehicle_capacity
+        # Przy oknach czasowych: czas wyjazdu z ostatniego miasta każdej trasy
+        departures = [self.route_start] * self.num_vehicles
+        timed = self.time_constrained
+
+        # Próba skopiowania części tras z rodziców
+        for i in range(self.num_vehicles):
+            # Losowy wybór trasy z jednego z rodziców
+            parent_route = parent1[i] if rng.random() < 0.5 else parent2[i]
+
+            for city in parent_route:
+                if not assigned[city] and loads[i] + demands[city] <= capacity:
+                    if timed:
+                        previous = child[i][-1] if child[i] else self.depot_index
+                        departure = append_departure(
+                            self, departures[i], previous, city
+                        )
+                        if departure is None:
+                            continue
+                        departures[i] = departure
+                    child[i].append(city)
+                    loads[i] += demands[city]
+                    assigned[city] = True
+
+        # Przypisanie pozostałych miast do najmniej obciążonych pojazdów
+        repaired = overloaded = 0
+        if timed:
+            schedules = [RouteSchedule(self, route) for route in child]
+        for city in self.customers:
+            if not assigned[city] and timed:
+                overloaded += not self._insert_timed(child, loads, schedules, city)
+                repaired += 1
+            elif not assigned[city]:
+                vehicle_index = self._least_loaded_vehicle(loads)
                 child[vehicle_index].append(city)
+                loads[vehicle_index] += demands[city]
+                repaired += 1
+                overloaded += loads[vehicle_index] > capacity
+
+        if self.profiler is not None:
+            self.profiler.count("crossover_repairs", repaired)
+            self.profiler.count("overloaded_assignments", overloaded)
+
+        return child, loads
+
+    def _mutate(self, child: Individual, loads: List[int], rng: random.Random) -> None:
+        """Mutacja z zachowaniem ładowności: przeniesienie miasta do innego pojazdu"""
+        vehicle1, vehicle2 = rng.sample(range(self.num_vehicles), 2)
+        if not (child[vehicle1] and child[vehicle2]):
+            return
+
+        if self.time_constrained:
+            source = RouteSchedule(self, child[vehicle1])
+            target = RouteSchedule(self, child[vehicle2])
+
+        # Znajdź miasto, które można przenieść
+        for _ in range(len(child[vehicle1])):
+            city_index = rng.randint(0, len(child[vehicle1]) - 1)
+            city = child[vehicle1][city_index]
+
+            if loads[vehicle2] + self.demands[city] <= self.vehicle_capacity:
+                position = len(child[vehicle2])
+                if self.time_constrained:
+                    # Usunięcie i wstawienie sprawdzane w czasie stałym z luzów tras
+                    position = self._feasible_position(target, city)
+                    if position is None or not source.can_replace(
+                        city_index, city_index, ()
+                    ):
+                        continue
+                child[vehicle1].pop(city_index)
+                child[vehicle2].insert(position, city)
+                loads[vehicle1] -= self.demands[city]
+                loads[vehicle2] += self.demands[city]
+                break
+        else:
+            if self.profiler is not None:
+                self.profiler.count("mutation_failures")
+
+    def _score_population(
+        self, population: List[Individual], adapt_penalties: bool = False
+    ) -> Tuple[List[float], List[float]]:
+        """Jednokrotna ocena każdego osobnika populacji.
+
+        Zwraca przystosowanie używane w selekcji oraz ocenę rozwiązań (minus dystans
+        rozwiązań dopuszczalnych, -inf dla pozostałych). Przy obsłudze ograniczeń
+        karami przystosowanie to minus dystans powiększony o ważony nadmiar ładunku
+        i spóźnienie; `adapt_penalties` dostosowuje najpierw wagi do populacji.
+        """
+        started = self.profiler.now() if self.profiler is not None else 0.0
+        cache = self.fitness_cache
+        values: List[Optional[Tuple[float, int, float]]] = [None] * len(population)
+        keys: List[Optional[bytes]] = [None] * len(population)
+
+        if cache is not None:
+            for i, individual in enumerate(population):
+                keys[i] = cache.key(individual)
+                values[i] = cache.get(keys[i])
+
+        pending = [i for i, value in enumerate(values) if value is None]
+        if self.batch_evaluation and len(pending) >= MIN_BATCH_SIZE:
+            if self._population_evaluator is None:
+                self._population_evaluator = PopulationEvaluator(self)
+            columns = self._population_evaluator.objectives(
+                [population[i] for i in pending]
+            )
+            computed = list(zip(*(column.tolist() for column in columns)))
+        else:
+            computed = [self._objectives(population[i]) for i in pending]
+
+        self.fitness_evaluations += len(pending)
+        for i, value in zip(pending, computed):
+            values[i] = value
+            if cache is not None:
+                cache.put(keys[i], value)
+
+        # Pamięć podręczna przechowuje składniki oceny, bo wagi kar się zmieniają
+        distances, excess, lateness = (
+            np.array(values, dtype=np.float64).reshape(-1, 3).T
+        )
+        capacity_ok = excess == 0
+        on_time = lateness == 0
+        objectives = np.where(capacity_ok & on_time, -distances, -np.inf).tolist()
+        if self.constraint_handling == "penalty":
+            if adapt_penalties:
+                self._adapt_penalties(capacity_ok, on_time)
+            load_weight, time_weight = self.penalty_weights
+            scores = (
+                -(distances + load_weight * excess + time_weight * lateness)
+            ).tolist()
+        else:
+            scores = list(objectives)
+
+        if self.profiler is not None:
+            self.profiler.lap("evaluation", started)
+            self.profiler.count("fitness_evaluations", len(pending))
+        return scores, objectives
+
+    def _initial_penalty_weights(self) -> List[float]:
+        """Początkowe wagi kar: za jednostkę nadmiaru ładunku - najdalszy dojazd z bazy
+        na największe zapotrzebowanie, za jednostkę spóźnienia - droga przejechana
+        w tym czasie"""
+        reach = float(np.max(self.distance_matrix[self.depot_index]))
+        return [reach / max(max(self.demands), 1), self.travel_speed]
+
+    def _adapt_penalties(self, capacity_ok: np.ndarray, on_time: np.ndarray) -> None:
+        """Dostosowanie wag kar do udziału osobników spełniających ograniczenia.
+
+        Waga rośnie, gdy ograniczenie spełnia mniej niż `penalty_target` populacji,
+        i maleje, gdy spełnia je wyraźnie więcej - populacja pozostaje blisko granicy
+        obszaru dopuszczalnego, gdzie zwykle leżą najlepsze rozwiązania.
+        """
+        constraints = [capacity_ok, on_time] if self.time_constrained else [capacity_ok]
+        for k, satisfied in enumerate(constraints):
+            ratio = float(satisfied.mean())
+            weight = self.penalty_weights[k]
+            if ratio < self.penalty_target - PENALTY_TOLERANCE:
+                weight *= PENALTY_INCREASE
+            elif ratio > self.penalty_target + PENALTY_TOLERANCE:
+                weight *= PENALTY_DECREASE
+            initial = self._initial_penalties[k]
+            self.penalty_weights[k] = min(
+                max(weight, initial / PENALTY_RANGE), initial * PENALTY_RANGE
+            )
+
+    def fitness_stats(self) -> Dict[str, int]:
+        """Liczba ocen funkcji przystosowania i trafień w pamięci podręcznej"""
+        cache = self.fitness_cache
+        return {
+            "evaluations": self.fitness_evaluations,
+            "cache_hits": cache.hits if cache is not None else 0,
+            "cache_misses": cache.misses if cache is not None else 0,
+        }
+
+    def _start_run(
+        self,
+        fitness_cache_size: int = 0,
+        batch_evaluation: bool = True,
+        local_search: Optional[str] = None,
+        local_search_rate: float = 0.1,
+        local_search_neighbours: int = 10,
+        profiler=None,
+        selection: str = "tournament",
+        tournament_size: int = 3,
+        elite_fraction: float = 0.02,
+        constraint_handling: str = "penalty",
+        penalty_target: float = 0.2,
+        repair_rate: float = 0.5,
+        encoding: str = "routes",
+    ) -> None:
+        """Przygotowanie ustawień i wyzerowanie statystyk przed uruchomieniem"""
+        if selection not in SELECTION_METHODS:
+            raise ValueError(f"Nieznana metoda selekcji: {selection}")
+        if not 0 <= elite_fraction < 1:
+            raise ValueError("Udział elity musi należeć do przedziału [0, 1).")
+        if constraint_handling not in CONSTRAINT_HANDLING_MODES:
+            raise ValueError(f"Nieznana obsługa ograniczeń: {constraint_handling}")
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Nieznane kodowanie osobników: {encoding}")
+        if encoding == "giant_tour" and self.time_constrained:
+            raise ValueError("Kodowanie giant_tour nie obsługuje ograniczeń czasowych.")
+        if not 0 <= penalty_target <= 1 or not 0 <= repair_rate <= 1:
+            raise ValueError(
+                "Udział docelowy kar i prawdopodobieństwo naprawy muszą należeć "
+                "do przedziału [0, 1]."
+            )
+        self.selection = selection
+        self.tournament_size = tournament_size
+        self.elite_fraction = elite_fraction
+        self.constraint_handling = constraint_handling
+        self.penalty_target = penalty_target
+        self._initial_penalties = self._initial_penalty_weights()
+        self.penalty_weights = list(self._initial_penalties)
+        self.repair_rate = repair_rate
+        self.encoding = encoding
+        if repair_rate > 0 and self._repair is None:
+            # Import lokalny - moduł naprawy zależy od tego modułu
+            from vehicle_routing_repair import repair_routes
+
+            self._repair = repair_routes
+        self.profiler = profiler
+        self.fitness_evaluations = 0
+        self.batch_evaluation = batch_evaluation
+        self.fitness_cache = (
+            FitnessCache(fitness_cache_size) if fitness_cache_size > 0 else None
+        )
 
-            return child
+        if local_search not in LOCAL_SEARCH_MODES:
+            raise ValueError(f"Nieznany tryb przeszukiwania lokalnego: {local_search}")
+        self.local_search_mode = local_search
+        self.local_search_rate = local_search_rate
+        if local_search is not None and (
+            self._local_search is None
+            or len(self._local_search.neighbours[0]) != local_search_neighbours
+        ):
+            # Import lokalny - moduł przeszukiwania zależy od tego modułu
+            from vehicle_routing_local_search import LocalSearch
 
-        # Inicjalizacja populacji
-        population = [create_individual() for _ in range(population_size)]
+            self._local_search = LocalSearch(self, neighbours=local_search_neighbours)
 
+    def _next_generation(
+        self,
+        population: List[Individual],
+        scores: List[float],
+        objectives: List[float],
+        rng: random.Random,
+        mutation_rate: float,
+        new_population: Optional[List[Individual]] = None,
+    ) -> List[Individual]:
+        """Utworzenie kolejnej generacji z ocenionej populacji.
+
+        Generacja zapisywana jest w `new_population` (bufor z poprzedniej generacji),
+        a bez niego w nowej liście.
+        """
+        size = len(population)
+        if new_population is None or len(new_population) != size:
+            new_population = [None] * size
+        profiler = self.profiler
+        started = profiler.now() if profiler is not None else 0.0
+
+        # Generator NumPy wyprowadzony z `rng`, więc cały stan losowy przebiegu
+        # (ziarno, punkty kontrolne, wyspy) pozostaje w jednym obiekcie
+        generator = np.random.default_rng(rng.getrandbits(64))
+        fitness = np.asarray(scores, dtype=np.float64)
+
+        # Elita (najpierw rozwiązania dopuszczalne) przechodzi bez zmian, pozostałe
+        # miejsca zajmują potomkowie
+        elites = elite_indices(
+            fitness,
+            elite_count(size, self.elite_fraction),
+            np.isfinite(np.asarray(objectives, dtype=np.float64)),
+        )
+        for slot, index in enumerate(elites.tolist()):
+            new_population[slot] = population[index]
+
+        # Selekcja rodziców wszystkich potomków naraz
+        parents = SELECTION_METHODS[self.selection](
+            fitness, 2 * (size - len(elites)), generator, self.tournament_size
+        ).tolist()
+        if profiler is not None:
+            profiler.lap("selection", started)
+
+        for slot in range(len(elites), size):
+            if profiler is not None:
+                started = profiler.now()
+            pair = 2 * (slot - len(elites))
+            parent1 = population[parents[pair]]
+            parent2 = population[parents[pair + 1]]
+
+            # Krzyżowanie rodziców
+            child, loads = self._crossover(parent1, parent2, rng)
+            if profiler is not None:
+                started = profiler.lap("crossover", started)
+
+            # Mutacja z zachowaniem ładowności
+            if rng.random() < mutation_rate and self.num_vehicles > 1:
+                self._mutate(child, loads, rng)
+                if profiler is not None:
+                    started = profiler.lap("mutation", started)
+
+            # Opcjonalna naprawa niedopuszczalnego potomka
+            if (
+                self.repair_rate > 0
+                and not self._is_feasible(child, loads)
+                and rng.random() < self.repair_rate
+            ):
+                self._repair(self, child, loads)
+                if profiler is not None:
+                    started = profiler.lap("repair", started)
+                    profiler.count("repairs")
+
+            # Opcjonalna poprawa potomka przeszukiwaniem lokalnym
+            if (
+                self.local_search_mode == "offspring"
+                and rng.random() < self.local_search_rate
+            ):
+                child = self._local_search.improve(child, rng)
+                if profiler is not None:
+                    profiler.lap("local_search", started)
+
+            new_population[slot] = child
+
+        return new_population
+
+    def _improve_best(
+        self,
+        population: List[Individual],
+        scores: List[float],
+        objectives: List[float],
+        rng: random.Random,
+    ) -> None:
+        """Poprawa najlepszego osobnika populacji przeszukiwaniem lokalnym"""
+        started = self.profiler.now() if self.profiler is not None else 0.0
+        best_index = max(range(len(population)), key=scores.__getitem__)
+        improved = self._local_search.improve(population[best_index], rng)
+        population[best_index] = improved
+        if self.profiler is not None:
+            self.profiler.lap("local_search", started)
+        improved_scores, improved_objectives = self._score_population([improved])
+        scores[best_index] = improved_scores[0]
+        objectives[best_index] = improved_objectives[0]
+
+    def _evolve(
+        self,
+        population: List[Individual],
+        generations: int,
+        rng: random.Random,
+        mutation_rate: float,
+    ) -> List[Individual]:
+        """Przeprowadzenie zadanej liczby generacji"""
+        spare = None
         for generation in range(generations):
-            new_population = []
+            # Ocena populacji raz na generację
+            scores, objectives = self._score_population(population, True)
+            if self.local_search_mode == "elites":
+                self._improve_best(population, scores, objectives, rng)
+            population, spare = (
+                self._next_generation(
+                    population, scores, objectives, rng, mutation_rate, spare
+                ),
+                population,
+            )
+
+        return population
+
+    def genetic_algorithm(
+        self,
+        population_size: int = 200,
+        generations: int = 300,
+        mutation_rate: float = 0.1,
+        **options,
+    ) -> Solution:
+        """Algorytm genetyczny dla VRP.
+
+        Uruchamia genetic_algorithm_steps do końca i zwraca najlepsze znalezione trasy
+        (Solution - lista tras z dystansami i obciążeniami); dodatkowe argumenty
+        opisane są w genetic_algorithm_steps. Gdy nie znaleziono rozwiązania
+        dopuszczalnego, zwracane jest najmniej karane z `feasible` równym False.
+        """
+        stats = None
+        for stats in self.genetic_algorithm_steps(
+            population_size, generations, mutation_rate, **options
+        ):
+            pass
+        return self.solution(stats.best_routes)
+
+    def genetic_algorithm_steps(
+        self,
+        population_size: int = 200,
+        generations: int = 300,
+        mutation_rate: float = 0.1,
+        fitness_cache_size: int = 0,
+        batch_evaluation: bool = True,
+        seed: Optional[int] = None,
+        local_search: Optional[str] = None,
+        local_search_rate: float = 0.1,
+        local_search_neighbours: int = 10,
+        time_limit: Optional[float] = None,
+        max_stagnation: Optional[int] = None,
+        target_distance: Optional[float] = None,
+        on_improvement: Optional[ImprovementCallback] = None,
+        profiler=None,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_interval: int = 10,
+        initial_population: Optional[List[List[List[str]]]] = None,
+        selection: str = "tournament",
+        tournament_size: int = 3,
+        elite_fraction: float = 0.02,
+        constraint_handling: str = "penalty",
+        penalty_target: float = 0.2,
+        repair_rate: float = 0.5,
+        encoding: str = "routes",
+        _resume: Optional[dict] = None,
+    ) -> Iterator[GenerationStats]:
+        """Algorytm genetyczny jako generator statystyk kolejnych generacji.
+
+        `local_search` włącza przeszukiwanie lokalne: "offspring" poprawia część
+        potomków (z prawdopodobieństwem `local_search_rate`), "elites" - najlepszego
+        osobnika każdej generacji.
+
+        Oprócz limitu `generations` obliczenia kończą się po `time_limit` sekundach,
+        po `max_stagnation` generacjach bez poprawy lub po osiągnięciu dystansu
+        `target_distance`. Przerwanie iteracji zatrzymuje obliczenia, a ostatnie
+        statystyki zawierają najlepsze rozwiązanie z całego przebiegu; każda jego
+        poprawa przekazywana jest też do `on_improvement`.
 
-            for _ in range(population_size):
-                # Selekcja turniejowa
-                parent1 = max(
-                    random.sample(population, min(3, len(population))), key=fitness
+        `profiler` (vehicle_routing_profiling.Profiler) zbiera czasy faz, liczniki
+        zdarzeń i statystyki każdej generacji.
+
+        Przy podanym `checkpoint_path` co `checkpoint_interval` generacji pełny stan
+        algorytmu zapisywany jest w tle do pliku .npz; obliczenia można wznowić
+        metodą resume_genetic_algorithm_steps.
+
+        `initial_population` (lista rozwiązań w postaci tras) zastępuje część losowej
+        populacji początkowej, np. poprzednim planem przy ponownej optymalizacji.
+
+        `selection` wybiera metodę selekcji rodziców: "tournament" (turnieje
+        `tournament_size` osobników), "rank" lub "sus" (stochastic universal
+        sampling). Część `elite_fraction` najlepszych osobników przechodzi do kolejnej
+        generacji bez zmian.
+
+        `constraint_handling` określa ocenę osobników przekraczających ładowność lub
+        okna czasowe: "discard" (-inf) albo "penalty" - dystans powiększony o nadmiar
+        ładunku i spóźnienie z wagami dostosowywanymi tak, by każde ograniczenie
+        spełniała część `penalty_target` populacji. Z prawdopodobieństwem
+        `repair_rate` niedopuszczalny potomek jest naprawiany (vehicle_routing_repair).
+        Zwracane jest najlepsze rozwiązanie dopuszczalne, a gdy żadnego nie
+        znaleziono - najmniej karane, z atrybutem `feasible` równym False.
+
+        `encoding="giant_tour"` traktuje osobnika jako jedną permutację miast (trasy
+        połączone kolejno): krzyżowanie OX, a podział permutacji na trasy wyznacza
+        optymalnie procedura Split (vehicle_routing_giant_tour). Tryb nie obsługuje
+        okien czasowych ani limitu czasu tras.
+        """
+        start_time = time.perf_counter()
+        # Ustawienia zapisywane w punkcie kontrolnym
+        options = {
+            "population_size": population_size,
+            "generations": generations,
+            "mutation_rate": mutation_rate,
+            "fitness_cache_size": fitness_cache_size,
+            "batch_evaluation": batch_evaluation,
+            "seed": seed,
+            "local_search": local_search,
+            "local_search_rate": local_search_rate,
+            "local_search_neighbours": local_search_neighbours,
+            "time_limit": time_limit,
+            "max_stagnation": max_stagnation,
+            "target_distance": target_distance,
+            "checkpoint_interval": checkpoint_interval,
+            "selection": selection,
+            "tournament_size": tournament_size,
+            "elite_fraction": elite_fraction,
+            "constraint_handling": constraint_handling,
+            "penalty_target": penalty_target,
+            "repair_rate": repair_rate,
+            "encoding": encoding,
+        }
+        self._start_run(
+            fitness_cache_size,
+            batch_evaluation,
+            local_search,
+            local_search_rate,
+            local_search_neighbours,
+            profiler,
+            selection,
+            tournament_size,
+            elite_fraction,
+            constraint_handling,
+            penalty_target,
+            repair_rate,
+            encoding,
+        )
+        best_individual: Optional[Individual] = None
+        best_routes: List[List[str]] = []
+        best_score = float("-inf")
+        stagnation = 0
+        generation = 0
+
+        if _resume is None:
+            # Bez ziarna używany jest globalny generator modułu random
+            rng = random.Random(seed) if seed is not None else random
+
+            # Inicjalizacja populacji (osobniki przechowują indeksy miast)
+            started = profiler.now() if profiler is not None else 0.0
+            population = [
+                self._encode(routes)[: self.num_vehicles]
+                for routes in (initial_population or [])[:population_size]
+            ]
+            for individual in population:
+                individual.extend(
+                    [] for _ in range(self.num_vehicles - len(individual))
                 )
-                parent2 = max(
-                    random.sample(population, min(3, len(population))), key=fitness
+            population.extend(
+                self._create_individual(rng)[0]
+                for _ in range(population_size - len(population))
+            )
+            if profiler is not None:
+                profiler.lap("create_individual", started)
+        else:
+            # Kontynuacja od stanu zapisanego w punkcie kontrolnym
+            rng = random.Random()
+            rng.setstate(_resume["rng_state"])
+            population = _resume["population"]
+            best_individual = _resume["best_individual"]
+            best_routes = self._decode(best_individual)
+            best_score = _resume["best_score"]
+            stagnation = _resume["stagnation"]
+            generation = _resume["generation"]
+            start_time -= _resume["elapsed"]
+            if _resume.get("penalty_weights") is not None:
+                self.penalty_weights = list(_resume["penalty_weights"])
+
+        writer = None
+        if checkpoint_path is not None:
+            # Import lokalny - moduł punktów kontrolnych zależy od tego modułu
+            from vehicle_routing_checkpoint import CheckpointWriter
+
+            writer = CheckpointWriter(checkpoint_path)
+
+        try:
+            yield from self._run_generations(
+                population,
+                rng,
+                mutation_rate,
+                generations,
+                time_limit,
+                max_stagnation,
+                target_distance,
+                on_improvement,
+                start_time,
+                best_individual,
+                best_routes,
+                best_score,
+                stagnation,
+                generation,
+                writer,
+                checkpoint_interval,
+                options,
+            )
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def _checkpoint_fingerprint(self) -> dict:
+        """Cechy problemu, które muszą się zgadzać przy wznowieniu obliczeń"""
+        fingerprint = {
+            "cities": self.cities,
+            "num_vehicles": self.num_vehicles,
+            "vehicle_capacity": self.vehicle_capacity,
+            "depot": self.depot,
+        }
+        if self.time_constrained:
+            fingerprint["time_windows"] = [self.earliest, self.latest]
+            fingerprint["service_times"] = self.service_times
+            fingerprint["route_deadline"] = self.route_deadline
+        return fingerprint
+
+    def _run_generations(
+        self,
+        population: List[Individual],
+        rng: random.Random,
+        mutation_rate: float,
+        generations: int,
+        time_limit: Optional[float],
+        max_stagnation: Optional[int],
+        target_distance: Optional[float],
+        on_improvement: Optional[ImprovementCallback],
+        start_time: float,
+        best_individual: Optional[Individual],
+        best_routes: List[List[str]],
+        best_score: float,
+        stagnation: int,
+        generation: int,
+        writer,
+        checkpoint_interval: int,
+        options: dict,
+    ) -> Iterator[GenerationStats]:
+        """Główna pętla algorytmu genetycznego"""
+        profiler = self.profiler
+        # Dwa bufory populacji używane na zmianę
+        spare: Optional[List[Individual]] = None
+
+        while True:
+            # Ocena populacji raz na generację
+            scores, objectives = self._score_population(population, True)
+            if self.local_search_mode == "elites":
+                self._improve_best(population, scores, objectives, rng)
+
+            # Śledzenie najlepszego rozwiązania z całego przebiegu (dopuszczalnego, a bez
+            # takich - najmniej karanego)
+            generation_best = self._improved_best(
+                population, scores, objectives, best_individual, best_score
+            )
+            if generation_best is not None:
+                best_individual = [list(route) for route in population[generation_best]]
+                best_routes = self._decode(best_individual)
+                best_score = objectives[generation_best]
+                stagnation = 0
+                if on_improvement is not None and best_score > float("-inf"):
+                    on_improvement(best_routes, -best_score, generation)
+            else:
+                stagnation += 1
+
+            feasible = [-score for score in objectives if score > float("-inf")]
+            elapsed = time.perf_counter() - start_time
+            stats = GenerationStats(
+                generation=generation,
+                best_distance=-best_score,
+                mean_distance=(
+                    sum(feasible) / len(feasible) if feasible else float("inf")
+                ),
+                elapsed=elapsed,
+                improved=generation_best is not None,
+                best_routes=best_routes,
+            )
+            if profiler is not None:
+                if generation > 0:
+                    profiler.count("infeasible_children", len(scores) - len(feasible))
+                profiler.record_generation(
+                    generation=generation,
+                    best_distance=stats.best_distance,
+                    generation_best_distance=-objectives[generation_best],
+                    mean_distance=stats.mean_distance,
+                    worst_distance=max(feasible, default=float("inf")),
+                    feasible_ratio=len(feasible) / len(scores),
+                    elapsed=elapsed,
+                    fitness_evaluations=self.fitness_evaluations,
                 )
+            yield stats
+
+            if (
+                generation >= generations
+                or (time_limit is not None and elapsed >= time_limit)
+                or (max_stagnation is not None and stagnation >= max_stagnation)
+                or (target_distance is not None and -best_score <= target_distance)
+            ):
+                return
+
+            population, spare = (
+                self._next_generation(
+                    population, scores, objectives, rng, mutation_rate, spare
+                ),
+                population,
+            )
+            generation += 1
+
+            if writer is not None and generation % checkpoint_interval == 0:
+                writer.submit(
+                    {
+                        "population": list(population),
+                        "best_individual": best_individual,
+                        "best_score": best_score,
+                        "generation": generation,
+                        "stagnation": stagnation,
+                        "elapsed": time.perf_counter() - start_time,
+                        "rng_state": rng.getstate(),
+                        "penalty_weights": list(self.penalty_weights),
+                        "num_vehicles": self.num_vehicles,
+                        "problem": self._checkpoint_fingerprint(),
+                        "options": options,
+                    }
+                )
+
+    def resume_genetic_algorithm_steps(
+        self, checkpoint_path: str, **overrides
+    ) -> Iterator[GenerationStats]:
+        """Wznowienie obliczeń od punktu kontrolnego.
+
+        Ustawienia pochodzą z punktu kontrolnego (`overrides` pozwala zmienić np.
+        `generations` czy `time_limit`), a kolejne punkty kontrolne zapisywane są
+        domyślnie do tego samego pliku. Przy niezmienionych ustawieniach wynik jest
+        identyczny z wynikiem nieprzerwanego przebiegu.
+        """
+        from vehicle_routing_checkpoint import load_checkpoint
+
+        state = load_checkpoint(checkpoint_path)
+        if state["problem"] != self._checkpoint_fingerprint():
+            raise ValueError(
+                f"Punkt kontrolny {checkpoint_path} dotyczy innego problemu."
+            )
+
+        options = {**state["options"], "checkpoint_path": checkpoint_path}
+        options.update(overrides)
+        return self.genetic_algorithm_steps(**options, _resume=state)
 
-                # Krzyżowanie rodziców
-                child = crossover(parent1, parent2)
-
-                # Mutacja z zachowaniem ładowności
-                if random.random() < mutation_rate and self.num_vehicles > 1:
-                    vehicle1, vehicle2 = random.sample(range(self.num_vehicles), 2)
-                    if child[vehicle1] and child[vehicle2]:
-                        # Znajdź miasto, które można przenieść
-                        for _ in range(len(child[vehicle1])):
-                            city_index = random.randint(0, len(child[vehicle1]) - 1)
-                            city = child[vehicle1][city_index]
-
-                            # Sprawdź, czy można przenieść miasto
-                            current_demand_vehicle2 = sum(
-                                self.city_demands[c] for c in child[vehicle2]
-                            )
-                            if (
-                                current_demand_vehicle2 + self.city_demands[city]
-                                <= self.vehicle_capacity
-                            ):
-                                child[vehicle1].pop(city_index)
-                                child[vehicle2].append(city)
-                                break
-
-                new_population.append(child)
-
-            population = new_population
-
-        # Zwrócenie najlepszego rozwiązania
-        return max(population, key=fitness)
+    def resume_genetic_algorithm(self, checkpoint_path: str, **overrides) -> Solution:
+        """Wznowienie obliczeń od punktu kontrolnego i zwrócenie najlepszych tras"""
+        stats = None
+        for stats in self.resume_genetic_algorithm_steps(checkpoint_path, **overrides):
+            pass
+        return self.solution(stats.best_routes)
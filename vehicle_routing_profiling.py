@@ -0,0 +1,109 @@
+import json
+import math
+import time
+from collections import defaultdict
+from typing import IO, Any, Dict, List
+
+# Opisy metryk eksportowanych w formacie Prometheus
+PROMETHEUS_HELP = {
+    "vrp_phase_seconds_total": "Czas spędzony w fazie algorytmu genetycznego",
+    "vrp_phase_calls_total": "Liczba wykonań fazy algorytmu genetycznego",
+    "vrp_events_total": "Liczniki zdarzeń algorytmu genetycznego",
+    "vrp_generations_total": "Liczba zakończonych generacji",
+    "vrp_best_distance": "Najlepszy dotychczasowy dystans",
+}
+
+
+class Profiler:
+    """Liczniki i czasy faz algorytmu genetycznego.
+
+    Profiler włącza się, przekazując go do genetic_algorithm(profiler=...). Bez niego
+    pętla algorytmu wykonuje jedynie sprawdzenia `profiler is not None`.
+    """
+
+    def __init__(self):
+        self.phase_seconds: Dict[str, float] = defaultdict(float)
+        self.phase_calls: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.generations: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def now() -> float:
+        return time.perf_counter()
+
+    def lap(self, phase: str, started: float) -> float:
+        """Dodanie czasu od `started` do fazy; zwraca bieżący czas jako nowy początek"""
+        now = time.perf_counter()
+        self.phase_seconds[phase] += now - started
+        self.phase_calls[phase] += 1
+        return now
+
+    def count(self, event: str, amount: int = 1) -> None:
+        self.counters[event] += amount
+
+    def record_generation(self, **stats: Any) -> None:
+        # Nieskończoności (brak rozwiązania dopuszczalnego) nie mają zapisu w JSON
+        self.generations.append(
+            {
+                key: (
+                    None
+                    if isinstance(value, float) and not math.isfinite(value)
+                    else value
+                )
+                for key, value in stats.items()
+            }
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """Zestawienie czasów faz i liczników"""
+        return {
+            "phases": {
+                phase: {
+                    "seconds": self.phase_seconds[phase],
+                    "calls": self.phase_calls[phase],
+                }
+                for phase in sorted(self.phase_seconds)
+            },
+            "counters": dict(sorted(self.counters.items())),
+            "generations": len(self.generations),
+        }
+
+    def write_json_lines(self, file: IO[str]) -> None:
+        """Statystyki generacji i podsumowanie jako JSON Lines"""
+        for stats in self.generations:
+            file.write(json.dumps({"type": "generation", **stats}) + "\n")
+        file.write(json.dumps({"type": "summary", **self.summary()}) + "\n")
+
+    def to_prometheus(self) -> str:
+        """Metryki w formacie tekstowym Prometheus"""
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, samples: List[tuple]) -> None:
+            lines.append(f"# HELP {name} {PROMETHEUS_HELP[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{labels} {value}")
+
+        phases = sorted(self.phase_seconds)
+        metric(
+            "vrp_phase_seconds_total",
+            "counter",
+            [(f'{{phase="{p}"}}', self.phase_seconds[p]) for p in phases],
+        )
+        metric(
+            "vrp_phase_calls_total",
+            "counter",
+            [(f'{{phase="{p}"}}', self.phase_calls[p]) for p in phases],
+        )
+        metric(
+            "vrp_events_total",
+            "counter",
+            [(f'{{event="{e}"}}', v) for e, v in sorted(self.counters.items())],
+        )
+        metric("vrp_generations_total", "counter", [("", len(self.generations))])
+        if self.generations:
+            best = self.generations[-1].get("best_distance")
+            if best is not None:
+                metric("vrp_best_distance", "gauge", [("", best)])
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,115 @@
+from typing import List, Optional
+
+import numpy as np
+
+from vehicle_routing_optimization import Individual, VehicleRoutingProblem
+from vehicle_routing_time_windows import RouteSchedule
+
+
+def _insertion_costs(
+    problem: VehicleRoutingProblem, route: List[int], city: int
+) -> np.ndarray:
+    """Przyrost długości trasy po wstawieniu miasta na każdą z pozycji"""
+    matrix = problem.distance_matrix
+    previous = np.array([problem.depot_index] + route, dtype=np.int64)
+    following = np.array(route + [problem.depot_index], dtype=np.int64)
+    return (
+        matrix[previous, city] + matrix[city, following] - matrix[previous, following]
+    )
+
+
+def _removal_savings(problem: VehicleRoutingProblem, route: List[int]) -> np.ndarray:
+    """Skrócenie trasy po usunięciu każdego z jej miast"""
+    matrix = problem.distance_matrix
+    stops = np.array(route, dtype=np.int64)
+    previous = np.array([problem.depot_index] + route[:-1], dtype=np.int64)
+    following = np.array(route[1:] + [problem.depot_index], dtype=np.int64)
+    return (
+        matrix[previous, stops] + matrix[stops, following] - matrix[previous, following]
+    )
+
+
+def insert_cheapest(
+    problem: VehicleRoutingProblem,
+    individual: Individual,
+    loads: List[int],
+    cities: List[int],
+) -> None:
+    """Wstawienie miast kolejno w najtańsze miejsce tras, które mają wolną ładowność.
+
+    Miasto, które nie mieści się w żadnym pojeździe, trafia do najmniej obciążonego
+    (jak przy tworzeniu osobników), a algorytm genetyczny naprawia takie rozwiązanie.
+    Przy oknach czasowych pomijane są pozycje, które by je naruszyły (sprawdzenie
+    w czasie stałym z luzów harmonogramu trasy).
+    """
+    demands = problem.demands
+    capacity = problem.vehicle_capacity
+
+    for city in cities:
+        best_cost = float("inf")
+        best_vehicle: Optional[int] = None
+        best_position = 0
+        for vehicle, route in enumerate(individual):
+            if loads[vehicle] + demands[city] > capacity:
+                continue
+            costs = _insertion_costs(problem, route, city)
+            if problem.time_constrained:
+                mask = RouteSchedule(problem, route).insertion_mask(city)
+                costs = np.where(mask, costs, np.inf)
+            position = int(costs.argmin())
+            if costs[position] < best_cost:
+                best_cost = costs[position]
+                best_vehicle = vehicle
+                best_position = position
+
+        if best_vehicle is None:
+            best_vehicle = problem._least_loaded_vehicle(loads)
+            costs = _insertion_costs(problem, individual[best_vehicle], city)
+            best_position = int(costs.argmin())
+
+        individual[best_vehicle].insert(best_position, city)
+        loads[best_vehicle] += demands[city]
+
+
+def eject_violations(
+    problem: VehicleRoutingProblem, individual: Individual, loads: List[int]
+) -> List[int]:
+    """Usunięcie miast z tras przeładowanych lub spóźnionych; zwraca usunięte miasta.
+
+    Z przeładowanej trasy usuwane są miasta dające największe skrócenie trasy, a z
+    trasy naruszającej okna czasowe - takie miasto spośród przystanków do pierwszego
+    spóźnienia (usunięcie późniejszych go nie usunie).
+    """
+    ejected = []
+    for vehicle, route in enumerate(individual):
+        while loads[vehicle] > problem.vehicle_capacity:
+            position = int(_removal_savings(problem, route).argmax())
+            city = route.pop(position)
+            loads[vehicle] -= problem.demands[city]
+            ejected.append(city)
+
+        if not problem.time_constrained:
+            continue
+        schedule = RouteSchedule(problem, route)
+        while route and not schedule.feasible:
+            prefix = schedule.prefix_feasible
+            # Bez spóźnienia w mieście trasa przekracza tylko termin powrotu
+            late = len(route) if prefix[-1] else prefix.index(False)
+            position = int(_removal_savings(problem, route)[:late].argmax())
+            city = route.pop(position)
+            loads[vehicle] -= problem.demands[city]
+            ejected.append(city)
+            schedule = RouteSchedule(problem, route)
+
+    return ejected
+
+
+def repair_routes(
+    problem: VehicleRoutingProblem, individual: Individual, loads: List[int]
+) -> None:
+    """Naprawa osobnika: wyrzucenie miast naruszających ograniczenia i ponowne
+    wstawienie ich w najtańsze dopuszczalne miejsca (od największego zapotrzebowania)
+    """
+    ejected = eject_violations(problem, individual, loads)
+    ejected.sort(key=problem.demands.__getitem__, reverse=True)
+    insert_cheapest(problem, individual, loads, ejected)
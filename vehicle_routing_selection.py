@@ -0,0 +1,78 @@
+from math import ceil
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+SelectionMethod = Callable[[np.ndarray, int, np.random.Generator, int], np.ndarray]
+
+
+def tournament_selection(
+    scores: np.ndarray, count: int, rng: np.random.Generator, size: int = 3
+) -> np.ndarray:
+    """Selekcja turniejowa - wszystkie turnieje generacji losowane jedną tablicą"""
+    contestants = rng.integers(0, len(scores), size=(count, min(size, len(scores))))
+    winners = np.argmax(scores[contestants], axis=1)
+    return contestants[np.arange(count), winners]
+
+
+def rank_selection(
+    scores: np.ndarray, count: int, rng: np.random.Generator, size: int = 3
+) -> np.ndarray:
+    """Selekcja rankingowa - prawdopodobieństwo rośnie liniowo z pozycją w rankingu"""
+    ranks = np.empty(len(scores))
+    ranks[np.argsort(scores, kind="stable")] = np.arange(1, len(scores) + 1)
+    return rng.choice(len(scores), size=count, p=ranks / ranks.sum())
+
+
+def stochastic_universal_selection(
+    scores: np.ndarray, count: int, rng: np.random.Generator, size: int = 3
+) -> np.ndarray:
+    """Stochastic universal sampling - `count` równo rozłożonych wskaźników na kole
+    ruletki ważonym przystosowaniem.
+
+    Wagą jest przewaga nad najgorszym dopuszczalnym osobnikiem (plus stała, by i on
+    mógł zostać wybrany); osobniki niedopuszczalne mają wagę zero.
+    """
+    if count <= 0:
+        # Wszystkie miejsca zajęła elita
+        return np.empty(0, dtype=np.intp)
+    feasible = np.isfinite(scores)
+    if not feasible.any():
+        weights = np.ones(len(scores))
+    else:
+        worst, best = scores[feasible].min(), scores[feasible].max()
+        offset = (best - worst) / len(scores) if best > worst else 1.0
+        weights = np.where(feasible, scores - worst + offset, 0.0)
+
+    cumulative = np.cumsum(weights)
+    step = cumulative[-1] / count
+    pointers = rng.random() * step + step * np.arange(count)
+    selected = np.searchsorted(cumulative, pointers, side="right")
+    # Wskaźniki są uporządkowane - kolejność mieszana, by pary rodziców były losowe
+    return rng.permutation(np.minimum(selected, len(scores) - 1))
+
+
+SELECTION_METHODS: Dict[str, SelectionMethod] = {
+    "tournament": tournament_selection,
+    "rank": rank_selection,
+    "sus": stochastic_universal_selection,
+}
+
+
+def elite_count(population_size: int, elite_fraction: float) -> int:
+    """Liczba najlepszych osobników przechodzących bez zmian do kolejnej generacji"""
+    if elite_fraction <= 0:
+        return 0
+    return min(population_size, ceil(elite_fraction * population_size))
+
+
+def elite_indices(
+    scores: np.ndarray, count: int, feasible: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Indeksy `count` najlepszych osobników (od najlepszego); przy podanej masce
+    `feasible` osobniki dopuszczalne poprzedzają pozostałe"""
+    if count == 0:
+        return np.empty(0, dtype=np.intp)
+    if feasible is None:
+        return np.argsort(-scores, kind="stable")[:count]
+    return np.lexsort((-scores, ~feasible))[:count]
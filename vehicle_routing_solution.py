@@ -0,0 +1,108 @@
+import csv
+import json
+from typing import IO, Any, Dict, Iterator, List, NamedTuple, Tuple
+
+import numpy as np
+
+# Kolumny eksportu przystanków (CSV i tablice kolumnowe) i ich typy
+STOP_COLUMNS = {
+    "vehicle": np.int32,
+    "sequence": np.int32,
+    "stop": object,
+    "latitude": np.float64,
+    "longitude": np.float64,
+    "demand": np.int64,
+    "cumulative_load": np.int64,
+    "leg_distance": np.float64,
+    "cumulative_distance": np.float64,
+}
+
+
+class RouteSummary(NamedTuple):
+    """Metryki jednej trasy"""
+
+    vehicle: int  # numer pojazdu od 1
+    stops: List[str]
+    distance: float
+    load: int
+
+
+class Solution(list):
+    """Trasy pojazdów z metrykami policzonymi raz przy tworzeniu.
+
+    Obiekt jest listą tras (list nazw miast), więc może być używany wszędzie tam,
+    gdzie dotąd przekazywano trasy. Tworzy go VehicleRoutingProblem.solution.
+    """
+
+    def __init__(
+        self,
+        routes: List[List[str]],
+        legs: List[List[float]],
+        demands: Dict[str, int],
+        coordinates: Dict[str, Tuple[float, float]],
+        depot: str,
+        feasible: bool,
+    ):
+        super().__init__(list(route) for route in routes)
+        # Odcinki trasy: od bazy do pierwszego miasta, ..., od ostatniego do bazy
+        self.legs = legs
+        self.demands = demands
+        self.coordinates = coordinates
+        self.depot = depot
+        self.feasible = feasible
+        self.distances = [sum(route_legs) for route_legs in legs]
+        self.loads = [sum(demands[city] for city in route) for route in self]
+        self.total_distance = sum(self.distances)
+        self.total_load = sum(self.loads)
+
+    def summaries(self) -> Iterator[RouteSummary]:
+        """Metryki kolejnych tras"""
+        for i, route in enumerate(self):
+            yield RouteSummary(i + 1, route, self.distances[i], self.loads[i])
+
+    def stop_rows(self) -> Iterator[Tuple[Any, ...]]:
+        """Wiersze przystanków w kolejności kolumn STOP_COLUMNS"""
+        for vehicle, route in enumerate(self, 1):
+            load = 0
+            distance = 0.0
+            for sequence, city in enumerate(route, 1):
+                leg = self.legs[vehicle - 1][sequence - 1]
+                load += self.demands[city]
+                distance += leg
+                latitude, longitude = self.coordinates[city]
+                yield (
+                    vehicle,
+                    sequence,
+                    city,
+                    latitude,
+                    longitude,
+                    self.demands[city],
+                    load,
+                    leg,
+                    distance,
+                )
+
+    def write_csv(self, file: IO[str]) -> None:
+        """Przystanki jako CSV zapisywane wiersz po wierszu"""
+        writer = csv.writer(file)
+        writer.writerow(STOP_COLUMNS)
+        writer.writerows(self.stop_rows())
+
+    def write_json_lines(self, file: IO[str]) -> None:
+        """Jedna linia JSON na trasę (z bazą na początku i końcu)"""
+        for summary in self.summaries():
+            record = {
+                "vehicle": summary.vehicle,
+                "stops": [self.depot] + summary.stops + [self.depot],
+                "distance": summary.distance,
+                "load": summary.load,
+            }
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def to_columns(self) -> Dict[str, np.ndarray]:
+        """Przystanki jako tablice kolumnowe, np. dla pyarrow.table(...) i Parquet"""
+        values = list(zip(*self.stop_rows())) or [()] * len(STOP_COLUMNS)
+        return {
+            name: np.array(column, dtype=dtype)
+            for (name, dtype), column in zip(STOP_COLUMNS.items(), values)
+        }
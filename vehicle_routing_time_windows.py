@@ -0,0 +1,178 @@
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+# Funkcje przyjmują VehicleRoutingProblem (bez importu - moduł optymalizacji używa
+# tego modułu). Czasy: problem.earliest / latest / service_times dla każdego miasta,
+# route_start (wyjazd z bazy) i route_deadline (najpóźniejszy powrót, z limitem
+# czasu trasy), a czas przejazdu to odległość podzielona przez travel_speed.
+
+
+def travel_time(problem, origin: int, destination: int) -> float:
+    return problem.distance_matrix[origin, destination] / problem.travel_speed
+
+
+def connection_feasible(
+    problem,
+    departure: float,
+    previous: int,
+    cities: Iterable[int],
+    following: int,
+    following_latest: float,
+) -> bool:
+    """Czy po wyjeździe z `previous` o czasie `departure` można obsłużyć kolejno
+    `cities` (w ich oknach czasowych) i dotrzeć do `following` najpóźniej o
+    `following_latest`"""
+    time = departure
+    for city in cities:
+        time = max(problem.earliest[city], time + travel_time(problem, previous, city))
+        if time > problem.latest[city]:
+            return False
+        time += problem.service_times[city]
+        previous = city
+    return time + travel_time(problem, previous, following) <= following_latest
+
+
+def append_departure(
+    problem, departure: float, previous: int, city: int
+) -> Optional[float]:
+    """Wyjazd z miasta dołączonego na koniec trasy (po wyjeździe z `previous` o czasie
+    `departure`) lub None, gdy nie mieści się ono w oknie albo nie zdąży wrócić do bazy
+    """
+    start = max(
+        problem.earliest[city], departure + travel_time(problem, previous, city)
+    )
+    if start > problem.latest[city]:
+        return None
+    departure = start + problem.service_times[city]
+    if departure + travel_time(problem, city, problem.depot_index) > (
+        problem.route_deadline
+    ):
+        return None
+    return departure
+
+
+def route_times_feasible(problem, route: List[int]) -> bool:
+    """Sprawdzenie okien czasowych i limitu czasu całej trasy"""
+    return connection_feasible(
+        problem,
+        problem.route_start,
+        problem.depot_index,
+        route,
+        problem.depot_index,
+        problem.route_deadline,
+    )
+
+
+def route_lateness(problem, route: List[int]) -> float:
+    """Łączne spóźnienie trasy w oknach czasowych i przy powrocie do bazy.
+
+    Po spóźnieniu czas cofany jest do końca okna, więc każde naruszenie liczone jest
+    raz, a nie przenoszone na kolejne przystanki. Trasa dopuszczalna ma wynik 0.
+    """
+    time = problem.route_start
+    previous = problem.depot_index
+    lateness = 0.0
+    for city in route:
+        time = max(problem.earliest[city], time + travel_time(problem, previous, city))
+        if time > problem.latest[city]:
+            lateness += time - problem.latest[city]
+            time = problem.latest[city]
+        time += problem.service_times[city]
+        previous = city
+    time += travel_time(problem, previous, problem.depot_index)
+    return lateness + max(0.0, time - problem.route_deadline)
+
+
+class RouteSchedule:
+    """Harmonogram trasy z luzem czasowym liczonym w przód i wstecz.
+
+    Węzły to baza, miasta trasy i ponownie baza. `departures[k]` to najwcześniejszy
+    wyjazd z węzła k, a `latest[k]` - najpóźniejszy przyjazd do węzła k, przy którym
+    reszta trasy (okna czasowe i powrót do bazy) pozostaje dopuszczalna. Dzięki temu
+    wstawienie lub usunięcie miasta sprawdzane jest w czasie stałym - wystarczy
+    porównać nowy czas przyjazdu do następnika z jego luzem.
+    """
+
+    __slots__ = (
+        "problem",
+        "nodes",
+        "departures",
+        "prefix_feasible",
+        "latest",
+        "feasible",
+    )
+
+    def __init__(self, problem, route: List[int]):
+        self.problem = problem
+        depot = problem.depot_index
+        nodes = [depot] + list(route) + [depot]
+        self.nodes = nodes
+
+        # prefix_feasible[k]: okna czasowe węzłów 0..k są dotrzymane
+        departures = [problem.route_start]
+        prefix_feasible = [True]
+        for k in range(1, len(nodes) - 1):
+            city = nodes[k]
+            start = max(
+                problem.earliest[city],
+                departures[-1] + travel_time(problem, nodes[k - 1], city),
+            )
+            prefix_feasible.append(
+                prefix_feasible[-1] and start <= problem.latest[city]
+            )
+            departures.append(start + problem.service_times[city])
+        self.departures = departures
+        self.prefix_feasible = prefix_feasible
+
+        latest = [0.0] * len(nodes)
+        latest[-1] = problem.route_deadline
+        for k in range(len(nodes) - 2, 0, -1):
+            city = nodes[k]
+            bound = min(
+                problem.latest[city],
+                latest[k + 1]
+                - travel_time(problem, city, nodes[k + 1])
+                - problem.service_times[city],
+            )
+            # Gdy okno zamyka się przed otwarciem, żaden przyjazd nie jest dopuszczalny
+            latest[k] = bound if bound >= problem.earliest[city] else float("-inf")
+        latest[0] = float("inf")
+        self.latest = latest
+        self.feasible = (
+            prefix_feasible[-1]
+            and departures[-1] + travel_time(problem, nodes[-2], depot)
+            <= problem.route_deadline
+        )
+
+    def can_insert(self, city: int, position: int) -> bool:
+        """Wstawienie miasta przed pozycję `position` trasy - O(1)"""
+        return self.prefix_feasible[position] and connection_feasible(
+            self.problem,
+            self.departures[position],
+            self.nodes[position],
+            (city,),
+            self.nodes[position + 1],
+            self.latest[position + 1],
+        )
+
+    def can_replace(self, start: int, end: int, cities: Iterable[int]) -> bool:
+        """Zastąpienie miast z pozycji start..end (włącznie) przez `cities`.
+
+        Pusty zakres (end = start - 1) oznacza wstawienie, puste `cities` - usunięcie;
+        koszt zależy tylko od liczby nowych miast.
+        """
+        return self.prefix_feasible[start] and connection_feasible(
+            self.problem,
+            self.departures[start],
+            self.nodes[start],
+            cities,
+            self.nodes[end + 2],
+            self.latest[end + 2],
+        )
+
+    def insertion_mask(self, city: int) -> np.ndarray:
+        """Dopuszczalność wstawienia miasta na każdą z pozycji 0..len(trasy)"""
+        return np.array(
+            [self.can_insert(city, position) for position in range(len(self.nodes) - 1)]
+        )
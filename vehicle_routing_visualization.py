@@ -1,24 +1,57 @@
-import folium
-from folium import plugins
-from cities_data import cities_data, city_demands
-from vehicle_routing_optimization import VehicleRoutingProblem
+import colorsys
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from vehicle_routing_optimization import VehicleRoutingProblem, haversine_pairs
+from vehicle_routing_solution import Solution
 
-def calculate_route_distance(route, distance_matrix, cities):
+# Kolory pierwszych tras; kolejne generowane są przez generate_palette
+BASE_COLORS = ["red", "blue", "green", "purple", "orange"]
+
+# Powyżej tej liczby miast mapa używa warstw zbiorczych zamiast osobnych znaczników
+DETAILED_STOPS_LIMIT = 300
+
+# Liczba miast pokazywanych na początku i końcu opisu długiej trasy
+DESCRIPTION_STOPS = 5
+
+# Znacznik miasta w warstwie klastrów - wiersz danych: [lat, lon, kolor, opis]
+CLUSTER_MARKER_CALLBACK = """
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: 5, color: row[2], fillColor: row[2], fillOpacity: 0.8, weight: 1
+    });
+    marker.bindTooltip(row[3]);
+    return marker;
+}
+"""
+
+
+def generate_palette(count: int) -> List[str]:
+    """Kolory dla dowolnej liczby tras - po wyczerpaniu BASE_COLORS kolejne odcienie
+    rozkładane są złotym kątem, więc sąsiednie trasy mają wyraźnie różne barwy"""
+    colors = BASE_COLORS[:count]
+    for i in range(count - len(colors)):
+        hue = (0.11 + i * 0.618033988749895) % 1.0
+        lightness = 0.4 if i % 2 else 0.5
+        red, green, blue = colorsys.hls_to_rgb(hue, lightness, 0.75)
+        colors.append(
+            f"#{int(red * 255):02x}{int(green * 255):02x}{int(blue * 255):02x}"
+        )
+    return colors
+
+
+def calculate_route_distance(route, distance_matrix, cities, depot="Kraków"):
     """Obliczenie dystansu dla danej trasy"""
+    index = {city: i for i, city in enumerate(cities)}
     total_distance = 0
-    current_city = "Kraków"
+    current_index = index[depot]
 
     for city in route:
-        city_index = cities.index(city)
-        current_index = cities.index(current_city)
-        total_distance += distance_matrix[current_index][city_index]
-        current_city = city
+        city_index = index[city]
+        total_distance += distance_matrix[current_index, city_index]
+        current_index = city_index
 
-    # Dodanie odległości powrotu do Krakowa
-    city_index = cities.index("Kraków")
-    current_index = cities.index(current_city)
-    total_distance += distance_matrix[current_index][city_index]
+    # Dodanie odległości powrotu do bazy
+    total_distance += distance_matrix[current_index, index[depot]]
 
     return total_distance
 
@@ -28,46 +61,110 @@ def calculate_route_demand(route, city_demands):
     return sum(city_demands[city] for city in route)
 
 
-def visualize_routes(cities_data, routes):
-    """Wizualizacja tras na mapie Polski z zaawansowanym panelem bocznym"""
-    # Centrum mapy - Kraków
-    m = folium.Map(location=[50.0647, 19.9450], zoom_start=6)
+def _route_metrics(
+    cities_data: Dict[str, Tuple[float, float]],
+    routes: List[List[str]],
+    demands: Dict[str, int],
+    depot: str,
+    problem: Optional[VehicleRoutingProblem],
+) -> List[Tuple[float, int]]:
+    """Dystans i zapotrzebowanie tras bez budowy macierzy odległości"""
+    metrics = []
+    for route in routes:
+        if problem is not None:
+            distance = problem._route_distance(problem._encode([route])[0])
+        else:
+            coords = [cities_data[city] for city in [depot] + route + [depot]]
+            distance = float(haversine_pairs(coords[:-1], coords[1:]).sum())
+        metrics.append((float(distance), calculate_route_demand(route, demands)))
+    return metrics
+
+
+def _describe_route(route: List[str], depot: str) -> str:
+    """Opis trasy; długie trasy skracane są do początku i końca"""
+    if len(route) > 2 * DESCRIPTION_STOPS:
+        hidden = len(route) - 2 * DESCRIPTION_STOPS
+        route = (
+            route[:DESCRIPTION_STOPS]
+            + [f"… ({hidden} miast) …"]
+            + route[-DESCRIPTION_STOPS:]
+        )
+    return " → ".join([depot] + route + [depot])
 
-    # Kolory dla różnych tras
-    colors = ["red", "blue", "green", "purple", "orange"]
 
-    # Przygotowanie VRP dla obliczenia odległości
-    vrp = VehicleRoutingProblem(cities_data, city_demands)
+def visualize_routes(
+    cities_data,
+    routes,
+    problem: Optional[VehicleRoutingProblem] = None,
+    route_metrics: Optional[Sequence[Tuple[float, int]]] = None,
+    output_path: str = "vehicle_routing_map.html",
+    demands: Optional[Dict[str, int]] = None,
+):
+    """Wizualizacja tras na mapie Polski z zaawansowanym panelem bocznym.
 
-    # Dodanie Krakowa jako punktu startowego
+    Dystanse i zapotrzebowanie tras pochodzą z `routes`, jeśli jest to Solution,
+    z `route_metrics` (pary dystans, zapotrzebowanie) albo z przekazanego problemu;
+    bez nich zapotrzebowanie liczone jest z `demands`, a dystans z odległości
+    haversine wzdłuż tras (macierz odległości nie jest budowana). Bez żadnego
+    z tych źródeł zgłaszany jest ValueError. Przy więcej niż
+    DETAILED_STOPS_LIMIT miastach znaczniki trafiają do jednej warstwy klastrów,
+    a trasy do jednej warstwy GeoJSON, dzięki czemu rozmiar pliku rośnie liniowo
+    i mapa pozostaje płynna.
+    """
+    depot = problem.depot if problem is not None else "Kraków"
+    if isinstance(routes, Solution):
+        depot = routes.depot
+        if route_metrics is None:
+            route_metrics = list(zip(routes.distances, routes.loads))
+    if problem is not None and demands is None:
+        demands = problem.city_demands
+    if route_metrics is None and demands is None:
+        raise ValueError(
+            "Trasy bez metryk wymagają problemu, zapotrzebowania miast (demands) "
+            "lub rozwiązania Solution."
+        )
+
+    # folium importowany dopiero przy rysowaniu - sam solver go nie potrzebuje
+    import folium
+    from folium import plugins
+
+    depot_coords = list(cities_data[depot])
+
+    # Centrum mapy - baza
+    m = folium.Map(location=depot_coords, zoom_start=6)
+
+    # Kolory dla różnych tras
+    colors = generate_palette(len(routes))
+    if route_metrics is None:
+        route_metrics = _route_metrics(cities_data, routes, demands, depot, problem)
+    detailed = sum(len(route) for route in routes) <= DETAILED_STOPS_LIMIT
+
+    # Dodanie bazy jako punktu startowego
     folium.Marker(
-        [50.0647, 19.9450],
-        popup="Kraków - Punkt startowy",
+        depot_coords,
+        popup=f"{depot} - Punkt startowy",
         icon=folium.Icon(color="black", icon="home"),
     ).add_to(m)
 
     # Przygotowanie opisu tras
     routes_html = ""
     total_route_distance = 0
+    route_features = []
+    cluster_rows = []
 
     for i, route in enumerate(routes):
-        # Trasa z Krakowa przez miasta do Krakowa (pełna pętla)
+        # Trasa z bazy przez miasta do bazy (pełna pętla)
         route_coords = (
-            [cities_data["Kraków"]]
+            [cities_data[depot]]
             + [cities_data[city] for city in route]
-            + [cities_data["Kraków"]]
+            + [cities_data[depot]]
         )
 
-        # Obliczenie dystansu trasy
-        route_distance = calculate_route_distance(
-            route, vrp.distance_matrix, vrp.cities
-        )
-        route_demand = calculate_route_demand(route, city_demands)
+        route_distance, route_demand = route_metrics[i]
         total_route_distance += route_distance
 
         # Formatowanie opisu trasy
-        full_route = ["Kraków"] + route + ["Kraków"]
-        route_description = " → ".join(full_route)
+        route_description = _describe_route(route, depot)
 
         routes_html += f"""
         <div class="route-card" style="border-left: 5px solid {colors[i]}; margin-bottom: 10px; padding: 10px; background-color: #f9f9f9;">
@@ -82,6 +179,28 @@ def visualize_routes(cities_data, routes):
         </div>
         """
 
+        if not detailed:
+            route_features.append(
+                {
+                    "type": "Feature",
+                    "properties": {"color": colors[i], "vehicle": i + 1},
+                    # GeoJSON zapisuje współrzędne w kolejności (lon, lat)
+                    "geometry": {
+                        "type": "LineString",
+                        "coordinates": [[lon, lat] for lat, lon in route_coords],
+                    },
+                }
+            )
+            cluster_rows.extend(
+                [
+                    *cities_data[city],
+                    colors[i],
+                    f"{city} (Pojazd {i+1}, Kolejność: {j})",
+                ]
+                for j, city in enumerate(route, 1)
+            )
+            continue
+
         plugins.AntPath(
             route_coords,
             color=colors[i],
@@ -97,9 +216,28 @@ def visualize_routes(cities_data, routes):
                 cities_data[city],
                 popup=f"{city} (Pojazd {i+1}, Kolejność: {j})",
                 tooltip=f"{city} - Kolejność: {j}",
-                icon=folium.Icon(color=colors[i], icon="info-sign"),
+                icon=plugins.BeautifyIcon(
+                    icon_shape="marker",
+                    number=j,
+                    border_color=colors[i],
+                    text_color=colors[i],
+                ),
             ).add_to(m)
 
+    if not detailed:
+        folium.GeoJson(
+            {"type": "FeatureCollection", "features": route_features},
+            name="Trasy",
+            style_function=lambda feature: {
+                "color": feature["properties"]["color"],
+                "weight": 3,
+                "opacity": 0.8,
+            },
+        ).add_to(m)
+        plugins.FastMarkerCluster(
+            cluster_rows, callback=CLUSTER_MARKER_CALLBACK, name="Miasta"
+        ).add_to(m)
+
     # Dodanie panelu bocznego z trasami
     sidebar_html = f"""
     <div style="
@@ -129,5 +267,5 @@ def visualize_routes(cities_data, routes):
     m.get_root().html.add_child(folium.Element(sidebar_html))
 
     # Zapis mapy
-    m.save("vehicle_routing_map.html")
+    m.save(output_path)
     return m
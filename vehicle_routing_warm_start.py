@@ -0,0 +1,253 @@
+import random
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from vehicle_routing_optimization import (
+    CondensedDistanceMatrix,
+    DistanceMatrix,
+    Individual,
+    SparseDistanceMatrix,
+    VehicleRoutingProblem,
+)
+from vehicle_routing_repair import eject_violations, insert_cheapest
+from vehicle_routing_solution import Solution
+
+
+class StopChanges(NamedTuple):
+    """Zmiany punktów dostaw względem poprzedniego planu.
+
+    `added` - nowe miasta i ich współrzędne, `removed` - miasta usunięte z planu,
+    `demands` - zapotrzebowanie nowych miast (wymagane dla każdego z nich) oraz nowe
+    wartości dla istniejących.
+    Przeniesienie miasta to jego usunięcie i ponowne dodanie pod tą samą nazwą.
+    """
+
+    added: Optional[Dict[str, Tuple[float, float]]] = None
+    removed: Optional[List[str]] = None
+    demands: Optional[Dict[str, int]] = None
+
+
+def patch_distance_matrix(
+    problem: VehicleRoutingProblem,
+    kept: List[str],
+    added: Dict[str, Tuple[float, float]],
+) -> DistanceMatrix:
+    """Macierz odległości dla miast `kept` + `added` bez ponownego liczenia starych par.
+
+    Odległości między zachowanymi miastami kopiowane są z macierzy problemu, a metryką
+    liczone są tylko wiersze i kolumny nowych miast. Macierz rzadka (najbliżsi sąsiedzi)
+    budowana jest od nowa indeksem przestrzennym, bo nowe miasta zmieniają listy
+    sąsiadów, a koszt budowy i tak jest niemal liniowy.
+    """
+    matrix = problem.distance_matrix
+    keep = np.array([problem.city_index[city] for city in kept], dtype=np.int64)
+    m = len(keep)
+    n = m + len(added)
+
+    coords = np.array(
+        [problem.cities_data[city] for city in kept] + list(added.values()),
+        dtype=np.float64,
+    ).reshape(n, 2)
+    if isinstance(matrix, SparseDistanceMatrix):
+        return SparseDistanceMatrix.from_coordinates(
+            coords,
+            k=problem.distance_neighbours,
+            dtype=matrix.dtype,
+            chunk_size=max(1, problem.distance_chunk_size),
+            metric=problem.distance_metric,
+        )
+
+    new_rows = problem._distance_block(coords[m:], coords)
+    new_rows[np.arange(n - m), np.arange(m, n)] = 0.0
+
+    if isinstance(matrix, CondensedDistanceMatrix):
+        data = np.empty(n * (n - 1) // 2, dtype=matrix.dtype)
+        for i in range(n):
+            offset = CondensedDistanceMatrix._row_offset(i, n)
+            if i < m:
+                row = matrix.row(int(keep[i]))
+                data[offset : offset + m - i - 1] = row[keep[i + 1 :]]
+                data[offset + m - i - 1 : offset + n - i - 1] = new_rows[:, i]
+            else:
+                data[offset : offset + n - i - 1] = new_rows[i - m, i + 1 :]
+        return CondensedDistanceMatrix(data, n)
+
+    patched = np.empty((n, n), dtype=matrix.dtype)
+    patched[:m, :m] = matrix[np.ix_(keep, keep)]
+    patched[m:, :] = new_rows
+    if problem.symmetric_distances:
+        patched[:m, m:] = new_rows[:, :m].T
+    else:
+        patched[:m, m:] = problem._distance_block(coords[:m], coords[m:])
+    return patched
+
+
+def apply_changes(
+    problem: VehicleRoutingProblem, changes: StopChanges
+) -> VehicleRoutingProblem:
+    """Nowy problem po zmianach punktów dostaw (z poprawioną, a nie przeliczoną macierzą)"""
+    added = dict(changes.added or {})
+    removed = set(changes.removed or ())
+    demands = dict(changes.demands or {})
+
+    if problem.depot in removed:
+        raise ValueError(f"Nie można usunąć bazy {problem.depot}.")
+    unknown = removed.difference(problem.city_index)
+    if unknown:
+        raise ValueError(f"Nieznane miasta do usunięcia: {', '.join(sorted(unknown))}")
+
+    kept = [city for city in problem.cities if city not in removed]
+    duplicates = set(kept).intersection(added)
+    if duplicates:
+        raise ValueError(f"Miasta już istnieją: {', '.join(sorted(duplicates))}")
+    missing = set(demands).difference(kept).difference(added)
+    if missing:
+        raise ValueError(
+            f"Zmiana zapotrzebowania nieznanych miast: {', '.join(sorted(missing))}"
+        )
+    undeclared = set(added).difference(demands)
+    if undeclared:
+        raise ValueError(
+            f"Brak zapotrzebowania nowych miast: {', '.join(sorted(undeclared))}"
+        )
+
+    cities_data = {city: problem.cities_data[city] for city in kept}
+    cities_data.update(added)
+    city_demands = {
+        city: demand
+        for city, demand in problem.city_demands.items()
+        if city not in removed
+    }
+    city_demands.update(demands)
+
+    return VehicleRoutingProblem(
+        cities_data,
+        city_demands,
+        num_vehicles=problem.num_vehicles,
+        vehicle_capacity=problem.vehicle_capacity,
+        distance_storage=problem.distance_storage,
+        distance_chunk_size=problem.distance_chunk_size,
+        distance_matrix=patch_distance_matrix(problem, kept, added),
+        depot=problem.depot,
+        distance_metric=problem.distance_metric,
+        distance_neighbours=problem.distance_neighbours,
+        distance_provider=problem.distance_provider,
+        time_windows=problem.time_windows,
+        service_times=problem.city_service_times,
+        max_route_duration=problem.max_route_duration,
+        travel_speed=problem.travel_speed,
+        backend=problem.backend,
+    )
+
+
+def repair_individual(
+    problem: VehicleRoutingProblem, routes: List[List[str]]
+) -> Tuple[Individual, List[int]]:
+    """Dopasowanie poprzedniego planu do problemu po zmianach.
+
+    Usunięte miasta są pomijane, z tras przeładowanych lub spóźnionych usuwane są
+    miasta (eject_violations), a nowe i usunięte w ten sposób miasta wstawiane są
+    metodą najtańszego wstawienia (najpierw te o największym zapotrzebowaniu).
+    """
+    if len(routes) > problem.num_vehicles:
+        raise ValueError(
+            f"Plan ma więcej tras ({len(routes)}) niż pojazdów ({problem.num_vehicles})."
+        )
+
+    city_index = problem.city_index
+    served = set()
+    individual: Individual = []
+    for route in routes:
+        encoded = []
+        for city in route:
+            index = city_index.get(city)
+            if (
+                index is not None
+                and index != problem.depot_index
+                and index not in served
+            ):
+                served.add(index)
+                encoded.append(index)
+        individual.append(encoded)
+    individual.extend([] for _ in range(problem.num_vehicles - len(routes)))
+
+    loads = problem._route_loads(individual)
+    pending = [city for city in problem.customers if city not in served]
+    pending.extend(eject_violations(problem, individual, loads))
+
+    pending.sort(key=problem.demands.__getitem__, reverse=True)
+    insert_cheapest(problem, individual, loads, pending)
+    return individual, loads
+
+
+def warm_start_population(
+    problem: VehicleRoutingProblem,
+    routes: List[List[str]],
+    size: int,
+    rng: random.Random,
+    ruin_fraction: float = 0.1,
+) -> List[List[List[str]]]:
+    """Populacja początkowa z poprzedniego planu.
+
+    Pierwszym osobnikiem jest naprawiony plan, a kolejne powstają przez usunięcie
+    losowej części jego miast (`ruin_fraction`) i ponowne wstawienie ich w losowej
+    kolejności, co daje różnorodne, ale bliskie planowi rozwiązania.
+    """
+    base, base_loads = repair_individual(problem, routes)
+    population = [problem._decode(base)]
+    ruin_size = max(1, round(ruin_fraction * len(problem.customers)))
+
+    for _ in range(size - 1):
+        individual = [list(route) for route in base]
+        loads = list(base_loads)
+        removed = set(
+            rng.sample(problem.customers, min(ruin_size, len(problem.customers)))
+        )
+        for vehicle, route in enumerate(individual):
+            individual[vehicle] = [city for city in route if city not in removed]
+            loads[vehicle] = sum(problem.demands[city] for city in individual[vehicle])
+
+        cities = list(removed)
+        rng.shuffle(cities)
+        insert_cheapest(problem, individual, loads, cities)
+        population.append(problem._decode(individual))
+
+    return population
+
+
+def reoptimize(
+    problem: VehicleRoutingProblem,
+    previous_routes: List[List[str]],
+    changes: StopChanges,
+    population_size: int = 200,
+    generations: int = 100,
+    mutation_rate: float = 0.1,
+    seed: Optional[int] = None,
+    seed_fraction: float = 0.5,
+    ruin_fraction: float = 0.1,
+    **options,
+) -> Tuple[VehicleRoutingProblem, Solution]:
+    """Ponowna optymalizacja planu po zmianie zapotrzebowania lub listy miast.
+
+    Zwraca nowy problem oraz najlepsze trasy. Część `seed_fraction` populacji
+    początkowej pochodzi z poprzedniego planu (warm_start_population), reszta jest
+    losowa, aby zachować różnorodność. Pozostałe argumenty przekazywane są do
+    genetic_algorithm.
+    """
+    updated = apply_changes(problem, changes)
+    rng = random.Random(seed)
+    seeded = max(1, min(population_size, round(seed_fraction * population_size)))
+    initial_population = warm_start_population(
+        updated, previous_routes, seeded, rng, ruin_fraction
+    )
+
+    routes = updated.genetic_algorithm(
+        population_size,
+        generations,
+        mutation_rate,
+        seed=seed,
+        initial_population=initial_population,
+        **options,
+    )
+    return updated, routes